@@ -1,4 +1,3 @@
-import sys
 import os
 import imp
 from setuptools import setup, find_packages
@@ -15,11 +14,6 @@ install_requires = [
     'GitPython',
     'docutils>=0.9.1']
 
-# Shims for missing stuff in Python 2.6
-major, minor, patch, releaselevel, serial = sys.version_info
-if major == 2 and minor < 7:
-    install_requires += ['ordereddict==1.1', 'unittest2==0.5.1']
-
 setup(
     name='jig',
     version=version,
@@ -32,8 +26,13 @@ setup(
         'Intended Audience :: Developers',
         'Natural Language :: English',
         'Operating System :: POSIX',
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         'Topic :: Software Development :: Quality Assurance',
         'Topic :: Software Development :: Version Control',
         'Topic :: Text Processing'
@@ -47,7 +46,10 @@ setup(
     package_dir={'': 'src'},
     include_package_data=True,
     zip_safe=False,
+    python_requires='>=3.7',
     install_requires=install_requires,
+    extras_require={
+        'msgpack': ['msgpack']},
     entry_points={
         'console_scripts': [
             'jig = jig.entrypoints:main']}
@@ -0,0 +1,272 @@
+"""
+Reporting on many repositories
+==============================
+
+``jig report --repos`` checks a list of repositories in one process instead
+of running jig once for each of them. A few repositories are checked at the
+same time and the results for each one are shown as soon as it's done.
+
+Repositories that have the same plugins installed, with the same files and
+the same settings, share one :py:class:`jig.plugins.PluginManager`. Their
+plugin configs are read once and Python plugins are only imported once for
+all of them.
+"""
+import os
+import json
+from io import StringIO
+from hashlib import sha1
+from threading import Lock
+from collections import namedtuple, OrderedDict
+from os.path import join, isdir, isfile, dirname, abspath
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from jig.conf import REPORT_MAX_REPOS
+from jig.exc import ForcedExit, GitRepoNotInitialized
+from jig.output import (
+    ConsoleView, ResultsCollator, flush_printer, WARN, STOP)
+from jig.gitutils.checks import repo_jiginitialized
+from jig.plugins import get_jigconfig, PluginManager
+from jig.plugins.cache import directory_digest
+
+
+RepoReport = namedtuple('RepoReport', 'gitrepo notices lines problems failed')
+RepoReport.__doc__ = """
+The outcome of checking one repository.
+
+``notices`` are what jig said along the way, like there being no changes to
+check, and ``lines`` are the formatted results. ``problems`` is how many
+warnings, stops and plugin errors there were. ``failed`` is ``True`` if the
+repository could not be checked at all, ``notices`` say why.
+"""
+
+
+def read_repos_file(filename):
+    """
+    The repositories listed in ``filename``, one on each line.
+
+    Blank lines and lines starting with ``#`` are skipped. Relative paths are
+    relative to the directory ``filename`` is in.
+    """
+    base = dirname(abspath(filename))
+
+    with open(filename) as fh:
+        lines = [i.strip() for i in fh]
+
+    return [
+        join(base, i) for i in lines if i and not i.startswith('#')]
+
+
+def find_repos(directory):
+    """
+    The jig-initialized Git repositories in or under ``directory``.
+
+    Repositories inside another repository are not looked for.
+    """
+    found = []
+
+    for dirpath, dirnames, filenames in os.walk(directory):
+        if isdir(join(dirpath, '.git')) and repo_jiginitialized(dirpath):
+            found.append(dirpath)
+            dirnames[:] = []
+            continue
+
+        dirnames[:] = sorted(i for i in dirnames if i != '.git')
+
+    return found
+
+
+def repositories(location):
+    """
+    The repositories listed in the file ``location`` or found under it if
+    it's a directory.
+    """
+    if isfile(location):
+        return read_repos_file(location)
+
+    return find_repos(location)
+
+
+class SharedPlugins(object):
+
+    """
+    Plugin managers for many repositories.
+
+    Repositories with the same plugins get the same
+    :py:class:`jig.plugins.PluginManager`. The plugins are the same if they
+    have the same bundle and name, the same settings in the repository and
+    their directories have the same files in them.
+
+    """
+    def __init__(self):
+        self._lock = Lock()
+
+        # Plugin managers by signature
+        self._managers = {}
+
+    def __len__(self):
+        return len(self._managers)
+
+    def signature(self, config):
+        """
+        Identifies the plugins installed with ``config``.
+        """
+        parts = [config.get('jig', 'max_output', fallback=None)]
+
+        for section_name in config.sections():
+            if not section_name.startswith('plugin:'):
+                continue
+
+            settings = OrderedDict(config.items(section_name))
+            path = settings.pop('path')
+
+            parts.append([
+                section_name, sorted(settings.items()),
+                directory_digest(path)])
+
+        return sha1(json.dumps(parts).encode('utf-8')).hexdigest()
+
+    def manager(self, gitrepo):
+        """
+        The plugin manager for the plugins installed in ``gitrepo``.
+        """
+        config = get_jigconfig(gitrepo)
+        signature = self.signature(config)
+
+        with self._lock:
+            if signature not in self._managers:
+                self._managers[signature] = PluginManager(config)
+
+            return self._managers[signature]
+
+
+def check_repository(gitrepo, shared, formatter, rev_range, plugin=None,
+                     jobs=None):
+    """
+    Run the plugins in ``gitrepo`` on ``rev_range``.
+
+    The plugins come from ``shared``, a :py:class:`SharedPlugins`, and the
+    results are formatted with an instance of the ``formatter`` class.
+
+    Returns a :py:class:`RepoReport`.
+    """
+    from jig.gitutils.branches import (
+        parse_rev_range, prepare_working_directory)
+    from jig.runner import Runner
+
+    stdout, stderr = StringIO(), StringIO()
+    view = ConsoleView(
+        collect_output=True, exit_on_exception=False,
+        stdout=stdout, stderr=stderr)
+
+    runner = Runner(view=view, formatter=formatter, jobs=jobs)
+
+    lines = []
+    problems = 0
+    failed = False
+
+    try:
+        if not repo_jiginitialized(gitrepo):
+            raise GitRepoNotInitialized(
+                'This repository has not been initialized.')
+
+        pm = shared.manager(gitrepo)
+        rev_range_parsed = parse_rev_range(gitrepo, rev_range)
+
+        with prepare_working_directory(gitrepo, rev_range_parsed):
+            results = runner.results(
+                gitrepo, plugin=plugin, rev_range=rev_range_parsed,
+                plugin_manager=pm)
+
+        if results:
+            collator = ResultsCollator(results)
+            runner.formatter.print_results(lines.append, collator)
+
+            problems = collator.counts[WARN] + \
+                collator.counts[STOP] + len(collator.errors)
+    except ForcedExit:
+        # The runner has already said what went wrong
+        failed = True
+    except Exception as e:
+        # One repository that can't be checked doesn't stop the others
+        stderr.write(str(e) + '\n')
+        failed = True
+
+    notices = [
+        i for i in (stdout.getvalue() + stderr.getvalue()).splitlines() if i]
+
+    return RepoReport(gitrepo, notices, lines, problems, failed)
+
+
+def _print_fancy(printer, number, report):
+    printer('\u25b8  {0}'.format(report.gitrepo))
+    printer('')
+
+    for line in report.notices + report.lines:
+        printer(line)
+
+    printer('')
+
+
+def _print_tap(printer, number, report):
+    printer('# Subtest: {0}'.format(report.gitrepo))
+
+    for line in report.notices:
+        printer('    # {0}'.format(line))
+
+    for line in report.lines:
+        if line.startswith('TAP version'):
+            continue
+        printer('    ' + line.replace('\n', '\n    '))
+
+    ok = not report.failed and not report.problems
+    printer('{0} {1} - {2}'.format(
+        'ok' if ok else 'not ok', number, report.gitrepo))
+
+
+def report_repositories(printer, gitrepos, formatter, rev_range, plugin=None,
+                        jobs=REPORT_MAX_REPOS):
+    """
+    Check each of ``gitrepos`` and print the results as they come in.
+
+    ``jobs`` repositories are checked at the same time. With the TAP
+    formatter each repository is a subtest of one TAP stream, otherwise each
+    one has a heading followed by what the formatter printed for it.
+
+    Returns a list of the :py:class:`RepoReport` for each repository, in the
+    order they finished.
+    """
+    shared = SharedPlugins()
+    tap = getattr(formatter, 'name', None) == 'tap'
+    print_report = _print_tap if tap else _print_fancy
+
+    if tap:
+        printer('TAP version 13')
+
+    reports = []
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                check_repository, gitrepo, shared, formatter, rev_range,
+                plugin=plugin)
+            for gitrepo in gitrepos]
+
+        for future in as_completed(futures):
+            reports.append(future.result())
+            print_report(printer, len(reports), reports[-1])
+            flush_printer(printer)
+
+    failed = len([i for i in reports if i.failed])
+    problems = len([i for i in reports if i.problems])
+
+    if tap:
+        printer('1..{0}'.format(len(reports)))
+        return reports
+
+    printer('Jig checked {0} {1}, {2} with problems, {3} could not be '
+            'checked'.format(
+                len(reports),
+                'repository' if len(reports) == 1 else 'repositories',
+                problems, failed))
+
+    return reports
@@ -0,0 +1,167 @@
+"""
+Synthetic Git repositories
+==========================
+
+Builds repositories of a known shape to benchmark jig against. Everything is
+generated from a seed so two runs with the same :py:class:`RepoShape` produce
+the same files, the same history and the same staged changes.
+"""
+import random
+from os import makedirs
+from os.path import join, dirname, isdir
+from collections import namedtuple
+
+from jig.conf import CODEC
+
+_SHAPE_FIELDS = (
+    'files', 'file_size', 'binary_ratio', 'modify_ratio', 'rename_ratio',
+    'commits', 'seed')
+
+RepoShape = namedtuple('RepoShape', ' '.join(_SHAPE_FIELDS))
+RepoShape.__new__.__defaults__ = (
+    100, 4096, 0.05, 0.2, 0.05, 3, 1)
+RepoShape.__doc__ = """
+What a generated repository looks like.
+
+``files`` is how many files the first commit has and ``file_size`` is roughly
+how large each of them is in bytes. ``binary_ratio`` of them are binary.
+
+Each of the following ``commits`` modifies ``modify_ratio`` of the files and
+renames ``rename_ratio`` of them. One more round of changes is left staged in
+the index, which is what the pre-commit hook would see.
+"""
+
+# Words to make up lines of text that look a little bit like code
+_WORDS = (
+    'def', 'class', 'return', 'import', 'self', 'value', 'result', 'for',
+    'in', 'if', 'else', 'None', 'True', 'False', 'data', 'index', 'name',
+    'path', 'plugin', 'config', 'diff', 'message', 'line', 'file')
+
+
+def _line(rand):
+    return ' '.join(rand.choice(_WORDS) for _ in range(rand.randint(1, 10)))
+
+
+def _text(rand, size):
+    lines = []
+    length = 0
+    while length < size:
+        line = _line(rand)
+        lines.append(line)
+        length += len(line) + 1
+
+    return '\n'.join(lines) + '\n'
+
+
+def _binary(rand, size):
+    data = bytearray(rand.getrandbits(8) for _ in range(size))
+    # Make sure it's seen as binary
+    return bytes(data) + b'\0'
+
+
+def _modify(rand, content):
+    """
+    Change, remove and add a few lines of ``content``.
+    """
+    lines = content.splitlines()
+
+    for _ in range(max(1, len(lines) // 10)):
+        action = rand.random()
+        position = rand.randint(0, max(0, len(lines) - 1))
+        if action < 0.4 and lines:
+            lines[position] = _line(rand)
+        elif action < 0.7 and lines:
+            del lines[position]
+        else:
+            lines.insert(position, _line(rand))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _write(gitrepo, name, content):
+    filename = join(gitrepo, name)
+
+    if not isdir(dirname(filename)):
+        makedirs(dirname(filename))
+
+    mode = 'wb' if isinstance(content, bytes) else 'w'
+    with open(filename, mode) as fh:
+        fh.write(content)
+
+
+def _read(gitrepo, name):
+    with open(join(gitrepo, name), 'rb') as fh:
+        return fh.read()
+
+
+def _change(repo, rand, shape, names, generation):
+    """
+    Make one round of changes to the files and stage them.
+
+    Returns the new list of file names.
+    """
+    names = list(names)
+    text = [i for i in names if not i.endswith('.bin')]
+
+    modify_count = int(len(text) * shape.modify_ratio)
+    for name in rand.sample(text, min(len(text), modify_count)):
+        content = _read(repo.working_dir, name).decode(CODEC)
+        _write(repo.working_dir, name, _modify(rand, content))
+        repo.git.add(name)
+
+    rename_count = int(len(names) * shape.rename_ratio)
+    for name in rand.sample(names, min(len(names), rename_count)):
+        renamed = '{0}.r{1}{2}'.format(
+            name[:-4], generation, name[-4:])
+        repo.git.mv(name, renamed)
+        names[names.index(name)] = renamed
+
+    return names
+
+
+def generate_repo(gitrepo, shape=None):
+    """
+    Create a Git repository in the ``gitrepo`` directory.
+
+    ``shape`` is a :py:class:`RepoShape`, the default shape is used if it's
+    ``None``.
+
+    Returns the :py:class:`git.Repo`.
+    """
+    from git import Repo
+
+    shape = shape or RepoShape()
+    rand = random.Random(shape.seed)
+
+    repo = Repo.init(gitrepo)
+
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'Jig Benchmark')
+        config.set_value('user', 'email', 'benchmark@example.com')
+
+    names = []
+    for number in range(shape.files):
+        directory = 'package{0:02d}'.format(number % 20)
+
+        if rand.random() < shape.binary_ratio:
+            name = '{0}/data{1:05d}.bin'.format(directory, number)
+            content = _binary(rand, shape.file_size)
+        else:
+            name = '{0}/module{1:05d}.txt'.format(directory, number)
+            content = _text(rand, shape.file_size)
+
+        _write(gitrepo, name, content)
+        names.append(name)
+
+    repo.git.add('--all')
+    repo.git.commit('-q', '-m', 'Initial commit')
+
+    for generation in range(1, shape.commits + 1):
+        names = _change(repo, rand, shape, names, generation)
+        repo.git.commit(
+            '-q', '--allow-empty', '-m', 'Commit {0}'.format(generation))
+
+    # And leave one more set of changes in the index for the hook to check
+    _change(repo, rand, shape, names, shape.commits + 1)
+
+    return repo
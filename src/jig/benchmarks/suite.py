@@ -0,0 +1,392 @@
+"""
+Benchmark suite
+===============
+
+Times the parts of jig that run on every commit against a repository built by
+:py:func:`jig.benchmarks.generator.generate_repo`.
+
+Results can be saved as JSON and compared against a previous run, any
+benchmark that is slower than the baseline by more than a threshold is a
+regression.
+"""
+import sys
+import json
+import platform
+import argparse
+from os import chmod, mkdir
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from timeit import default_timer
+from collections import OrderedDict
+
+from jig.benchmarks.generator import RepoShape, generate_repo
+
+
+# Bump this if the format of the results changes
+RESULTS_VERSION = 1
+
+# How much slower than the baseline a benchmark can be before it's reported
+DEFAULT_THRESHOLD = 0.2
+
+# A plugin that reads its input and has nothing to say
+STUB_PLUGIN_SCRIPT = """#!/bin/sh
+cat > /dev/null
+echo '{}'
+"""
+
+STUB_PLUGIN_CONFIG = """[plugin]
+bundle = benchmark
+name = {name}
+"""
+
+# Registry of benchmark names and functions, in the order they run
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    """
+    Register a function as a benchmark.
+
+    The function is called with a :py:class:`Fixture` and is timed.
+    """
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+class Fixture(object):
+
+    """
+    The generated repository and anything the benchmarks need from it.
+
+    Everything is created once before timing starts so the benchmarks only
+    measure the part of jig they are named after.
+
+    """
+    def __init__(self, gitrepo, shape, plugins=3):
+        from jig.runner import _diff_for
+        from jig.diffconvert import GitDiffIndex
+        from jig.gitutils.branches import parse_rev_range
+
+        self.gitrepo = gitrepo
+        self.shape = shape
+
+        self.repo = generate_repo(gitrepo, shape)
+
+        # The prepare_working_directory benchmark changes this file without
+        # staging it
+        with open(join(gitrepo, 'unstaged.txt'), 'w') as fh:
+            fh.write('')
+        self.repo.git.add('unstaged.txt')
+
+        self.rev_range = parse_rev_range(
+            gitrepo, 'HEAD~{0}..HEAD'.format(shape.commits))
+
+        self.diff = _diff_for(self.repo)
+        self.gdi = GitDiffIndex(gitrepo, self.diff)
+
+        # The blobs of each changed file, ready for describe_diff
+        self.blobs = []
+        for diff in self.diff:
+            a_data = diff.a_blob.data_stream.read() if diff.a_blob else b''
+            b_data = diff.b_blob.data_stream.read() if diff.b_blob else b''
+            if b'\0' not in a_data and b'\0' not in b_data:
+                self.blobs.append((a_data, b_data))
+
+        self.results = self._plugin_results(plugins)
+
+        self._install_stub_plugins(plugins)
+
+    def _plugin_results(self, plugins):
+        """
+        Results like the ones plugins would produce, a message per line added.
+        """
+        from jig.plugins import Plugin
+
+        messages = OrderedDict()
+        for changed in self.gdi.files():
+            messages[changed['name']] = [
+                [i[0], 'warn', 'Line {0} changed'.format(i[0])]
+                for i in changed['diff'] if i[1] == '+']
+
+        results = OrderedDict()
+        for number in range(plugins):
+            plugin = Plugin(
+                'benchmark', 'plugin{0:02d}'.format(number), self.gitrepo)
+            results[plugin] = (0, messages, '')
+
+        return results
+
+    def _install_stub_plugins(self, plugins):
+        from jig.plugins import initializer, set_jigconfig, PluginManager
+        from jig.conf import PLUGIN_CONFIG_FILENAME, PLUGIN_PRE_COMMIT_SCRIPT
+
+        config = initializer(self.gitrepo)
+        pm = PluginManager(config)
+
+        plugindir = mkdtemp()
+        for number in range(plugins):
+            directory = join(plugindir, 'plugin{0:02d}'.format(number))
+            mkdir(directory)
+
+            with open(join(directory, PLUGIN_CONFIG_FILENAME), 'w') as fh:
+                fh.write(STUB_PLUGIN_CONFIG.format(
+                    name='plugin{0:02d}'.format(number)))
+
+            script = join(directory, PLUGIN_PRE_COMMIT_SCRIPT)
+            with open(script, 'w') as fh:
+                fh.write(STUB_PLUGIN_SCRIPT)
+            chmod(script, 0o755)
+
+            pm.add(directory)
+
+        set_jigconfig(self.gitrepo, pm.config)
+
+        self.plugindir = plugindir
+
+    def cleanup(self):
+        rmtree(self.gitrepo)
+        rmtree(self.plugindir)
+
+
+@benchmark('diff_for')
+def _bench_diff_for(fixture):
+    from jig.runner import _diff_for
+    _diff_for(fixture.repo)
+
+
+@benchmark('diff_for_rev_range')
+def _bench_diff_for_rev_range(fixture):
+    from jig.runner import _diff_for
+    _diff_for(fixture.repo, fixture.rev_range)
+
+
+@benchmark('git_diff_index_files')
+def _bench_git_diff_index_files(fixture):
+    for _ in fixture.gdi.files():
+        pass
+
+
+@benchmark('describe_diff')
+def _bench_describe_diff(fixture):
+    from jig.diffconvert import describe_diff
+    for a_data, b_data in fixture.blobs:
+        list(describe_diff(a_data, b_data))
+
+
+@benchmark('json_encode')
+def _bench_json_encode(fixture):
+    from jig.plugins.manager import PluginDataJSONEncoder
+    json.dumps(
+        {'config': {}, 'files': fixture.gdi},
+        indent=2, cls=PluginDataJSONEncoder)
+
+
+@benchmark('results_collator')
+def _bench_results_collator(fixture):
+    from jig.output import ResultsCollator
+    ResultsCollator(fixture.results)
+
+
+@benchmark('formatter_fancy')
+def _bench_formatter_fancy(fixture):
+    from jig.output import ResultsCollator
+    from jig.formatters.fancy import FancyFormatter
+    FancyFormatter().print_results(
+        lambda line: None, ResultsCollator(fixture.results))
+
+
+@benchmark('formatter_tap')
+def _bench_formatter_tap(fixture):
+    from jig.output import ResultsCollator
+    from jig.formatters.tap import TapFormatter
+    TapFormatter().print_results(
+        lambda line: None, ResultsCollator(fixture.results))
+
+
+@benchmark('prepare_working_directory')
+def _bench_prepare_working_directory(fixture):
+    from jig.gitutils.branches import prepare_working_directory
+
+    # An unstaged change has to be stashed and put back
+    with open(join(fixture.gitrepo, 'unstaged.txt'), 'a') as fh:
+        fh.write('unstaged\n')
+
+    with prepare_working_directory(fixture.gitrepo):
+        pass
+
+
+@benchmark('runner_results')
+def _bench_runner_results(fixture):
+    from jig.runner import Runner
+    from jig.output import ConsoleView
+    Runner(view=ConsoleView(collect_output=True)).results(
+        fixture.gitrepo)
+
+
+@benchmark('runner_results_cached')
+def _bench_runner_results_cached(fixture):
+    from jig.runner import Runner
+    from jig.output import ConsoleView
+    # The first run of the benchmark fills the cache
+    Runner(view=ConsoleView(collect_output=True), cache=True).results(
+        fixture.gitrepo)
+
+
+def _measure(func, fixture, repeat):
+    """
+    Run ``func`` ``repeat`` times and return the seconds each run took.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = default_timer()
+        func(fixture)
+        timings.append(default_timer() - started)
+
+    return sorted(timings)
+
+
+def run_benchmarks(shape=None, repeat=5, plugins=3, names=None):
+    """
+    Generate a repository with ``shape`` and run the benchmarks against it.
+
+    ``names`` limits the benchmarks to the ones given. Returns a dictionary
+    suitable for saving as JSON.
+    """
+    shape = shape or RepoShape()
+
+    fixture = Fixture(mkdtemp(), shape, plugins=plugins)
+
+    benchmarks = OrderedDict()
+    try:
+        for name, func in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+
+            timings = _measure(func, fixture, repeat)
+
+            benchmarks[name] = OrderedDict([
+                ('min', timings[0]),
+                ('median', timings[len(timings) // 2]),
+                ('mean', sum(timings) / len(timings)),
+                ('repeat', repeat)])
+    finally:
+        fixture.cleanup()
+
+    return OrderedDict([
+        ('version', RESULTS_VERSION),
+        ('python', platform.python_version()),
+        ('shape', OrderedDict(shape._asdict())),
+        ('plugins', plugins),
+        ('benchmarks', benchmarks)])
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Find the benchmarks in ``results`` that are slower than ``baseline``.
+
+    The median of each benchmark is compared. Anything more than
+    ``threshold`` slower (``0.2`` is 20%) is a regression.
+
+    Returns a list of ``(name, baseline_seconds, seconds)`` tuples.
+    """
+    regressions = []
+
+    for name, measured in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+
+        if not before:
+            # New benchmark, nothing to compare against
+            continue
+
+        if measured['median'] > before['median'] * (1 + threshold):
+            regressions.append((name, before['median'], measured['median']))
+
+    return regressions
+
+
+def _ms(seconds):
+    return '{0:.1f}ms'.format(seconds * 1000)
+
+
+_parser = argparse.ArgumentParser(
+    description='Benchmark jig against a generated Git repository')
+_parser.add_argument(
+    'names', nargs='*', metavar='NAME',
+    help='Only run these benchmarks: {0}'.format(', '.join(BENCHMARKS)))
+_parser.add_argument(
+    '--files', type=int, default=RepoShape().files,
+    help='Number of files in the repository')
+_parser.add_argument(
+    '--file-size', type=int, default=RepoShape().file_size,
+    dest='file_size', help='Rough size of each file in bytes')
+_parser.add_argument(
+    '--binary-ratio', type=float, default=RepoShape().binary_ratio,
+    dest='binary_ratio', help='Fraction of the files that are binary')
+_parser.add_argument(
+    '--modify-ratio', type=float, default=RepoShape().modify_ratio,
+    dest='modify_ratio', help='Fraction of the files modified by each commit')
+_parser.add_argument(
+    '--rename-ratio', type=float, default=RepoShape().rename_ratio,
+    dest='rename_ratio', help='Fraction of the files renamed by each commit')
+_parser.add_argument(
+    '--commits', type=int, default=RepoShape().commits,
+    help='Number of commits after the first one')
+_parser.add_argument(
+    '--seed', type=int, default=RepoShape().seed,
+    help='Seed for generating the repository')
+_parser.add_argument(
+    '--plugins', type=int, default=3,
+    help='Number of stub plugins for the runner benchmark')
+_parser.add_argument(
+    '--repeat', type=int, default=5,
+    help='How many times to run each benchmark')
+_parser.add_argument(
+    '--output', '-o', default=None,
+    help='Save the results as JSON to this file')
+_parser.add_argument(
+    '--baseline', '-b', default=None,
+    help='Compare against results saved in this file')
+_parser.add_argument(
+    '--threshold', type=float, default=DEFAULT_THRESHOLD,
+    help='Fraction slower than the baseline that is a regression')
+
+
+def main(argv=None):
+    """
+    Run the benchmarks from the command line.
+
+    Exits non-zero if any benchmark regressed compared to the baseline.
+    """
+    argv = _parser.parse_args(argv)
+
+    shape = RepoShape(**dict(
+        (i, getattr(argv, i)) for i in RepoShape._fields))
+
+    results = run_benchmarks(
+        shape, repeat=argv.repeat, plugins=argv.plugins, names=argv.names)
+
+    baseline = {}
+    if argv.baseline:
+        with open(argv.baseline) as fh:
+            baseline = json.load(fh)
+
+    for name, measured in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        sys.stdout.write('{0:<28}{1:>12}{2:>12}\n'.format(
+            name, _ms(measured['median']),
+            _ms(before['median']) if before else ''))
+
+    if argv.output:
+        with open(argv.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+    regressions = compare(results, baseline, argv.threshold)
+
+    for name, before, after in regressions:
+        sys.stdout.write('Regression: {0} took {1}, baseline {2}\n'.format(
+            name, _ms(after), _ms(before)))
+
+    return 1 if regressions else 0
@@ -0,0 +1,83 @@
+from tempfile import mkdtemp
+
+from jig.tests.testcase import JigTestCase
+from jig.benchmarks.generator import RepoShape, generate_repo
+from jig.benchmarks.suite import BENCHMARKS, run_benchmarks, compare
+
+# Small enough to keep the tests quick
+SMALL = RepoShape(files=10, file_size=256, binary_ratio=0.2, commits=2)
+
+
+class TestGenerateRepo(JigTestCase):
+
+    """
+    Build synthetic repositories to benchmark against.
+
+    """
+    def test_shape(self):
+        """
+        The repository has the history and staged changes asked for.
+        """
+        repo = generate_repo(mkdtemp(), SMALL)
+
+        self.assertEqual(
+            SMALL.commits + 1, len(list(repo.iter_commits())))
+        self.assertEqual(
+            SMALL.files, len(list(repo.head.commit.tree.traverse(
+                predicate=lambda i, d: i.type == 'blob'))))
+        # Changes are left in the index
+        self.assertTrue(repo.head.commit.diff())
+
+    def test_repeatable(self):
+        """
+        The same shape creates the same repository.
+        """
+        first = generate_repo(mkdtemp(), SMALL)
+        second = generate_repo(mkdtemp(), SMALL)
+
+        self.assertEqual(
+            first.head.commit.tree.hexsha, second.head.commit.tree.hexsha)
+
+
+class TestBenchmarks(JigTestCase):
+
+    """
+    Run the benchmarks and compare them with a baseline.
+
+    """
+    def test_run(self):
+        """
+        Each benchmark is timed.
+        """
+        results = run_benchmarks(SMALL, repeat=1, plugins=1)
+
+        self.assertEqual(
+            list(BENCHMARKS.keys()), list(results['benchmarks'].keys()))
+        self.assertEqual(SMALL.files, results['shape']['files'])
+
+        for measured in results['benchmarks'].values():
+            self.assertGreater(measured['median'], 0)
+
+    def test_run_named(self):
+        """
+        Only the benchmarks asked for are run.
+        """
+        results = run_benchmarks(SMALL, repeat=1, names=['describe_diff'])
+
+        self.assertEqual(['describe_diff'], list(results['benchmarks']))
+
+    def test_compare(self):
+        """
+        Benchmarks slower than the threshold are regressions.
+        """
+        baseline = {'benchmarks': {
+            'diff_for': {'median': 1.0},
+            'json_encode': {'median': 1.0}}}
+        results = {'benchmarks': {
+            'diff_for': {'median': 1.1},
+            'json_encode': {'median': 1.5},
+            'describe_diff': {'median': 9.0}}}
+
+        self.assertEqual(
+            [('json_encode', 1.0, 1.5)],
+            compare(results, baseline, threshold=0.2))
@@ -1,11 +1,11 @@
 import sys
 import traceback
+from collections import OrderedDict
 try:
     from urllib.parse import urlparse
 except ImportError:
     from urlparse import urlparse
-from os import listdir
-from os.path import join, dirname, isdir
+from os.path import join
 from tempfile import mkstemp
 from shutil import rmtree
 from uuid import uuid4 as uuid
@@ -14,40 +14,54 @@ from textwrap import dedent
 from jig.exc import PluginError, ForcedExit
 from jig.conf import JIG_DIR_NAME, JIG_PLUGIN_DIR
 from jig.output import ConsoleView
-from jig.formatters import tap, fancy
-from jig.gitutils.remote import clone
-
-_commands_dir = dirname(__file__)
+from jig.formatters import tap, fancy, compact
+from jig.profiling import profile_mode, profiled
+
+
+# All of the jig sub-commands and a description of what each one does. This is
+# kept separate from the commands so that showing help doesn't have to import
+# every command (and everything that they import).
+COMMANDS = OrderedDict([
+    ('ci', 'Run in continuous integration (CI) mode'),
+    ('config', 'Manage settings for installed Jig plugins'),
+    ('init', 'Initialize a Git repository for use with Jig'),
+    ('install', 'Install a list of Jig plugins from a file'),
+    ('plugin', 'Manage this repository\'s Jig plugins'),
+    ('report', 'Run plugins on a revision range'),
+    ('runnow', 'Run plugins on staged changes and show the results'),
+    ('sticky', 'Make Jig auto-init every time you git clone'),
+    ('version', 'Show Jig\'s version number'),
+    ('watch', 'Check files as they are saved')])
 
 
 def list_commands():
     """
     List the commands available.
+
+    Returns a list of ``(name, description)`` tuples.
     """
-    commands = []
-    for f in listdir(_commands_dir):
-        if isdir(join(_commands_dir, f)):
-            continue
-        if not f.endswith('.py'):
-            continue
-        try:
-            commands.append(get_command(f.split('.')[0]))
-        except (ImportError, AttributeError):
-            continue
-    return commands
+    return list(COMMANDS.items())
 
 
 def get_command(name):
     """
     Gets an instance of the named jig sub-command.
 
+    Only the module for the requested command is imported. Raises
+    :py:exc:`ImportError` if there is no command by that name.
+
     For example::
 
         >>> get_command('init')
         <jig.commands.init.Command object at 0x10048fed0>
     """
+    name = name.lower()
+
+    if name not in COMMANDS:
+        raise ImportError('No jig command named {0}'.format(name))
+
     mod = __import__(
-        'jig.commands.{0}'.format(name.lower()),
+        'jig.commands.{0}'.format(name),
         globals(), locals(), ['Command'], 0)
     return mod.Command
 
@@ -62,7 +76,8 @@ def get_formatter(name, default=fancy.FancyFormatter):
     """
     formatter_classes = [
         tap.TapFormatter,
-        fancy.FancyFormatter
+        fancy.FancyFormatter,
+        compact.CompactFormatter
     ]
 
     for cls in formatter_classes:
@@ -97,6 +112,8 @@ def add_plugin(pm, plugin, gitdir):
     url = urlparse(plugin)
 
     if url.scheme:
+        from jig.gitutils.remote import clone
+
         # This is a URL, let's clone it first into .jig/plugins
         # directory.
         plugin_parts = plugin.rsplit('@', 1)
@@ -174,15 +191,23 @@ class BaseCommand(object):
         # A shorter alias to the view's out decorator
         self.out = self.view.out
 
+        # Commands with a --profile option can also be profiled by setting
+        # JIG_PROFILE
+        options = vars(args)
+        mode = profile_mode(options['profile']) if 'profile' in options \
+            else None
+
         # Finally, process the arguments
-        try:
-            self.process(args)
-        except (NotImplementedError, SystemExit, ForcedExit):
-            raise
-        except Exception as e:
-            # Uncaught exception, usually means there is a bug in Jig
-            self.crash_report(e, args)
-            sys.exit(2)
+        with profiled(getattr(args, 'path', '.'), mode,
+                      self.__module__.rsplit('.', 1)[-1]):
+            try:
+                self.process(args)
+            except (NotImplementedError, SystemExit, ForcedExit):
+                raise
+            except Exception as e:
+                # Uncaught exception, usually means there is a bug in Jig
+                self.crash_report(e, args)
+                sys.exit(2)
 
     def process(self, args):
         """
@@ -1,32 +1,60 @@
+import argparse
 from contextlib import contextmanager
 
 from jig.exc import AlreadyInitialized, CIFirstRun
 from jig.commands.base import BaseCommand, get_formatter
 from jig.commands.install import InstallCommandMixin
 from jig.gitutils.branches import Tracked
+from jig.gitutils.notes import fetch_notes, push_notes
 from jig.plugins import initializer
+from jig.profiling import PROFILE_CPU, PROFILE_MEMORY
 from jig.runner import Runner
 
-try:
-    import argparse
-except ImportError:   # pragma: no cover
-    from backports import argparse
 
 _parser = argparse.ArgumentParser(
     description='Run in continuous integration (CI) mode',
     usage='jig ci [-h] [--tracking-branch TRACKING_BRANCH] '
-    '[--format FORMAT] PLUGINSFILE [PATH]')
+    '[--format FORMAT] [--timings] [--timings-file FILE] [--trace-file FILE] '
+    '[--no-notes] [--notes-remote REMOTE] [--all-commits] '
+    '[--profile] [--profile-memory] PLUGINSFILE [PATH]')
 
 _parser.add_argument(
     'pluginsfile',
     help='Path to a file containing the location of plugins to install, '
     'each line of the file should contain URL|URL@BRANCH|PATH')
 _parser.add_argument(
-    '--format', dest='output_format', default='tap', choices=['tap', 'fancy'],
+    '--format', dest='output_format', default='tap',
+    choices=['tap', 'fancy', 'compact'],
     help='Output format to show results')
 _parser.add_argument(
     '--tracking-branch', dest='tracking_branch', default='jig-ci-last-run',
     help='Branch name Jig will use to keep its place')
+_parser.add_argument(
+    '--timings', default=False, action='store_true',
+    help='Show how long each part of the run and each plugin took')
+_parser.add_argument(
+    '--timings-file', dest='timings_file', default=None,
+    help='Save the timings as JSON to this file')
+_parser.add_argument(
+    '--trace-file', dest='trace_file', default=None,
+    help='Save a trace of the run to this file, it can be opened in Perfetto '
+    'or chrome://tracing')
+_parser.add_argument(
+    '--no-notes', dest='notes', default=True, action='store_false',
+    help='Do not record or reuse results in Git notes')
+_parser.add_argument(
+    '--notes-remote', dest='notes_remote', default=None,
+    help='Fetch and push the Git notes with results from this remote')
+_parser.add_argument(
+    '--all-commits', dest='patches', default=True, action='store_false',
+    help='Check every commit, even rebased copies of commits already checked')
+_parser.add_argument(
+    '--profile', dest='profile', action='store_const', const=PROFILE_CPU,
+    help='Profile jig and save the profile in .jig/profiles')
+_parser.add_argument(
+    '--profile-memory', dest='profile', action='store_const',
+    const=PROFILE_MEMORY,
+    help='Profile jig and its memory use, this is a lot slower')
 _parser.add_argument(
     'path', nargs='?', default='.',
     help='Path to the Git repository')
@@ -80,12 +108,32 @@ class Command(BaseCommand, InstallCommandMixin):
             ))
             printer('')
 
+        notes_remote = argv.notes_remote if argv.notes else None
+
+        if notes_remote:
+            # Results other agents recorded can be reused, if they can't be
+            # fetched this run records its own
+            fetch_notes(tracked.gitrepo, notes_remote)
+
         # Run Jig from the tracking branch to HEAD
-        runner = Runner(view=self.view, formatter=get_formatter(output_format))
-
-        with _when_exits_zero(tracked.update):
-            runner.main(
-                path,
-                rev_range='{0}..HEAD'.format(tracking_branch),
-                interactive=False
-            )
+        runner = Runner(
+            view=self.view, formatter=get_formatter(output_format),
+            notes=argv.notes, patches=argv.patches)
+
+        try:
+            with _when_exits_zero(tracked.update):
+                runner.main(
+                    path,
+                    rev_range='{0}..HEAD'.format(tracking_branch),
+                    interactive=False,
+                    show_timings=argv.timings,
+                    timings_file=argv.timings_file,
+                    trace_file=argv.trace_file
+                )
+        finally:
+            # Whatever happens the run's exit code stands, the notes are
+            # only a way to save work next time
+            if notes_remote and not push_notes(tracked.gitrepo, notes_remote):
+                with self.out() as printer:
+                    printer('Could not push the Jig notes to {0}.'.format(
+                        notes_remote))
@@ -1,6 +1,7 @@
+import argparse
 from os.path import join
 from configparser import SafeConfigParser
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from textwrap import TextWrapper
 
 from jig.conf import PLUGIN_CONFIG_FILENAME
@@ -10,10 +11,6 @@ from jig.commands.hints import NO_PLUGINS_INSTALLED, CHANGE_PLUGIN_SETTINGS
 from jig.plugins import (
     get_jigconfig, set_jigconfig, PluginManager)
 
-try:
-    import argparse
-except ImportError:   # pragma: no cover
-    from backports import argparse
 
 _parser = argparse.ArgumentParser(
     description='Manage settings for installed Jig plugins',
@@ -55,12 +52,6 @@ _setparser.add_argument(
 _setparser.set_defaults(subcommand='set')
 
 
-try:
-    from collections import OrderedDict
-except ImportError:   # pragma: no cover
-    from ordereddict import OrderedDict
-
-
 def _get_plugin_config_section(plugin_dir, section):
     """
     Get a section of a plugin's config.
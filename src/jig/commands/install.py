@@ -1,3 +1,5 @@
+import argparse
+
 from jig.exc import PluginError
 from jig.plugins import (
     get_jigconfig, set_jigconfig, PluginManager)
@@ -5,10 +7,6 @@ from jig.plugins.tools import read_plugin_list
 from jig.commands.base import BaseCommand, add_plugin
 from jig.commands.hints import USE_RUNNOW
 
-try:
-    import argparse
-except ImportError:   # pragma: no cover
-    from backports import argparse
 
 _parser = argparse.ArgumentParser(
     description='Install a list of Jig plugins from a file',
@@ -37,10 +35,11 @@ class InstallCommandMixin(object):
                 # Grab the human-readable part of the IOError and raise that
                 raise PluginError(e[1])
 
-            for plugin in plugin_list:
-                config = get_jigconfig(path)
-                pm = PluginManager(config)
+            # One manager for all of them, each plugin is added to it as it's
+            # installed
+            pm = PluginManager(get_jigconfig(path))
 
+            for plugin in plugin_list:
                 try:
                     added = add_plugin(pm, plugin, path)
                 except Exception as e:
@@ -1,4 +1,7 @@
 import errno
+import argparse
+from multiprocessing import cpu_count
+from concurrent.futures import ProcessPoolExecutor
 
 from jig.commands.base import (
     BaseCommand, add_plugin, plugins_by_bundle, plugins_by_name)
@@ -10,14 +13,11 @@ from jig.plugins import (
     get_jigconfig, set_jigconfig, PluginManager,
     create_plugin, available_templates)
 from jig.plugins.tools import update_plugins
+from jig.plugins.durations import PluginDurations
 from jig.plugins.testrunner import (
-    PluginTestRunner, PluginTestReporter,
-    FailureResult, parse_range)
+    PluginTestRunner, PluginTestReporter, PluginSuiteReporter,
+    FailureResult, parse_range, find_plugin_suites, run_plugin_suite)
 
-try:
-    import argparse
-except ImportError:   # pragma: no cover
-    from backports import argparse
 
 _parser = argparse.ArgumentParser(
     description='Manage this repository\'s Jig plugins',
@@ -29,10 +29,13 @@ _subparsers = _parser.add_subparsers(
 
 _listparser = _subparsers.add_parser(
     'list', help='list installed plugins',
-    usage='jig plugin list [-h] [-r GITREPO]')
+    usage='jig plugin list [-h] [-s] [-r GITREPO]')
 _listparser.add_argument(
     '--gitrepo', '-r', default='.', dest='path',
     help='Path to the Git repository, default current directory')
+_listparser.add_argument(
+    '--stats', '-s', default=False, action='store_true',
+    help='Show how long each plugin has taken to run')
 _listparser.set_defaults(subcommand='list')
 
 _addparser = _subparsers.add_parser(
@@ -86,10 +89,15 @@ _createparser.set_defaults(subcommand='create')
 
 _testparser = _subparsers.add_parser(
     'test', help='run a suite of plugin tests',
-    usage='jig plugin test [-h] [-r RANGE] PLUGIN')
+    usage='jig plugin test [-h] [-r RANGE] [-j JOBS] [--no-cache] '
+    '[PLUGIN ...]')
+_testparser.add_argument(
+    'plugin', nargs='*', default=['.'],
+    help='Path to the plugin directory, or a directory of plugins')
 _testparser.add_argument(
-    'plugin', nargs='?', default='.',
-    help='Path to the plugin directory')
+    '--jobs', '-j', type=int, default=None,
+    help='How many plugins to test at the same time, one for each CPU if '
+    'not given')
 _testparser.add_argument(
     '--verbose', '-v',
     default=False, action='store_true',
@@ -99,9 +107,34 @@ _testparser.add_argument(
     dest='range',
     help='Run a subset of the tests, specified like [s]..[e]. Example -r '
     '3..5 to run tests that have expectations for those changes.')
+_testparser.add_argument(
+    '--no-cache', dest='cache', default=True, action='store_false',
+    help='Parse the expectations every time instead of caching them in '
+    '~/.jig')
 _testparser.set_defaults(subcommand='test')
 
 
+def _format_stats(stats):
+    """
+    Format the duration stats of a plugin as columns for the list action.
+
+    The change is how the last run compares to the average, a plugin that has
+    become slower will stand out.
+    """
+    if not stats:
+        return '{0:>10}{0:>10}{1:>8}{0:>8}'.format('-', 0)
+
+    average, last = stats['average'], stats['last']
+
+    change = '-'
+    if average:
+        change = '{0:+.0%}'.format((last - average) / average)
+
+    return '{0:>10}{1:>10}{2:>8}{3:>8}'.format(
+        '{0:.0f}ms'.format(average * 1000), '{0:.0f}ms'.format(last * 1000),
+        stats['runs'], change)
+
+
 class Command(BaseCommand):
     parser = _parser
 
@@ -131,8 +164,16 @@ class Command(BaseCommand):
 
             printer('Installed plugins\n')
 
-            printer('{h1:<25} {h2}'.format(
-                h1='Plugin name', h2='Bundle name'))
+            if argv.stats:
+                durations = PluginDurations(path)
+
+                printer(
+                    '{h1:<25} {h2:<20}{h3:>10}{h4:>10}{h5:>8}{h6:>8}'.format(
+                        h1='Plugin name', h2='Bundle name', h3='Average',
+                        h4='Last', h5='Runs', h6='Change'))
+            else:
+                printer('{h1:<25} {h2}'.format(
+                    h1='Plugin name', h2='Bundle name'))
 
             sort_bundles = sorted(list(bundles.items()), key=lambda b: b[0])
 
@@ -140,8 +181,14 @@ class Command(BaseCommand):
                 sort_plugins = sorted(plugins, key=lambda p: p.name)
 
                 for plugin in sort_plugins:
-                    printer('{plugin:.<25} {name}'.format(
-                        name=name, plugin=plugin.name))
+                    if not argv.stats:
+                        printer('{plugin:.<25} {name}'.format(
+                            name=name, plugin=plugin.name))
+                        continue
+
+                    printer('{plugin:.<25} {name:<20}{stats}'.format(
+                        name=name, plugin=plugin.name,
+                        stats=_format_stats(durations.stats(plugin))))
 
             printer(USE_RUNNOW)
 
@@ -267,9 +314,9 @@ class Command(BaseCommand):
 
     def test(self, argv):
         """
-        Run the tests for a plugin.
+        Run the tests for a plugin, or for every plugin with tests that is
+        found in the paths given.
         """
-        plugin = argv.plugin
         test_range = argv.range
         verbose = argv.verbose
 
@@ -277,8 +324,22 @@ class Command(BaseCommand):
             if test_range:
                 test_range = parse_range(test_range)
 
+            plugins = find_plugin_suites(argv.plugin)
+
+            if not plugins:
+                raise CommandError(
+                    'Could not find any plugins with tests in {0}.'.format(
+                        ', '.join(argv.plugin)))
+
+            if len(plugins) > 1:
+                return self.test_many(
+                    printer, plugins, test_range, verbose, argv.jobs,
+                    argv.cache)
+
+            plugin, = plugins
+
             try:
-                ptr = PluginTestRunner(plugin)
+                ptr = PluginTestRunner(plugin, cache=argv.cache)
 
                 results = ptr.run(test_range=test_range)
 
@@ -296,3 +357,23 @@ class Command(BaseCommand):
                 printer(test_results)
             except ExpectationError as e:
                 raise CommandError(str(e))
+
+    def test_many(self, printer, plugins, test_range, verbose, jobs,
+                  cache=True):
+        """
+        Run the tests for many plugins, each in a process of its own.
+        """
+        jobs = min(jobs or cpu_count(), len(plugins))
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            runs = list(executor.map(
+                run_plugin_suite, plugins, [test_range] * len(plugins),
+                [verbose] * len(plugins), [cache] * len(plugins)))
+
+        reporter = PluginSuiteReporter(runs)
+
+        if reporter.failed:
+            # Raise as an error so the status code will be non-zero
+            raise CommandError(reporter.dumps())
+
+        printer(reporter.dumps())
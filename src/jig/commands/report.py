@@ -1,14 +1,18 @@
-from jig.commands.base import BaseCommand
+import sys
+import argparse
+
+from jig.conf import REPORT_MAX_REPOS
+from jig.commands.base import BaseCommand, get_formatter
+from jig.profiling import PROFILE_CPU, PROFILE_MEMORY
 from jig.runner import Runner
 
-try:
-    import argparse
-except ImportError:   # pragma: no cover
-    from backports import argparse
 
 _parser = argparse.ArgumentParser(
     description='Run plugins on a revision range',
-    usage='jig report [-h] [-p PLUGIN] [--rev-range REVISION_RANGE] [PATH]')
+    usage='jig report [-h] [-p PLUGIN] [--rev-range REVISION_RANGE] '
+    '[--format FORMAT] [--repos FILE|DIR] [--jobs JOBS] '
+    '[--timings] [--timings-file FILE] [--trace-file FILE] [--profile] '
+    '[--profile-memory] [PATH]')
 
 _parser.add_argument(
     '--plugin', '-p',
@@ -16,6 +20,34 @@ _parser.add_argument(
 _parser.add_argument(
     '--rev-range', dest='rev_range', default='HEAD^1..HEAD',
     help='Git revision range to run the plugins against')
+_parser.add_argument(
+    '--format', dest='output_format', default='fancy',
+    choices=['tap', 'fancy', 'compact'],
+    help='Output format to show results')
+_parser.add_argument(
+    '--repos', default=None,
+    help='Report on many repositories, listed one per line in this file or '
+    'found in this directory')
+_parser.add_argument(
+    '--jobs', '-j', type=int, default=REPORT_MAX_REPOS,
+    help='How many repositories to check at the same time with --repos')
+_parser.add_argument(
+    '--timings', default=False, action='store_true',
+    help='Show how long each part of the run and each plugin took')
+_parser.add_argument(
+    '--timings-file', dest='timings_file', default=None,
+    help='Save the timings as JSON to this file')
+_parser.add_argument(
+    '--trace-file', dest='trace_file', default=None,
+    help='Save a trace of the run to this file, it can be opened in Perfetto '
+    'or chrome://tracing')
+_parser.add_argument(
+    '--profile', dest='profile', action='store_const', const=PROFILE_CPU,
+    help='Profile jig and save the profile in .jig/profiles')
+_parser.add_argument(
+    '--profile-memory', dest='profile', action='store_const',
+    const=PROFILE_MEMORY,
+    help='Profile jig and its memory use, this is a lot slower')
 _parser.add_argument(
     'path', nargs='?', default='.',
     help='Path to the Git repository')
@@ -27,12 +59,33 @@ class Command(BaseCommand):
     def process(self, argv):
         path = argv.path
         rev_range = argv.rev_range
+        formatter = get_formatter(argv.output_format)
+
+        if argv.repos:
+            return self.process_repos(argv, formatter)
 
-        runner = Runner(view=self.view)
+        runner = Runner(view=self.view, formatter=formatter)
 
         runner.main(
             path,
             plugin=argv.plugin,
             rev_range=rev_range,
-            interactive=False
+            interactive=False,
+            show_timings=argv.timings,
+            timings_file=argv.timings_file,
+            trace_file=argv.trace_file
         )
+
+    def process_repos(self, argv, formatter):
+        """
+        Report on each of the repositories given with ``--repos``.
+        """
+        # GitPython is slow to import, wait until we need it
+        from jig.batch import repositories, report_repositories
+
+        with self.out() as printer:
+            reports = report_repositories(
+                printer, repositories(argv.repos), formatter,
+                argv.rev_range, plugin=argv.plugin, jobs=argv.jobs)
+
+        sys.exit(1 if any(i.failed for i in reports) else 0)
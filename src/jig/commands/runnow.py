@@ -1,18 +1,38 @@
+import argparse
+
 from jig.commands.base import BaseCommand
+from jig.profiling import PROFILE_CPU, PROFILE_MEMORY
 from jig.runner import Runner
 
-try:
-    import argparse
-except ImportError:   # pragma: no cover
-    from backports import argparse
 
 _parser = argparse.ArgumentParser(
     description='Run plugins on staged changes and show the results',
-    usage='jig runnow [-h] [-p PLUGIN] [PATH]')
+    usage='jig runnow [-h] [-p PLUGIN] [--timings] [--timings-file FILE] '
+    '[--trace-file FILE] [--no-cache] [--profile] [--profile-memory] [PATH]')
 
 _parser.add_argument(
     '--plugin', '-p',
     help='Only run this specific named plugin')
+_parser.add_argument(
+    '--timings', default=False, action='store_true',
+    help='Show how long each part of the run and each plugin took')
+_parser.add_argument(
+    '--timings-file', dest='timings_file', default=None,
+    help='Save the timings as JSON to this file')
+_parser.add_argument(
+    '--trace-file', dest='trace_file', default=None,
+    help='Save a trace of the run to this file, it can be opened in Perfetto '
+    'or chrome://tracing')
+_parser.add_argument(
+    '--no-cache', dest='cache', default=True, action='store_false',
+    help='Run every plugin even if the changes have been checked before')
+_parser.add_argument(
+    '--profile', dest='profile', action='store_const', const=PROFILE_CPU,
+    help='Profile jig and save the profile in .jig/profiles')
+_parser.add_argument(
+    '--profile-memory', dest='profile', action='store_const',
+    const=PROFILE_MEMORY,
+    help='Profile jig and its memory use, this is a lot slower')
 _parser.add_argument(
     'path', nargs='?', default='.',
     help='Path to the Git repository')
@@ -25,6 +45,13 @@ class Command(BaseCommand):
         path = argv.path
 
         # Make the runner use our view
-        runner = Runner(view=self.view)
-
-        runner.main(path, plugin=argv.plugin, interactive=False)
+        runner = Runner(view=self.view, cache=argv.cache)
+
+        runner.main(
+            path,
+            plugin=argv.plugin,
+            interactive=False,
+            show_timings=argv.timings,
+            timings_file=argv.timings_file,
+            trace_file=argv.trace_file
+        )
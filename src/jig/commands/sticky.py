@@ -1,13 +1,10 @@
+import argparse
 from os.path import expanduser
 
 from jig.commands.base import BaseCommand
 from jig.gitutils.hooking import (
     create_auto_init_templates, set_templates_directory)
 
-try:
-    import argparse
-except ImportError:   # pragma: no cover
-    from backports import argparse
 
 _parser = argparse.ArgumentParser(
     description='Make Jig auto-init every time you git clone',
@@ -3,12 +3,13 @@ import sys
 from tempfile import mkdtemp
 from os.path import isfile, join
 
-from mock import Mock
+from mock import Mock, patch
 from git import Repo
 
 from jig.tests.testcase import (
     JigTestCase, CommandTestCase, cd_gitrepo)
-from jig.plugins import create_plugin, get_jigconfig, PluginManager
+from jig.plugins import (
+    Plugin, create_plugin, get_jigconfig, PluginManager)
 from jig.exc import ForcedExit
 from jig.commands import ci
 
@@ -179,3 +180,53 @@ class TestCiCommand(CommandTestCase):
 
         # This is a marker that will be present from the fancy formatter
         self.assertIn('\U0001f449  Jig ran 1 plugin', self.output)
+
+    @cd_gitrepo
+    def test_notes_not_pushed(self):
+        """
+        A remote that can't be reached doesn't change the exit code.
+        """
+        self.run_first_time()
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+
+        missing = join(mkdtemp(), 'missing')
+
+        with self.assertRaises(SystemExit) as ec:
+            self.run_command('--notes-remote {0} {1} {2}'.format(
+                missing, '.jigplugins.txt', self.gitrepodir)
+            )
+
+        self.assertEqual(0, ec.exception.code)
+        self.assertIn(
+            'Could not push the Jig notes to {0}.'.format(missing),
+            self.output)
+
+    @cd_gitrepo
+    def test_stop_checked_again(self):
+        """
+        Commits that stopped are checked again when they are run again.
+        """
+        self.run_first_time()
+
+        repo = Repo(self.gitrepodir)
+        last_run = repo.heads['jig-ci-last-run'].commit
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+
+        stop = (0, '{"a.txt": [[null, "stop", "Not allowed"]]}', '')
+
+        for _ in range(2):
+            # Run the same range again, as a retried build would
+            repo.git.branch('-f', 'jig-ci-last-run', last_run.hexsha)
+
+            # Without the notes only the patch-ids are left to go on
+            with patch.object(Plugin, 'pre_commit', return_value=stop):
+                with self.assertRaises(SystemExit):
+                    self.run_command('--no-notes {0} {1}'.format(
+                        '.jigplugins.txt', self.gitrepodir)
+                    )
+
+        # The second run still reports the problem
+        self.assertIn('Not allowed', self.output)
+        self.assertNotIn('has been checked before', self.output)
@@ -1,6 +1,7 @@
 # coding=utf-8
 import sys
-from contextlib import nested
+import argparse
+from contextlib import ExitStack
 from tempfile import mkstemp
 
 from mock import Mock, patch
@@ -8,14 +9,10 @@ from mock import Mock, patch
 from jig.exc import PluginError
 from jig.entrypoints import main
 from jig.tests.testcase import JigTestCase, ViewTestCase, CommandTestCase
-from jig.formatters import tap, fancy
+from jig.formatters import tap, fancy, compact
 from jig.commands.base import (
-    get_formatter, list_commands, create_view, add_plugin, BaseCommand)
-
-try:
-    import argparse
-except ImportError:   # pragma: no cover
-    from backports import argparse
+    get_formatter, get_command, list_commands, create_view, add_plugin,
+    BaseCommand)
 
 
 class TestCommands(ViewTestCase):
@@ -60,6 +57,29 @@ class TestCommands(ViewTestCase):
         self.assertResultsIn(self.help_output_marker, self.output)
 
 
+class TestListCommands(JigTestCase):
+
+    """
+    Commands are listed without importing them.
+
+    """
+    def test_descriptions_match_commands(self):
+        """
+        Each listed description is the same as the command's parser.
+        """
+        for name, description in list_commands():
+            command = get_command(name)
+
+            self.assertEqual(command.parser.description, description)
+
+    def test_unknown_command(self):
+        """
+        Modules that are not commands can't be retrieved.
+        """
+        with self.assertRaises(ImportError):
+            get_command('base')
+
+
 class TestGetFormatter(JigTestCase):
 
     """
@@ -93,6 +113,15 @@ class TestGetFormatter(JigTestCase):
             get_formatter('fancy')
         )
 
+    def test_compact(self):
+        """
+        Get the compact formatter.
+        """
+        self.assertEqual(
+            compact.CompactFormatter,
+            get_formatter('compact')
+        )
+
 
 class TestBaseCommand(CommandTestCase):
 
@@ -134,10 +163,10 @@ class TestBaseCommandCrashReport(CommandTestCase):
         self.command = MockCommand
         self.command.uncaught_exception = self.uncaught_exception
 
-        with nested(
-            patch('jig.commands.base.sys'),
-            patch('jig.commands.base.mkstemp')
-        ) as (mock_sys, mock_mkstemp):
+        with ExitStack() as stack:
+            mock_sys = stack.enter_context(patch('jig.commands.base.sys'))
+            mock_mkstemp = stack.enter_context(
+                patch('jig.commands.base.mkstemp'))
             mock_sys.exc_info.side_effect = sys.exc_info
             mock_mkstemp.return_value = (1, self.report_file)
 
@@ -246,7 +275,7 @@ class TestAddPlugin(JigTestCase):
 
         self.pm = Mock()
 
-        self.clone_patch = patch('jig.commands.base.clone')
+        self.clone_patch = patch('jig.gitutils.remote.clone')
         self.clone = self.clone_patch.start()
 
         self.rmtree_patch = patch('jig.commands.base.rmtree')
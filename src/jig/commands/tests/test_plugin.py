@@ -2,6 +2,7 @@
 from os.path import dirname, isdir, isfile, join
 from os import makedirs
 from tempfile import mkdtemp
+from concurrent.futures import ThreadPoolExecutor
 
 from mock import Mock, patch
 
@@ -14,8 +15,9 @@ from jig.exc import ForcedExit
 from jig.plugins import (
     set_jigconfig, get_jigconfig, create_plugin,
     PluginManager)
+from jig.plugins.durations import PluginDurations
 from jig.plugins.testrunner import (
-    Expectation, SuccessResult,
+    Expectation, SuccessResult, PluginTestRun,
     FailureResult, REPORTER_HORIZONTAL_DIVIDER)
 from jig.gitutils.remote import clone
 from jig.commands import plugin
@@ -136,6 +138,31 @@ class TestPluginCommand(CommandTestCase, PluginTestCase):
             c........................ c
             ''', USE_RUNNOW), self.output)
 
+    def test_list_stats(self):
+        """
+        Lists how long each plugin has taken to run.
+        """
+        self._add_plugin(join(self.fixturesdir, 'plugin01'))
+        self._add_plugin(join(self.fixturesdir, 'plugin05'))
+
+        plugin01, plugin05 = PluginManager(
+            get_jigconfig(self.gitrepodir)).plugins
+
+        durations = PluginDurations(self.gitrepodir, weight=0.5)
+        durations.record(plugin01, 0.1, 1)
+        durations.record(plugin01, 0.3, 1)
+        durations.save()
+
+        self.run_command('list --stats -r {0}'.format(self.gitrepodir))
+
+        self.assertResults(result_with_hint('''
+            Installed plugins
+
+            Plugin name               Bundle name            Average      Last    Runs  Change
+            plugin01................. test01                   200ms     300ms       2    +50%
+            plugin05................. test01                       -         -       0       -
+            ''', USE_RUNNOW), self.output)
+
     @cd_gitrepo
     def test_add_bad_plugin(self):
         """
@@ -215,7 +242,7 @@ class TestPluginCommand(CommandTestCase, PluginTestCase):
                 to_dir, template='python',
                 bundle='a', name='a')
 
-        with patch('jig.commands.base.clone') as c:
+        with patch('jig.gitutils.remote.clone') as c:
             c.side_effect = clone_fake
 
             self.run_command(
@@ -240,7 +267,7 @@ class TestPluginCommand(CommandTestCase, PluginTestCase):
                 to_dir, template='python',
                 bundle='a', name='a')
 
-        with patch('jig.commands.base.clone') as c:
+        with patch('jig.gitutils.remote.clone') as c:
             c.side_effect = clone_fake
 
             self.run_command(
@@ -280,7 +307,7 @@ class TestPluginCommand(CommandTestCase, PluginTestCase):
             clone(dir_to_clone, to_dir)
 
         # First thing is to install the the plugin
-        with patch('jig.commands.base.clone') as c:
+        with patch('jig.gitutils.remote.clone') as c:
             c.side_effect = clone_local
 
             self.run_command(
@@ -625,3 +652,75 @@ class TestPluginCommand(CommandTestCase, PluginTestCase):
             {0}
             Pass 1, Fail 0'''.format(REPORTER_HORIZONTAL_DIVIDER),
             self.output)
+
+    def _add_plugin_with_tests(self, bundle_dir, name):
+        """
+        Creates a plugin in ``bundle_dir`` that has an expectation file.
+        """
+        plugin_dir = join(bundle_dir, name)
+        makedirs(join(plugin_dir, 'tests'))
+
+        with open(join(plugin_dir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = bundle\nname = {0}\n'.format(name))
+
+        with open(join(plugin_dir, 'tests', 'expect.rst'), 'w') as fh:
+            fh.write('')
+
+        return plugin_dir
+
+    def test_plugin_tests_bundle(self):
+        """
+        Every plugin with tests in a bundle is tested and summarized.
+        """
+        bundle_dir = mkdtemp()
+        plugin_a = self._add_plugin_with_tests(bundle_dir, 'a')
+        plugin_b = self._add_plugin_with_tests(bundle_dir, 'b')
+
+        runs = {
+            plugin_a: PluginTestRun(plugin_a, '01 – 02 Pass', 1, 0, None),
+            plugin_b: PluginTestRun(plugin_b, '01 – 02 Pass', 1, 0, None)}
+
+        # Threads instead of processes so the patch below is seen
+        with patch('jig.commands.plugin.ProcessPoolExecutor',
+                   new=ThreadPoolExecutor):
+            with patch('jig.commands.plugin.run_plugin_suite') as rpt:
+                rpt.side_effect = lambda plugin_dir, *args: runs[plugin_dir]
+
+                self.run_command('test -j 2 {0}'.format(bundle_dir))
+
+        rpt.assert_any_call(plugin_a, None, False, True)
+        rpt.assert_any_call(plugin_b, None, False, True)
+        self.assertResultsIn('Plugins 2, Pass 2, Fail 0, Error 0', self.output)
+
+    def test_plugin_tests_bundle_failure(self):
+        """
+        If any plugin in a bundle fails, the exit code is not 0.
+        """
+        bundle_dir = mkdtemp()
+        plugin_a = self._add_plugin_with_tests(bundle_dir, 'a')
+        plugin_b = self._add_plugin_with_tests(bundle_dir, 'b')
+
+        runs = {
+            plugin_a: PluginTestRun(plugin_a, '01 – 02 Pass', 1, 0, None),
+            plugin_b: PluginTestRun(plugin_b, '', 0, 0, 'Missing file')}
+
+        with patch('jig.commands.plugin.ProcessPoolExecutor',
+                   new=ThreadPoolExecutor):
+            with patch('jig.commands.plugin.run_plugin_suite') as rpt:
+                rpt.side_effect = lambda plugin_dir, *args: runs[plugin_dir]
+
+                with self.assertRaises(ForcedExit):
+                    self.run_command('test {0}'.format(bundle_dir))
+
+        self.assertResultsIn('Plugins 2, Pass 1, Fail 0, Error 1', self.error)
+
+    def test_plugin_tests_bundle_none_found(self):
+        """
+        A directory without any plugins that have tests is an error.
+        """
+        bundle_dir = mkdtemp()
+
+        with self.assertRaises(ForcedExit):
+            self.run_command('test {0}'.format(bundle_dir))
+
+        self.assertIn('Could not find any plugins with tests', self.error)
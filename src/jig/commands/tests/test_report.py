@@ -1,4 +1,7 @@
 # coding=utf-8
+from os.path import join
+from tempfile import mkdtemp
+
 from jig.exc import ForcedExit
 from jig.tests.testcase import (
     CommandTestCase, PluginTestCase)
@@ -138,3 +141,22 @@ class TestReportCommand(CommandTestCase, PluginTestCase):
             {0}  Jig ran 1 plugin
                 Info 0 Warn 1 Stop 0
             """.format(ATTENTION), self.output)
+
+    def test_repos_file(self):
+        """
+        Reports on each repository listed in a file.
+        """
+        repos = join(mkdtemp(), 'repos.txt')
+        with open(repos, 'w') as fh:
+            fh.write('# Not initialized\n{0}\n'.format(mkdtemp()))
+
+        with self.assertRaises(SystemExit) as ec:
+            self.run_command('--repos {0}'.format(repos))
+
+        self.assertSystemExitCode(ec.exception, 1)
+
+        self.assertIn(
+            'This repository has not been initialized.', self.output)
+        self.assertIn(
+            'Jig checked 1 repository, 0 with problems, 1 could not be '
+            'checked', self.output)
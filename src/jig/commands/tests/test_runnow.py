@@ -1,6 +1,6 @@
 # coding=utf-8
 from tempfile import mkdtemp
-from contextlib import nested
+from contextlib import ExitStack
 
 from mock import patch
 
@@ -51,10 +51,9 @@ class TestRunNowCommand(CommandTestCase, PluginTestCase):
         self.commit(self.gitrepodir, 'a.txt', 'a')
         self.stage(self.gitrepodir, 'b.txt', 'b')
 
-        with nested(
-            patch('jig.runner.sys'),
-            self.assertRaises(SystemExit)
-        ) as (r_sys, ec):
+        with ExitStack() as stack:
+            r_sys = stack.enter_context(patch('jig.runner.sys'))
+            ec = stack.enter_context(self.assertRaises(SystemExit))
             # Raise the error to halt execution like the real sys.exit would
             r_sys.exit.side_effect = SystemExit
 
@@ -72,6 +71,27 @@ class TestRunNowCommand(CommandTestCase, PluginTestCase):
                 Info 0 Warn 1 Stop 0
             """.format(ATTENTION), self.output)
 
+    def test_timings(self):
+        """
+        Timings are shown after the results when asked for.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        # Create staged changes
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+        self.stage(self.gitrepodir, 'b.txt', 'b')
+
+        with ExitStack() as stack:
+            r_sys = stack.enter_context(patch('jig.runner.sys'))
+            ec = stack.enter_context(self.assertRaises(SystemExit))
+            r_sys.exit.side_effect = SystemExit
+
+            self.run_command('--timings {0}'.format(self.gitrepodir))
+
+        self.assertResultsIn('Timings', self.output)
+        self.assertResultsIn('plugin01', self.output.split('Timings')[1])
+
     def test_specific_plugin_installed(self):
         """
         A specific plugin can be ran if it's installed.
@@ -83,10 +103,9 @@ class TestRunNowCommand(CommandTestCase, PluginTestCase):
         self.commit(self.gitrepodir, 'a.txt', 'a')
         self.stage(self.gitrepodir, 'b.txt', 'b')
 
-        with nested(
-            patch('jig.runner.sys'),
-            self.assertRaises(SystemExit)
-        ) as (r_sys, ec):
+        with ExitStack() as stack:
+            r_sys = stack.enter_context(patch('jig.runner.sys'))
+            ec = stack.enter_context(self.assertRaises(SystemExit))
             # Raise the error to halt execution like the real sys.exit would
             r_sys.exit.side_effect = SystemExit
 
@@ -113,10 +132,9 @@ class TestRunNowCommand(CommandTestCase, PluginTestCase):
         self.commit(self.gitrepodir, 'a.txt', 'a')
         self.stage(self.gitrepodir, 'b.txt', 'b')
 
-        with nested(
-            patch('jig.runner.sys'),
-            self.assertRaises(SystemExit)
-        ) as (r_sys, ec):
+        with ExitStack() as stack:
+            r_sys = stack.enter_context(patch('jig.runner.sys'))
+            ec = stack.enter_context(self.assertRaises(SystemExit))
             # Raise the error to halt execution like the real sys.exit would
             r_sys.exit.side_effect = SystemExit
 
@@ -0,0 +1,53 @@
+import argparse
+
+from jig.commands.base import BaseCommand
+from jig.conf import WATCH_DEBOUNCE
+from jig.exc import GitRepoNotInitialized
+from jig.gitutils.checks import repo_jiginitialized
+from jig.output import flush_printer
+from jig.runner import Runner
+from jig.watch import watch, AGAINST_HEAD, AGAINST_INDEX
+
+
+_parser = argparse.ArgumentParser(
+    description='Check files as they are saved',
+    usage='jig watch [-h] [-p PLUGIN] [--against {head,index}] '
+    '[--debounce SECONDS] [PATH]')
+
+_parser.add_argument(
+    '--plugin', '-p',
+    help='Only run this specific named plugin')
+_parser.add_argument(
+    '--against', choices=(AGAINST_HEAD, AGAINST_INDEX), default=AGAINST_HEAD,
+    help='Compare the working directory with HEAD or with what is staged')
+_parser.add_argument(
+    '--debounce', type=float, default=WATCH_DEBOUNCE,
+    help='Wait this many seconds after a save for more saves to finish')
+_parser.add_argument(
+    'path', nargs='?', default='.',
+    help='Path to the Git repository')
+
+
+class Command(BaseCommand):
+    parser = _parser
+
+    def process(self, argv):
+        path = argv.path
+
+        runner = Runner(view=self.view)
+
+        with self.out() as printer:
+            if not repo_jiginitialized(path):
+                raise GitRepoNotInitialized(
+                    'This repository has not been initialized.')
+
+            printer('Watching {0} for changes, hit CTRL-C to stop'.format(
+                path))
+            flush_printer(printer)
+
+            try:
+                watch(
+                    path, runner, printer, plugin=argv.plugin,
+                    against=argv.against, delay=argv.debounce)
+            except KeyboardInterrupt:
+                pass
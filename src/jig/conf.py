@@ -18,6 +18,27 @@ JIG_DIR_NAME = '.jig'
 JIG_PLUGIN_CONFIG_FILENAME = 'plugins.cfg'
 JIG_PLUGIN_DIR = 'plugins'
 
+# How long each plugin took in previous runs, used to start the slowest first
+JIG_DURATIONS_FILENAME = 'durations.json'
+
+# What the plugins said about the last changes they checked
+JIG_RESULTS_CACHE_FILENAME = 'results.json'
+
+# Where results are recorded in Git notes so other clones can reuse them
+JIG_NOTES_REF = 'refs/notes/jig'
+
+# The patch-ids of commits the plugins have already checked in CI mode, and
+# how many of them to remember
+JIG_CHECKED_PATCHES_FILENAME = 'patches.json'
+JIG_CHECKED_PATCHES_MAX = 10000
+
+# Where profiles of jig's own process are written, and how many runs to keep
+JIG_PROFILES_DIRNAME = 'profiles'
+JIG_PROFILES_KEEP = 20
+
+# Names the file the pre-commit hook saves a trace of its run to
+JIG_TRACE_ENVIRONMENT = 'JIG_TRACE_FILE'
+
 
 ## Plugin specific settings
 
@@ -32,6 +53,36 @@ PLUGIN_PRE_COMMIT_SCRIPT = 'pre-commit'
 PLUGIN_PRE_COMMIT_TEMPLATE_DIR = \
     join(dirname(__file__), 'data', 'pre-commits')
 
+# How much the latest run counts towards a plugin's average duration
+PLUGIN_DURATIONS_WEIGHT = 0.3
+
+# How many plugins can run at the same time, None for one per CPU
+PLUGIN_MAX_JOBS = None
+
+# The most a plugin can write to stdout, in bytes, before it's stopped
+PLUGIN_MAX_OUTPUT = 32 * 1024 * 1024
+
+# The fewest files a copy of a shardable plugin is given to check
+PLUGIN_SHARD_MIN_FILES = 100
+
+# How many lines are kept before they are written to the console
+OUTPUT_BUFFER_LINES = 500
+
+# The most messages from one plugin that are shown on the console
+OUTPUT_MAX_PLUGIN_MESSAGES = 1000
+
+# The most messages from one plugin about one file that are shown
+OUTPUT_MAX_FILE_MESSAGES = 100
+
+# How many repositories jig report --repos checks at the same time
+REPORT_MAX_REPOS = 4
+
+# How long jig watch waits for a burst of saves to finish, in seconds
+WATCH_DEBOUNCE = 0.2
+
+# How often jig watch looks for changes where inotify isn't available
+WATCH_POLL_INTERVAL = 0.5
+
 # How often to check for plugin updates
 PLUGIN_CHECK_FOR_UPDATES = timedelta(days=5)
 
@@ -40,3 +91,10 @@ PLUGIN_TESTS_DIRECTORY = 'tests'
 
 # Name of the file that serves as both documentation and tests for a plugin
 PLUGIN_EXPECTATIONS_FILENAME = 'expect.rst'
+
+# Parsed expectations are cached inside the user's ~/.jig directory
+PLUGIN_EXPECTATIONS_CACHE_DIR = join('cache', 'expectations')
+
+# Digests of the files in plugin directories are cached inside the user's
+# ~/.jig directory, by the size and modification time of the files
+PLUGIN_DIGESTS_CACHE_DIR = join('cache', 'digests')
@@ -10,6 +10,7 @@ What is useful to a jig plugin author is the following:
 
     1. What files changed
     2. What's the simple diff for modified files
+    3. Which lines changed, as ranges of line numbers
 
 This module manipulates :py:class:`git.DiffIndex` objects and provides other
 utilities for discovering differences between two strings.
@@ -19,8 +20,8 @@ utilities for discovering differences between two strings.
 from os.path import islink
 from difflib import SequenceMatcher
 
-from git.exc import BadObject
 from jig.conf import CODEC
+from jig.timings import Timings
 
 
 def _make_unicode(string):
@@ -59,7 +60,18 @@ def describe_diff(a, b):
     a = a.splitlines()
     b = b.splitlines()
 
-    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b).get_opcodes():
+    return _describe_opcodes(a, b, _opcodes(a, b))
+
+
+def _opcodes(a, b):
+    """
+    The changes between the lists of lines ``a`` and ``b``.
+    """
+    return SequenceMatcher(None, a, b).get_opcodes()
+
+
+def _describe_opcodes(a, b, opcodes):
+    for tag, i1, i2, j1, j2 in opcodes:
         if tag == 'equal':
             for idx, line in enumerate(b[j1:j2]):
                 yield (idx + j1 + 1, ' ', _make_unicode(line))
@@ -72,6 +84,66 @@ def describe_diff(a, b):
                 yield (idx + j1 + 1, '+', _make_unicode(line))
 
 
+def _add_range(ranges, start, end):
+    """
+    Append the inclusive range ``start`` to ``end`` to ``ranges``.
+
+    Joins it with the last range if they touch.
+    """
+    if ranges and ranges[-1][1] + 1 >= start:
+        ranges[-1][1] = max(ranges[-1][1], end)
+    else:
+        ranges.append([start, end])
+
+
+def _describe_ranges_opcodes(opcodes):
+    added = []
+    removed = []
+    hunks = []
+
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+
+        if i2 > i1:
+            _add_range(removed, i1 + 1, i2)
+        if j2 > j1:
+            _add_range(added, j1 + 1, j2)
+
+        # Numbered like a unified diff hunk header, an empty side starts at
+        # the line before the change
+        hunks.append([
+            i1 + 1 if i2 > i1 else i1, i2 - i1,
+            j1 + 1 if j2 > j1 else j1, j2 - j1])
+
+    return {'added': added, 'removed': removed, 'hunks': hunks}
+
+
+def describe_ranges(a, b):
+    """
+    Takes two strings and calculates which lines changed between them.
+
+    Output format is a dictionary::
+
+        {'added': [[start, end], ...],
+         'removed': [[start, end], ...],
+         'hunks': [[old_start, old_count, new_start, new_count], ...]}
+
+    ``added`` are the lines in ``b`` that are new and ``removed`` are the
+    lines in ``a`` that are gone, as inclusive ranges of line numbers. Each of
+    the ``hunks`` is one change with its position in both ``a`` and ``b``,
+    like the ``@@ -2,1 +2,2 @@`` header of a unified diff.
+
+    Example::
+
+        >>> describe_ranges('a\\nb\\nc', 'a\\nc\\nd')
+        {'added': [[3, 3]],
+         'removed': [[2, 2]],
+         'hunks': [[2, 1, 1, 0], [3, 0, 3, 1]]}
+    """
+    return _describe_ranges_opcodes(_opcodes(a.splitlines(), b.splitlines()))
+
+
 class DiffType(object):
 
     """
@@ -119,7 +191,7 @@ class GitDiffIndex(object):
         self.gitrepo = gitrepo
         self.difflist = difflist
 
-    def files(self):
+    def files(self, timings=None):
         """
         A generator for returning human-readable information about the diffs.
 
@@ -134,34 +206,53 @@ class GitDiffIndex(object):
         the changes that occurred between the a_blob and b_blob from the
         commit.
 
+        ``ranges`` is the same change as ranges of line numbers, see
+        :py:func:`describe_ranges`. Both are worked out from one comparison of
+        the blobs.
+
         ``type`` is ``added``, ``deleted``, ``renamed``, ``modified`` and
         describes the overall action that occurred on this file.
 
         This will skip symlinks and will not provide the contens of binary
         files.
+
+        Time spent reading blobs is recorded with ``timings`` if it's given.
         """
+        from git.exc import BadObject
+
+        timings = timings or Timings()
+
         for diff in self.difflist:
             a_blob = diff.a_blob
             b_blob = diff.b_blob
 
-            a_data = ''
-            b_data = ''
+            a_data = b''
+            b_data = b''
 
-            try:
-                a_data = a_blob.data_stream.read()
-            except (AttributeError, BadObject):
-                pass
+            with timings.phase('blob_reads'):
+                try:
+                    a_data = a_blob.data_stream.read()
+                except (AttributeError, BadObject):
+                    pass
 
-            try:
-                b_data = b_blob.data_stream.read()
-            except (AttributeError, BadObject):
-                pass
+                try:
+                    b_data = b_blob.data_stream.read()
+                except (AttributeError, BadObject):
+                    pass
 
-            if '\0' in a_data or '\0' in b_data:
+            if b'\0' in a_data or b'\0' in b_data:
                 # This file is binary? Probably.
                 linediff = []
+                ranges = _describe_ranges_opcodes([])
             else:
-                linediff = describe_diff(a_data, b_data)
+                a_lines = a_data.splitlines()
+                b_lines = b_data.splitlines()
+
+                with timings.phase('describe_diff'):
+                    opcodes = _opcodes(a_lines, b_lines)
+                    ranges = _describe_ranges_opcodes(opcodes)
+
+                linediff = _describe_opcodes(a_lines, b_lines, opcodes)
 
             blob = a_blob or b_blob
 
@@ -177,4 +268,38 @@ class GitDiffIndex(object):
                 'filename': blob.abspath,
                 'name': blob.path,
                 'diff': linediff,
+                'ranges': ranges,
                 'type': DiffType.for_diff(diff)}
+
+    def freeze(self, timings=None):
+        """
+        Read the whole diff now and keep it in memory.
+
+        Returns a :py:class:`FrozenGitDiffIndex` with the same files, the
+        ``diff`` of each one is a list instead of a generator. It can be used
+        without touching the Git repository again.
+        """
+        timings = timings or Timings()
+
+        files = []
+        for f in self.files(timings=timings):
+            with timings.phase('describe_diff'):
+                f['diff'] = list(f['diff'])
+            files.append(f)
+
+        return FrozenGitDiffIndex(self.gitrepo, files)
+
+
+class FrozenGitDiffIndex(GitDiffIndex):
+
+    """
+    A :py:class:`GitDiffIndex` that has already been read.
+
+    """
+    def __init__(self, gitrepo, files):
+        super(FrozenGitDiffIndex, self).__init__(gitrepo, [])
+
+        self._files = files
+
+    def files(self, timings=None):
+        return iter(self._files)
@@ -1,5 +1,20 @@
 import sys
 
+# What the pre-commit hook imports before it can start running plugins
+HOOK_IMPORT = 'from jig.runner import Runner'
+
+# Modules that are slow to import and should only load when they are needed
+HEAVY_MODULES = ('git', 'docutils', 'msgpack')
+
+_MEASURE_IMPORT_SCRIPT = """
+import sys, json, time
+start = time.time()
+{statement}
+elapsed = time.time() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+sys.stdout.write(json.dumps({{'seconds': elapsed, 'heavy': heavy}}))
+"""
+
 
 def main():
     """
@@ -13,6 +28,46 @@ def main():
     jig.fromconsole(sys.argv)
 
 
+def hook(gitrepo):
+    """
+    Entry point called from the pre-commit hook.
+
+    Before loading the rest of jig this checks if anything it would look at
+    has been staged. Commits that only touch the :file:`.jig` directory (or
+    nothing at all) can then continue right away.
+
+    Setting ``JIG_PROFILE`` in the environment profiles the whole hook, see
+    :py:mod:`jig.profiling`.
+
+    :param string gitrepo: path to the Git repository
+    """
+    from jig.profiling import profile_mode, profiled
+
+    with profiled(gitrepo, profile_mode(), 'hook'):
+        _hook(gitrepo)
+
+
+def _hook(gitrepo):
+    from jig.conf import JIG_DIR_NAME
+    from jig.gitutils.checks import repo_jiginitialized, staged_paths
+
+    if repo_jiginitialized(gitrepo):
+        paths = staged_paths(gitrepo)
+
+        # Compare whole path components, .jigplugins.txt is not in .jig
+        if paths is not None and all([
+                i == JIG_DIR_NAME or i.startswith(JIG_DIR_NAME + '/')
+                for i in paths]):
+            sys.stdout.write(
+                'No changes available for Jig to check, skipping.\n')
+            sys.exit(0)
+
+    from jig.runner import Runner
+
+    jig = Runner(cache=True)
+    jig.fromhook(gitrepo)
+
+
 def test():
     """
     Run the suite of tests for jig.
@@ -40,8 +95,6 @@ def coverage():
         '*noseplugin*',
         '*entrypoints*',
         '*testcase*',
-        '*packages*',
-        '*backports.py',
         '*jig/__init__.py']
 
     cov = coverage(
@@ -60,3 +113,69 @@ def coverage():
 
     cov.report()
     cov.html_report(directory='../cover')
+
+
+def measure_import(statement=HOOK_IMPORT, repeat=10):
+    """
+    Measure how long an import statement takes in a fresh interpreter.
+
+    Returns a tuple of ``(timings, heavy)`` where ``timings`` is a sorted list
+    of seconds, one for each of the ``repeat`` runs, and ``heavy`` is a list
+    of the :py:data:`HEAVY_MODULES` that the statement caused to be imported.
+    """
+    import json
+    from os import environ, pathsep
+    from os.path import dirname, realpath
+    from subprocess import Popen, PIPE
+
+    # Make sure the fresh interpreter imports this copy of jig
+    env = dict(environ)
+    env['PYTHONPATH'] = pathsep.join(filter(None, [
+        dirname(dirname(realpath(__file__))), env.get('PYTHONPATH')]))
+
+    script = _MEASURE_IMPORT_SCRIPT.format(
+        statement=statement, heavy=HEAVY_MODULES)
+
+    timings = []
+    heavy = []
+    for _ in range(repeat):
+        ph = Popen([sys.executable, '-c', script], stdout=PIPE, env=env)
+        stdout, _ = ph.communicate()
+
+        measured = json.loads(stdout.decode('utf-8'))
+
+        timings.append(measured['seconds'])
+        heavy = measured['heavy']
+
+    return sorted(timings), heavy
+
+
+def importtime():
+    """
+    Report how long it takes to import what the pre-commit hook needs.
+
+    Exits non-zero if any of the heavy dependencies are imported eagerly.
+    """
+    timings, heavy = measure_import()
+
+    sys.stdout.write('{0}\n'.format(HOOK_IMPORT))
+    sys.stdout.write('    min {0:.1f}ms median {1:.1f}ms\n'.format(
+        timings[0] * 1000, timings[len(timings) // 2] * 1000))
+
+    if heavy:
+        sys.stdout.write('    imported eagerly: {0}\n'.format(
+            ', '.join(heavy)))
+        return 1
+
+    return 0
+
+
+def benchmark():
+    """
+    Run the benchmark suite against a generated repository.
+
+    Exits non-zero if a benchmark is slower than the baseline.
+    """
+    from jig.benchmarks.suite import main as benchmark_main
+
+    return benchmark_main(sys.argv[1:])
@@ -0,0 +1,85 @@
+# coding=utf-8
+from itertools import chain
+
+from jig.output import INFO, WARN, STOP
+from jig.formatters.utils import MessageLimiter
+
+
+def _format_message(message):
+    """
+    Format a single message as one line.
+
+    Line specific messages look like ``a.txt:3: warn: body (plugin)``. The
+    line number, or the whole location for commit specific messages, is left
+    out if the message doesn't have one.
+
+    :param jig.output.Message message: the message to format
+    :rtype: str
+    """
+    location = ''
+
+    if message.file:
+        location = message.file
+
+    if message.file and message.line:
+        location = '{0}:{1}'.format(message.file, message.line)
+
+    if location:
+        location += ': '
+
+    # A body with many lines would no longer be one line per message
+    body = ' '.join(str(message.body).split('\n'))
+
+    return '{location}{type}: {body} ({plugin})'.format(
+        location=location, type=message.type, body=body,
+        plugin=message.plugin.name)
+
+
+class CompactFormatter(object):
+
+    """
+    One line for each message, for results too many to read through.
+
+    Each message is printed as soon as it has been formatted, nothing is
+    gathered up first.
+
+    """
+    # Simple name used to specify this formatter on the command line
+    name = 'compact'
+
+    def print_results(self, printer, collator):
+        """
+        Format and print plugins results, one line each.
+
+        :param function printer: called to send output to the view
+        :param ResultsCollator collator: access to the results
+        """
+        plugins = collator.plugins
+        errors = collator.errors
+
+        cm, fm, lm = collator.messages
+
+        limiter = MessageLimiter()
+
+        for message in limiter.filter(chain(cm, fm, lm, errors)):
+            printer(_format_message(message))
+
+        for line in limiter.summary():
+            printer(line)
+
+        counts = collator.counts
+        ic, wc, sc = counts[INFO], counts[WARN], counts[STOP]
+
+        form = 'plugin' if len(plugins) == 1 else 'plugins'
+
+        summary = 'Jig ran {plen} {form}, Info {ic} Warn {wc} Stop {sc}'
+        summary = summary.format(
+            plen=len(plugins), form=form, ic=ic, wc=wc, sc=sc)
+
+        if errors:
+            summary += ', {0} reported errors'.format(len(errors))
+
+        printer(summary)
+
+        # Return the counts for the different types of messages
+        return (ic, wc, sc)
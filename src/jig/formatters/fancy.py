@@ -1,10 +1,12 @@
 # coding=utf-8
 from jig.output import INFO, WARN, STOP
-from jig.formatters.utils import green_bold, yellow_bold, red_bold
+from jig.formatters.utils import (
+    green_bold, yellow_bold, red_bold, MessageLimiter)
 
 OK_SIGN = '\U0001f44c'
 ATTENTION = '\U0001f449'
 EXPLODE = '\U0001f4a5'
+ELLIPSIS = '\u2026'
 
 
 class FancyFormatter(object):
@@ -52,17 +54,21 @@ class FancyFormatter(object):
             WARN: yellow_bold('\u26a0'),
             STOP: red_bold('\u2715')}
 
+        # A plugin with thousands of messages only shows some of them
+        limiter = MessageLimiter()
+
         ic, wc, sc = (0, 0, 0)
         last_plugin = None
-        for msg in messages:
+        for msg in limiter.filter(messages):
             if last_plugin != msg.plugin:
-                printer('\u25be  {0}'.format(msg.plugin.name))
-                printer('')
+                printer('\u25be  {0}\n'.format(msg.plugin.name))
                 last_plugin = msg.plugin
-            colorized = '{0}  {1}'.format(
-                type_to_symbol[msg.type], self._format_message(msg))
-            printer(colorized)
-            printer('')
+            # The blank line after each message is printed with it
+            printer('{0}  {1}\n'.format(
+                type_to_symbol[msg.type], self._format_message(msg)))
+
+        for line in limiter.summary():
+            printer('{0}  {1}\n'.format(ELLIPSIS, line))
 
         ic, wc, sc = [i[1] for i in list(collator.counts.items())]
         info = green_bold(ic) if ic else ic
@@ -0,0 +1,132 @@
+# coding=utf-8
+from collections import OrderedDict
+
+from jig.tests import factory
+from jig.tests.mocks import MockPlugin
+from jig.tests.testcase import FormatterTestCase
+from jig.formatters.compact import CompactFormatter
+
+
+class TestCompactFormatter(FormatterTestCase):
+
+    """
+    Tests results can be formatted one line per message.
+
+    """
+    formatter = CompactFormatter
+
+    def test_empty_dict(self):
+        """
+        Empty results dict.
+        """
+        printed = self.run_formatter({})
+
+        self.assertResults(
+            """
+            Jig ran 0 plugins, Info 0 Warn 0 Stop 0
+            """,
+            printed
+        )
+
+    def test_no_results(self):
+        """
+        No results.
+        """
+        printed = self.run_formatter(factory.no_results())
+
+        self.assertResults(
+            """
+            Jig ran 10 plugins, Info 0 Warn 0 Stop 0
+            """,
+            printed
+        )
+
+    def test_commit_specific_message(self):
+        """
+        Commit-specific message.
+        """
+        printed = self.run_formatter(factory.commit_specific_message())
+
+        self.assertResults(
+            """
+            info: default (Unnamed)
+            warn: warning (Unnamed)
+            Jig ran 2 plugins, Info 1 Warn 1 Stop 0""",
+            printed
+        )
+
+    def test_line_specific_message(self):
+        """
+        Line-specific message.
+        """
+        printed = self.run_formatter(factory.line_specific_message())
+
+        self.assertResults(
+            """
+            a.txt:1: info: Info A (Unnamed)
+            b.txt:2: warn: Warn B (Unnamed)
+            c.txt:3: stop: Stop C (Unnamed)
+            Jig ran 1 plugin, Info 1 Warn 1 Stop 1""",
+            printed
+        )
+
+    def test_one_of_each(self):
+        """
+        One of each type of message.
+        """
+        printed = self.run_formatter(factory.one_of_each())
+
+        self.assertResults(
+            """
+            info: C (Unnamed)
+            a.txt: info: F (Unnamed)
+            a.txt:1: info: L (Unnamed)
+            Jig ran 3 plugins, Info 3 Warn 0 Stop 0""",
+            printed
+        )
+
+    def test_multiple_lines(self):
+        """
+        A message with many lines is still printed on one.
+        """
+        printed = self.run_formatter(OrderedDict([
+            (MockPlugin(), (0, {'a.txt': [[1, 'w', 'First\nSecond']]}, ''))
+        ]))
+
+        self.assertResults(
+            """
+            a.txt:1: warn: First Second (Unnamed)
+            Jig ran 1 plugin, Info 0 Warn 1 Stop 0""",
+            printed
+        )
+
+    def test_plugin_error(self):
+        """
+        Errors are counted in the summary.
+        """
+        printed = self.run_formatter(factory.error())
+
+        self.assertResults(
+            """
+            stop: Plugin failed (Unnamed)
+            Jig ran 1 plugin, Info 0 Warn 0 Stop 0, 1 reported errors""",
+            printed
+        )
+
+    def test_too_many_messages(self):
+        """
+        Only so many messages are shown for one file.
+        """
+        messages = [[i, 'w', 'Problem'] for i in range(1, 151)]
+
+        printed = self.run_formatter(OrderedDict([
+            (MockPlugin(), (0, {'a.txt': messages}, ''))
+        ]))
+
+        lines = printed.splitlines()
+
+        self.assertEqual(102, len(lines))
+        self.assertEqual('a.txt:100: warn: Problem (Unnamed)', lines[99])
+        self.assertEqual('50 more from Unnamed not shown', lines[100])
+        self.assertEqual(
+            'Jig ran 1 plugin, Info 0 Warn 150 Stop 0', lines[101])
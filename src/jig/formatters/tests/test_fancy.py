@@ -1,7 +1,15 @@
 # coding=utf-8
+from functools import partial
+from collections import OrderedDict
+
+from mock import patch
+
 from jig.tests import factory
+from jig.tests.mocks import MockPlugin
 from jig.tests.testcase import FormatterTestCase
-from jig.formatters.fancy import FancyFormatter, OK_SIGN, ATTENTION, EXPLODE
+from jig.formatters.utils import MessageLimiter
+from jig.formatters.fancy import (
+    FancyFormatter, OK_SIGN, ATTENTION, EXPLODE, ELLIPSIS)
 
 
 class TestFancyFormatter(FormatterTestCase):
@@ -197,3 +205,33 @@ class TestFancyFormatter(FormatterTestCase):
             """.format(factory.anon_obj, ATTENTION),
             printed
         )
+
+    def test_too_many_messages(self):
+        """
+        A plugin with too many messages only shows some of them.
+        """
+        plugin = MockPlugin()
+        results = OrderedDict([
+            (plugin, (0, [['w', 'Warning {0}'.format(i)] for i in range(5)],
+                      ''))])
+
+        limiter = partial(MessageLimiter, per_plugin=2)
+
+        with patch('jig.formatters.fancy.MessageLimiter', new=limiter):
+            printed = self.run_formatter(results)
+
+        self.assertResults(
+            """
+            ▾  Unnamed
+
+            ⚠  Warning 0
+
+            ⚠  Warning 1
+
+            {0}  3 more from Unnamed not shown
+
+            {1}  Jig ran 1 plugin
+                Info 0 Warn 5 Stop 0
+            """.format(ELLIPSIS, ATTENTION),
+            printed
+        )
@@ -1,6 +1,8 @@
 from jig.tests.testcase import JigTestCase
-
-from jig.formatters.utils import green_bold, yellow_bold, red_bold
+from jig.tests.mocks import MockPlugin
+from jig.output import Message, Error
+from jig.formatters.utils import (
+    green_bold, yellow_bold, red_bold, MessageLimiter)
 
 
 class TestColors(JigTestCase):
@@ -35,3 +37,68 @@ class TestColors(JigTestCase):
             '\x1b[31;1mRed\x1b[39;22m',
             red_bold('Red')
         )
+
+
+class TestMessageLimiter(JigTestCase):
+
+    """
+    Only so many messages from a plugin are shown.
+
+    """
+    def setUp(self):
+        super(TestMessageLimiter, self).setUp()
+
+        self.plugin_a = MockPlugin(name='a')
+        self.plugin_b = MockPlugin(name='b')
+
+    def test_under_the_limits(self):
+        """
+        All of the messages are shown.
+        """
+        limiter = MessageLimiter(per_plugin=2, per_file=2)
+        messages = [
+            Message(self.plugin_a, body='1'),
+            Message(self.plugin_a, body='2', file='a.txt')]
+
+        self.assertEqual(messages, list(limiter.filter(messages)))
+        self.assertEqual([], limiter.summary())
+
+    def test_per_plugin(self):
+        """
+        Each plugin can show only so many messages.
+        """
+        limiter = MessageLimiter(per_plugin=1, per_file=10)
+        messages = [
+            Message(self.plugin_a, body='1'),
+            Message(self.plugin_a, body='2'),
+            Message(self.plugin_b, body='3'),
+            Message(self.plugin_a, body='4', file='a.txt')]
+
+        self.assertEqual(
+            ['1', '3'], [i.body for i in limiter.filter(messages)])
+        self.assertEqual(['2 more from a not shown'], limiter.summary())
+
+    def test_per_file(self):
+        """
+        Each plugin can show only so many messages about one file.
+        """
+        limiter = MessageLimiter(per_plugin=10, per_file=1)
+        messages = [
+            Message(self.plugin_a, body='1', file='a.txt', line=1),
+            Message(self.plugin_a, body='2', file='a.txt', line=2),
+            Message(self.plugin_a, body='3', file='b.txt'),
+            Message(self.plugin_b, body='4', file='a.txt'),
+            Message(self.plugin_a, body='5')]
+
+        self.assertEqual(
+            ['1', '3', '4', '5'], [i.body for i in limiter.filter(messages)])
+        self.assertEqual(['1 more from a not shown'], limiter.summary())
+
+    def test_errors_always_shown(self):
+        """
+        Errors are not limited.
+        """
+        limiter = MessageLimiter(per_plugin=0)
+        messages = [Error(self.plugin_a, body='failed')]
+
+        self.assertEqual(messages, list(limiter.filter(messages)))
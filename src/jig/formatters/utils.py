@@ -1,3 +1,9 @@
+from collections import OrderedDict
+
+from jig.conf import OUTPUT_MAX_PLUGIN_MESSAGES, OUTPUT_MAX_FILE_MESSAGES
+from jig.output import Error
+
+
 def green_bold(payload):
     """
     Format payload as green.
@@ -17,3 +23,64 @@ def red_bold(payload):
     Format payload as red.
     """
     return '\x1b[31;1m{0}\x1b[39;22m'.format(payload)
+
+
+class MessageLimiter(object):
+
+    """
+    Lets only so many messages from each plugin through to be shown.
+
+    A plugin gets to show ``per_plugin`` messages, and no more than
+    ``per_file`` of them can be about the same file. Errors are always shown.
+    The messages that are held back are counted so they can be summarized.
+
+    """
+    def __init__(self, per_plugin=OUTPUT_MAX_PLUGIN_MESSAGES,
+                 per_file=OUTPUT_MAX_FILE_MESSAGES):
+        self.per_plugin = per_plugin
+        self.per_file = per_file
+
+        # How many messages of each plugin were held back
+        self.omitted = OrderedDict()
+
+        self._by_plugin = {}
+        self._by_file = {}
+
+    def allow(self, message):
+        """
+        Whether ``message`` should be shown.
+        """
+        if isinstance(message, Error):
+            return True
+
+        plugin = message.plugin
+        by_file = (plugin, message.file)
+
+        full = self._by_plugin.get(plugin, 0) >= self.per_plugin
+        if message.file:
+            full = full or self._by_file.get(by_file, 0) >= self.per_file
+
+        if full:
+            self.omitted[plugin] = self.omitted.get(plugin, 0) + 1
+            return False
+
+        self._by_plugin[plugin] = self._by_plugin.get(plugin, 0) + 1
+
+        if message.file:
+            self._by_file[by_file] = self._by_file.get(by_file, 0) + 1
+
+        return True
+
+    def filter(self, messages):
+        """
+        Generates the ``messages`` that should be shown.
+        """
+        return (i for i in messages if self.allow(i))
+
+    def summary(self):
+        """
+        Describes what was held back, one line for each plugin.
+        """
+        return [
+            '{0} more from {1} not shown'.format(count, plugin.name)
+            for plugin, count in self.omitted.items()]
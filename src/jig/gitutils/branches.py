@@ -1,10 +1,13 @@
 from os import unlink
-from tempfile import mkstemp
+from os.path import join, isfile
+from shutil import copyfile, rmtree
+from tempfile import mkstemp, mkdtemp
 from functools import partial
 from contextlib import contextmanager
 from collections import namedtuple
 
 import git
+from git.util import hex_to_bin
 from git.exc import GitCommandError, BadObject
 
 from jig.exc import (
@@ -83,7 +86,7 @@ def _prepare_against_staged_index(repo):
 
         os_handle, patchfile = mkstemp()
 
-        with open(patchfile, 'w') as fh:
+        with open(patchfile, 'wb') as fh:
             repo.git.diff(
                 '--color=never', '-R', 'stash@{0}',
                 output_stream=fh)
@@ -116,6 +119,56 @@ def prepare_working_directory(repository, rev_range=None):
 RevRangePair = namedtuple('RevRangePair', 'a b raw')
 
 
+def working_tree(repository):
+    """
+    Write the working directory to Git as a tree, without staging anything.
+
+    A copy of the index is used to add every change in the working directory,
+    the real index and the working directory are left alone. Files Git
+    ignores are left out.
+
+    :param string repository: file path to the Git repository
+    :returns: the tree
+    :rtype: git.objects.tree.Tree
+    """
+    repo = git.Repo(repository)
+
+    tempdir = mkdtemp()
+    try:
+        index_file = join(tempdir, 'index')
+
+        if isfile(join(repo.git_dir, 'index')):
+            # Starting from the real index means Git only has to look at the
+            # files that changed
+            copyfile(join(repo.git_dir, 'index'), index_file)
+
+        env = {'GIT_INDEX_FILE': index_file}
+
+        repo.git.add('--all', env=env)
+        sha = repo.git.write_tree(env=env)
+    finally:
+        rmtree(tempdir)
+
+    return _tree(repo, sha)
+
+
+def _tree(repo, sha):
+    # A root tree that can be looked into by path
+    return git.Tree(repo, hex_to_bin(sha), git.Tree.tree_id << 12, '')
+
+
+def staged_tree(repository):
+    """
+    Write the Git index as a tree.
+
+    :param string repository: file path to the Git repository
+    :rtype: git.objects.tree.Tree
+    """
+    repo = git.Repo(repository)
+
+    return _tree(repo, repo.git.write_tree())
+
+
 class Tracked(object):
 
     """
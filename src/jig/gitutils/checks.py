@@ -1,8 +1,7 @@
 from os.path import isdir, join
+from subprocess import Popen, PIPE
 
-from git import Repo
-
-from jig.conf import JIG_DIR_NAME
+from jig.conf import JIG_DIR_NAME, CODEC
 
 
 def is_git_repo(gitdir):
@@ -23,6 +22,28 @@ def working_directory_dirty(gitdir):
     """
     Returns boolean indicating if the working directory is dirty.
     """
+    from git import Repo
+
     repo = Repo(gitdir)
 
     return repo.is_dirty()
+
+
+def staged_paths(gitdir):
+    """
+    Returns a list of the paths that are staged in the Git index.
+
+    This runs Git directly instead of going through GitPython so that it's
+    cheap enough for the pre-commit hook to call before it loads anything
+    else. Returns ``None`` if Git could not give us the list.
+    """
+    ph = Popen(
+        ['git', 'diff', '--cached', '--name-only', '--no-renames', '-z'],
+        cwd=gitdir, stdout=PIPE, stderr=PIPE)
+
+    stdout, stderr = ph.communicate()
+
+    if ph.returncode != 0:
+        return None
+
+    return [i for i in stdout.decode(CODEC).split('\0') if i]
@@ -0,0 +1,110 @@
+"""
+Results in Git notes
+====================
+
+Jig can record what the plugins said about a range of commits as a Git note
+on the tree it ended at. The notes are kept under :data:`JIG_NOTES_REF`, apart
+from anyone's own notes, and are ordinary Git objects that can be pushed and
+fetched like any other ref.
+
+Each line of a note is one check, so notes from different places can be
+merged by putting the lines together.
+"""
+from git.exc import GitCommandError
+
+from jig.conf import JIG_NOTES_REF
+
+# Where notes fetched from a remote are kept until they are merged
+_FETCHED_NOTES_REF = JIG_NOTES_REF + '-fetched'
+
+# Changing notes makes a commit, jig's own bookkeeping is made by jig. CI
+# agents often don't have a Git identity at all.
+_NOTES_IDENTITY = {
+    'GIT_AUTHOR_NAME': 'jig',
+    'GIT_AUTHOR_EMAIL': 'jig@localhost',
+    'GIT_COMMITTER_NAME': 'jig',
+    'GIT_COMMITTER_EMAIL': 'jig@localhost'}
+
+
+def read_note(repo, sha):
+    """
+    The lines of the Jig note on the object ``sha``.
+
+    :param git.Repo repo: Git repository
+    :param string sha: the object the note is on
+    :returns: the lines of the note, an empty list if there isn't one
+    :rtype: list
+    """
+    try:
+        note = repo.git.notes('--ref', JIG_NOTES_REF, 'show', sha)
+    except GitCommandError:
+        return []
+
+    return [i for i in note.splitlines() if i.strip()]
+
+
+def add_note_line(repo, sha, line):
+    """
+    Add ``line`` to the Jig note on the object ``sha``.
+
+    :param git.Repo repo: Git repository
+    :param string sha: the object the note is on
+    :param string line: what to add, without any newlines
+    """
+    lines = read_note(repo, sha)
+
+    if line in lines:
+        return
+
+    repo.git.notes(
+        '--ref', JIG_NOTES_REF, 'add', '-f', '-m',
+        '\n'.join(lines + [line]), sha, env=_NOTES_IDENTITY)
+
+
+def fetch_notes(repo, remote):
+    """
+    Merge the Jig notes from ``remote`` into the local ones.
+
+    Returns ``False`` if the remote doesn't have any or they can't be
+    fetched or merged, the local notes are left as they were.
+
+    :param git.Repo repo: Git repository
+    :param string remote: name or URL of the remote
+    """
+    try:
+        repo.git.fetch(
+            remote, '+{0}:{1}'.format(JIG_NOTES_REF, _FETCHED_NOTES_REF))
+    except GitCommandError:
+        return False
+
+    try:
+        repo.git.notes(
+            '--ref', JIG_NOTES_REF, 'merge', '-q', '-s', 'cat_sort_uniq',
+            _FETCHED_NOTES_REF, env=_NOTES_IDENTITY)
+    except GitCommandError:
+        return False
+    finally:
+        repo.git.update_ref('-d', _FETCHED_NOTES_REF)
+
+    return True
+
+
+def push_notes(repo, remote):
+    """
+    Push the Jig notes to ``remote``.
+
+    If someone else pushed notes first, theirs are merged in and the push is
+    tried once more. Returns ``False`` if the notes could not be pushed.
+
+    :param git.Repo repo: Git repository
+    :param string remote: name or URL of the remote
+    """
+    refspec = '{0}:{0}'.format(JIG_NOTES_REF)
+
+    for attempt in range(2):
+        try:
+            repo.git.push('-q', remote, refspec)
+            return True
+        except GitCommandError:
+            if attempt or not fetch_notes(repo, remote):
+                return False
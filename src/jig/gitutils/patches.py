@@ -0,0 +1,70 @@
+from tempfile import TemporaryFile
+from collections import OrderedDict
+
+
+def patch_ids(repo, rev_range):
+    """
+    The stable patch-id of each commit in a revision range.
+
+    A commit that was rebased or cherry-picked has the same patch-id as the
+    original as long as the change it makes is the same. Merges and commits
+    that don't change anything don't have one and are left out.
+
+    :param git.Repo repo: Git repository
+    :param RevRangePair rev_range: the commits to look at
+    :returns: the patch-id of each commit by its SHA-1, oldest first
+    :rtype: OrderedDict
+    """
+    with TemporaryFile() as fh:
+        repo.git.log(
+            '-p', '--no-color', '--no-merges', '--reverse',
+            '--format=commit %H',
+            '{0}..{1}'.format(rev_range.a.hexsha, rev_range.b.hexsha),
+            output_stream=fh)
+
+        fh.seek(0)
+
+        output = repo.git.patch_id('--stable', istream=fh)
+
+    ids = OrderedDict()
+    for line in output.splitlines():
+        patch_id, commit = line.split()
+        ids[commit] = patch_id
+
+    return ids
+
+
+def has_merges(repo, rev_range):
+    """
+    True if there are merge commits in a revision range.
+
+    :param git.Repo repo: Git repository
+    :param RevRangePair rev_range: the commits to look at
+    :rtype: bool
+    """
+    return bool(repo.git.rev_list(
+        '--merges', '-n', '1',
+        '{0}..{1}'.format(rev_range.a.hexsha, rev_range.b.hexsha)))
+
+
+def changed_paths(repo, commits):
+    """
+    The paths the ``commits`` changed, relative to the repository.
+
+    :param git.Repo repo: Git repository
+    :param list commits: SHA-1s of commits that are not merges
+    :rtype: list
+    """
+    if not commits:
+        return []
+
+    with TemporaryFile() as fh:
+        # Each commit on its own line is compared with its parent, two on the
+        # command line would be compared with each other
+        fh.write('\n'.join(commits).encode('ascii') + b'\n')
+        fh.seek(0)
+
+        output = repo.git.diff_tree(
+            '--stdin', '--no-commit-id', '--name-only', '-r', istream=fh)
+
+    return sorted(set(i for i in output.splitlines() if i))
@@ -12,11 +12,10 @@ RUN_JIG_SCRIPT = \
     path.append('{gitdb_dir}')
     path.append('{smmap_dir}')
 
-    from jig.runner import Runner
+    from jig.entrypoints import hook
 
-    # Start up the runner, passing in the repo directory
-    jig = Runner()
-    jig.fromhook(join(dirname(__file__), '..', '..'))
+    # Start up jig, passing in the repo directory
+    hook(join(dirname(__file__), '..', '..'))
     """).strip()
 
 AUTO_JIG_INIT_SCRIPT = \
@@ -13,7 +13,8 @@ from jig.exc import (
     TrackingBranchMissing)
 from jig.gitutils.branches import (
     parse_rev_range, prepare_working_directory,
-    _prepare_against_staged_index, _prepare_with_rev_range, Tracked)
+    _prepare_against_staged_index, _prepare_with_rev_range, Tracked,
+    working_tree, staged_tree)
 
 
 @contextmanager
@@ -518,3 +519,37 @@ class TestTracked(JigTestCase):
             tracked.reference.commit,
             self.commits[-1]
         )
+
+
+class TestWorkingTree(PrepareTestCase):
+
+    """
+    Write the working directory or the index as a tree.
+
+    """
+    def test_working_tree(self):
+        """
+        Changes that are not staged are in the tree.
+        """
+        self.stage(self.gitrepodir, 'b.txt', 'staged')
+        self.create_file(self.gitrepodir, 'a.txt', 'changed')
+        self.create_file(self.gitrepodir, 'c.txt', 'new')
+
+        with assert_git_status_unchanged(self.gitrepodir):
+            tree = working_tree(self.gitrepodir)
+
+        self.assertEqual(b'changed', tree['a.txt'].data_stream.read())
+        self.assertEqual(b'staged', tree['b.txt'].data_stream.read())
+        self.assertEqual(b'new', tree['c.txt'].data_stream.read())
+
+    def test_staged_tree(self):
+        """
+        Only staged changes are in the tree of the index.
+        """
+        self.stage(self.gitrepodir, 'b.txt', 'staged')
+        self.create_file(self.gitrepodir, 'a.txt', 'changed')
+
+        tree = staged_tree(self.gitrepodir)
+
+        self.assertEqual(b'a', tree['a.txt'].data_stream.read())
+        self.assertEqual(b'staged', tree['b.txt'].data_stream.read())
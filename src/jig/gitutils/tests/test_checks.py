@@ -5,7 +5,7 @@ from git import Repo
 from jig.tests.testcase import JigTestCase
 from jig.plugins import initializer
 from jig.gitutils.checks import (
-    is_git_repo, repo_jiginitialized, working_directory_dirty)
+    is_git_repo, repo_jiginitialized, working_directory_dirty, staged_paths)
 
 
 class TestIsGitRepo(JigTestCase):
@@ -90,3 +90,45 @@ class TestWorkingDirctoryDirty(JigTestCase):
         self.create_file(self.gitrepodir, 'd.txt', 'd')
 
         self.assertFalse(working_directory_dirty(self.gitrepodir))
+
+
+class TestStagedPaths(JigTestCase):
+
+    """
+    List the paths staged in the index.
+
+    """
+    def setUp(self):
+        super(TestStagedPaths, self).setUp()
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+
+    def test_nothing_staged(self):
+        """
+        Nothing has been staged.
+        """
+        self.assertEqual([], staged_paths(self.gitrepodir))
+
+    def test_staged_files(self):
+        """
+        Modified and new files are listed.
+        """
+        self.stage(self.gitrepodir, 'a.txt', 'aa')
+        self.stage(self.gitrepodir, 'b/c.txt', 'c')
+
+        self.assertEqual(
+            ['a.txt', 'b/c.txt'], sorted(staged_paths(self.gitrepodir)))
+
+    def test_staged_removal(self):
+        """
+        Removed files are listed.
+        """
+        self.stage_remove(self.gitrepodir, 'a.txt')
+
+        self.assertEqual(['a.txt'], staged_paths(self.gitrepodir))
+
+    def test_not_a_git_repo(self):
+        """
+        Returns None if Git can't list the paths.
+        """
+        self.assertIsNone(staged_paths(mkdtemp()))
@@ -0,0 +1,90 @@
+from tempfile import mkdtemp
+
+from mock import patch
+from git import Repo, Git
+from git.exc import GitCommandError
+
+from jig.tests.testcase import JigTestCase
+from jig.gitutils.notes import (
+    read_note, add_note_line, fetch_notes, push_notes)
+
+
+class TestNotes(JigTestCase):
+
+    """
+    Jig keeps lines of results in Git notes.
+
+    """
+    def setUp(self):
+        super(TestNotes, self).setUp()
+
+        self.gitrepo, self.gitrepodir, _ = self.repo_from_fixture('repo01')
+
+        self.tree = self.gitrepo.head.commit.tree.hexsha
+
+    def test_no_note(self):
+        """
+        An object without a note has no lines.
+        """
+        self.assertEqual([], read_note(self.gitrepo, self.tree))
+
+    def test_add_lines(self):
+        """
+        Lines are added to the note once.
+        """
+        add_note_line(self.gitrepo, self.tree, '{"a": 1}')
+        add_note_line(self.gitrepo, self.tree, '{"b": 2}')
+        add_note_line(self.gitrepo, self.tree, '{"a": 1}')
+
+        self.assertEqual(
+            ['{"a": 1}', '{"b": 2}'], read_note(self.gitrepo, self.tree))
+
+        # Kept apart from other notes
+        self.assertEqual('', self.gitrepo.git.notes('list'))
+
+    def test_share_through_remote(self):
+        """
+        Notes from two clones are merged when they are pushed.
+        """
+        remote = mkdtemp()
+        Repo.init(remote, bare=True)
+
+        other, _, _ = self.repo_from_fixture('repo01')
+
+        self.assertFalse(fetch_notes(self.gitrepo, remote))
+
+        add_note_line(self.gitrepo, self.tree, 'first')
+        add_note_line(other, self.tree, 'second')
+
+        self.assertTrue(push_notes(self.gitrepo, remote))
+        self.assertTrue(push_notes(other, remote))
+
+        self.assertTrue(fetch_notes(self.gitrepo, remote))
+
+        self.assertEqual(
+            ['first', 'second'], read_note(self.gitrepo, self.tree))
+
+    def test_merge_fails(self):
+        """
+        The local notes are kept if the fetched ones can't be merged.
+        """
+        remote = mkdtemp()
+        Repo.init(remote, bare=True)
+
+        other, _, _ = self.repo_from_fixture('repo01')
+        add_note_line(other, self.tree, 'other')
+        push_notes(other, remote)
+
+        add_note_line(self.gitrepo, self.tree, 'local')
+
+        original = Git._call_process
+
+        def call_process(git, method, *args, **kwargs):
+            if method == 'notes':
+                raise GitCommandError('notes', 1)
+            return original(git, method, *args, **kwargs)
+
+        with patch.object(Git, '_call_process', call_process):
+            self.assertFalse(fetch_notes(self.gitrepo, remote))
+
+        self.assertEqual(['local'], read_note(self.gitrepo, self.tree))
@@ -0,0 +1,71 @@
+from jig.tests.testcase import JigTestCase
+from jig.gitutils.branches import parse_rev_range
+from jig.gitutils.patches import patch_ids, changed_paths, has_merges
+
+
+class TestPatchIds(JigTestCase):
+
+    """
+    Commits that make the same change have the same patch-id.
+
+    """
+    def setUp(self):
+        super(TestPatchIds, self).setUp()
+
+        self.gitrepo, self.gitrepodir, _ = self.repo_from_fixture('repo01')
+
+        self.start = self.gitrepo.head.commit
+
+    def _patch_ids(self):
+        return patch_ids(self.gitrepo, parse_rev_range(
+            self.gitrepodir, '{0}..HEAD'.format(self.start.hexsha)))
+
+    def test_copied_commit(self):
+        """
+        The same change made again has the same patch-id.
+        """
+        first = self.commit(self.gitrepodir, 'a.txt', 'a\n')
+
+        self.gitrepo.git.checkout('-b', 'again', self.start.hexsha)
+        self.commit(self.gitrepodir, 'b.txt', 'b\n')
+        copied = self.commit(self.gitrepodir, 'a.txt', 'a\n')
+
+        ids = self._patch_ids()
+
+        self.assertEqual(2, len(ids))
+        self.assertEqual(copied.hexsha, list(ids)[-1])
+
+        self.gitrepo.git.checkout('master')
+
+        self.assertEqual(ids[copied.hexsha], self._patch_ids()[first.hexsha])
+
+    def test_changed_paths(self):
+        """
+        Each commit is compared with its parent.
+        """
+        first = self.commit(self.gitrepodir, 'a.txt', 'a\n')
+        self.commit(self.gitrepodir, 'b.txt', 'b\n')
+        third = self.commit(self.gitrepodir, 'c.txt', 'c\n')
+
+        self.assertEqual(
+            ['a.txt', 'c.txt'],
+            changed_paths(self.gitrepo, [first.hexsha, third.hexsha]))
+        self.assertEqual([], changed_paths(self.gitrepo, []))
+
+    def test_has_merges(self):
+        """
+        Merge commits in the range are found.
+        """
+        rev_range = '{0}..HEAD'.format(self.start.hexsha)
+
+        first = self.commit(self.gitrepodir, 'a.txt', 'a\n')
+
+        self.assertFalse(has_merges(
+            self.gitrepo, parse_rev_range(self.gitrepodir, rev_range)))
+
+        self.gitrepo.git.checkout('-b', 'other', self.start.hexsha)
+        other = self.commit(self.gitrepodir, 'b.txt', 'b\n')
+        self.gitrepo.index.commit('Merge', parent_commits=(other, first))
+
+        self.assertTrue(has_merges(
+            self.gitrepo, parse_rev_range(self.gitrepodir, rev_range)))
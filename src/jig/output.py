@@ -2,10 +2,13 @@
 import sys
 import codecs
 from functools import wraps
-from io import StringIO
+from io import StringIO, TextIOBase
 from contextlib import contextmanager
+from collections import OrderedDict
 
 from jig.exc import ForcedExit
+from jig.conf import OUTPUT_BUFFER_LINES
+
 
 # Message types
 INFO = 'info'
@@ -28,6 +31,27 @@ def strip_paint(payload):
     return payload
 
 
+def plain_data(obj):
+    """
+    Normalize data a plugin returned so it looks like decoded JSON.
+
+    MessagePack can decode strings as bytes and Python plugins may return
+    tuples. This turns tuples into lists and bytes into unicode strings, all
+    the way down, so the results can be collated the same way.
+    """
+    if isinstance(obj, (list, tuple)):
+        return [plain_data(i) for i in obj]
+
+    if isinstance(obj, dict):
+        return dict(
+            (plain_data(k), plain_data(v)) for k, v in obj.items())
+
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', 'replace')
+
+    return obj
+
+
 def lookup_type(strtype):
     """
     Returns the actual type for a string message representation of it.
@@ -84,6 +108,68 @@ def utf8_writer(filelike):
     return codecs.getwriter('utf_8')(filelike)
 
 
+def console_stream(filelike):
+    """
+    A file-like object that unicode strings can be written to.
+
+    Streams that already take text, like :py:data:`sys.stdout`, are used as
+    they are. Anything else is wrapped with :py:func:`utf8_writer`.
+
+    :param file filelike: where the output goes
+    """
+    if isinstance(filelike, TextIOBase):
+        return filelike
+
+    return utf8_writer(filelike)
+
+
+def flush_printer(printer):
+    """
+    Write out what ``printer`` is holding on to, if it is a
+    :py:class:`BufferedPrinter`.
+
+    Call this before waiting for something when what has been printed so far
+    should be seen.
+    """
+    if isinstance(printer, BufferedPrinter):
+        printer.flush()
+
+
+class BufferedPrinter(object):
+
+    """
+    Prints lines to a file-like object a batch at a time.
+
+    Writing each line as it is printed is slow when there are thousands of
+    them. Lines are kept until there are ``size`` of them or
+    :py:meth:`flush` is called.
+
+    """
+    def __init__(self, stream, size=OUTPUT_BUFFER_LINES):
+        self.stream = stream
+        self.size = size
+
+        self._lines = []
+
+    def __call__(self, line):
+        self._lines.append(str(line))
+
+        if len(self._lines) >= self.size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the lines that have been printed so far.
+        """
+        if not self._lines:
+            return
+
+        self.stream.write('\n'.join(self._lines) + '\n')
+        self.stream.flush()
+
+        self._lines = []
+
+
 class Message(object):
 
     """
@@ -167,14 +253,21 @@ class ConsoleView(object):
 
     @contextmanager
     def out(self):
-        try:
-            stdout = utf8_writer(sys.stdout)
-            fo = self._collect['stdout'] if self.collect_output else stdout
+        if self.collect_output:
+            printer = BufferedPrinter(self._collect['stdout'])
+        else:
+            printer = BufferedPrinter(console_stream(sys.stdout))
 
-            yield lambda line: fo.write(str(line) + '\n')
+        try:
+            yield printer
         except Exception as e:
-            stderr = utf8_writer(sys.stderr)
-            fo = self._collect['stderr'] if self.collect_output else stderr
+            # What was printed before the error comes first
+            printer.flush()
+
+            if self.collect_output:
+                fo = self._collect['stderr']
+            else:
+                fo = console_stream(sys.stderr)
             fo.write(str(e) + '\n')
 
             if hasattr(e, 'hint'):
@@ -190,10 +283,14 @@ class ConsoleView(object):
                 sys.exit(retcode)   # pragma: no cover
             else:
                 raise ForcedExit(retcode)
+        finally:
+            printer.flush()
 
     def print_help(self, commands):
         """
         Format and print help for using the console script.
+
+        Where ``commands`` is a list of ``(name, description)`` tuples.
         """
         with self.out() as printer:
             printer('usage: jig [-h] COMMAND')
@@ -204,10 +301,7 @@ class ConsoleView(object):
             printer('')
 
             printer('jig commands:')
-            for command in commands:
-                name = command.__module__.split('.')[-1]
-                description = command.parser.description
-
+            for name, description in commands:
                 printer('  {name:12}{description}'.format(
                     name=name, description=description))
 
@@ -233,7 +327,11 @@ class ResultsCollator(object):
             self, '_line_specific_message',
             self.iterresults(self._line_specific_message))
 
-        self._results = results
+        # Results decoded from JSON or MessagePack, or returned by a Python
+        # plugin, all look the same from here on
+        self._results = OrderedDict(
+            (plugin, (retcode, plain_data(stdout), stderr))
+            for plugin, (retcode, stdout, stderr) in results.items())
         self._plugins = set()
         self._reporters = set()
         self._counts = {INFO: 0, WARN: 0, STOP: 0}
@@ -1,4 +1,4 @@
 from .tools import (
     initializer, set_jigconfig, get_jigconfig, create_plugin,
     available_templates, set_checked_for_updates, last_checked_for_updates)
-from .manager import PluginManager, Plugin
+from .manager import PluginManager, Plugin, PythonPlugin, decode_output
@@ -0,0 +1,560 @@
+"""
+Plugin results cache
+====================
+
+Remembers what the plugins said about the last changes they checked. Running
+``jig runnow`` and then committing the same staged changes only runs the
+plugins once, the second time the results come straight from the cache.
+
+The changes are identified by the trees Git would compare, the ``git
+write-tree`` of the index against ``HEAD``, along with a fingerprint of each
+plugin's files and settings. Changing a plugin or its settings means it runs
+again.
+
+When only some of the files changed since the last run, plugins that report
+on individual files are only given the files that changed. What they said
+about the others is reused.
+
+Checks of a range of commits, like ``jig ci`` runs, can also be recorded in Git
+notes with :py:class:`ResultsNotes`. The notes travel with the repository, so
+a branch, a rebase or another CI agent that ends up at a tree that was
+already checked by the same plugins reuses the results.
+
+:py:class:`CheckedPatches` remembers the patch-ids of the commits that were
+checked. After a rebase, ``jig ci`` only gives the plugins the files changed
+by commits that are really new.
+"""
+import os
+import json
+from hashlib import sha1
+from os import rename, unlink
+from os.path import join, dirname, relpath, exists, abspath, expanduser
+from tempfile import mkstemp
+from collections import OrderedDict
+
+from jig import __version__
+from jig.conf import (
+    CODEC, JIG_DIR_NAME, JIG_RESULTS_CACHE_FILENAME,
+    JIG_CHECKED_PATCHES_FILENAME, JIG_CHECKED_PATCHES_MAX,
+    PLUGIN_DIGESTS_CACHE_DIR)
+from jig.output import ResultsCollator, plain_data, STOP
+
+
+# Bump this if the format of the cache file changes
+RESULTS_CACHE_VERSION = 1
+
+# Bump this if the format of the lines in the Git notes changes
+RESULTS_NOTES_VERSION = 1
+
+# Bump this if the format of the checked patches file changes
+CHECKED_PATCHES_VERSION = 1
+
+# Bump this if the format of the cached directory digests changes
+DIRECTORY_DIGEST_VERSION = 1
+
+# Left out when comparing the files of two plugins
+_IGNORE_DIRECTORIES = ('.git', '__pycache__')
+
+
+def _save(filename, data):
+    """
+    Replace ``filename`` with ``data`` as JSON.
+    """
+    tmp = None
+    try:
+        os.makedirs(dirname(filename), exist_ok=True)
+        fd, tmp = mkstemp(dir=dirname(filename))
+        with open(fd, 'w') as fh:
+            json.dump(data, fh)
+        rename(tmp, filename)
+    except (IOError, OSError, TypeError, ValueError):
+        # Only saves time, it's fine if we can't save it
+        if tmp and exists(tmp):
+            unlink(tmp)
+
+
+def _key(plugin):
+    return '{0}:{1}'.format(plugin.bundle, plugin.name)
+
+
+def plugin_fingerprint(plugin):
+    """
+    Identifies the version of ``plugin`` and its settings.
+
+    Any file in the plugin's directory being changed, added or removed gives
+    a different fingerprint.
+    """
+    digest = sha1()
+
+    digest.update(json.dumps([
+        __version__, plugin.bundle, plugin.name, plugin.path,
+        sorted(plugin.config.items())]).encode('utf-8'))
+
+    for dirpath, dirnames, filenames in os.walk(plugin.path):
+        dirnames[:] = sorted(i for i in dirnames if i != '.git')
+
+        for filename in sorted(filenames):
+            try:
+                stat = os.stat(join(dirpath, filename))
+            except OSError:   # pragma: no cover
+                continue
+
+            digest.update('{0}:{1}:{2}\n'.format(
+                relpath(join(dirpath, filename), plugin.path),
+                stat.st_size, stat.st_mtime_ns).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def digests_cache_dir():
+    """
+    Where directory digests are cached, inside the user's :file:`~/.jig`.
+    """
+    return join(expanduser('~'), JIG_DIR_NAME, PLUGIN_DIGESTS_CACHE_DIR)
+
+
+def _read_digest(filename, signature):
+    # The digest cached in ``filename`` if the files still have ``signature``
+    try:
+        with open(filename, 'r') as fh:
+            cached = json.load(fh)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if not isinstance(cached, dict) or \
+            cached.get('version') != DIRECTORY_DIGEST_VERSION or \
+            cached.get('signature') != signature:
+        return None
+
+    return cached.get('digest')
+
+
+def directory_digest(path):
+    """
+    Identifies the files in ``path`` by their names and contents.
+
+    Reading every file is slow for big plugins. The digest is cached in
+    :py:func:`digests_cache_dir` and the files are only read again when one
+    of them is added, removed or has a different size or modification time.
+    """
+    files = []
+    signature = sha1()
+
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = sorted(
+            i for i in dirnames if i not in _IGNORE_DIRECTORIES)
+
+        for filename in sorted(filenames):
+            if filename.endswith('.pyc'):
+                continue
+
+            full = join(dirpath, filename)
+
+            try:
+                stat = os.stat(full)
+            except OSError:   # pragma: no cover
+                continue
+
+            files.append((relpath(full, path), full))
+            signature.update('{0}:{1}:{2}\n'.format(
+                files[-1][0], stat.st_size, stat.st_mtime_ns).encode(CODEC))
+
+    signature = signature.hexdigest()
+
+    cache_filename = join(
+        digests_cache_dir(),
+        '{0}.json'.format(sha1(abspath(path).encode(CODEC)).hexdigest()))
+
+    cached = _read_digest(cache_filename, signature)
+
+    if cached is not None:
+        return cached
+
+    digest = sha1()
+
+    for name, full in files:
+        try:
+            with open(full, 'rb') as fh:
+                content = fh.read()
+        except (IOError, OSError):   # pragma: no cover
+            continue
+
+        digest.update(name.encode(CODEC) + b'\0')
+        digest.update(sha1(content).digest())
+
+    digest = digest.hexdigest()
+
+    _save(cache_filename, OrderedDict([
+        ('version', DIRECTORY_DIGEST_VERSION),
+        ('signature', signature),
+        ('digest', digest)]))
+
+    return digest
+
+
+def plugin_set_fingerprint(plugins):
+    """
+    Identifies ``plugins`` by their names, settings and files.
+
+    Unlike :py:func:`plugin_fingerprint` it doesn't matter where the plugins
+    are or when their files were written, the same plugins give the same
+    fingerprint in every clone.
+    """
+    return sha1(json.dumps([__version__] + [
+        [plugin.bundle, plugin.name, sorted(plugin.config.items()),
+         directory_digest(plugin.path)]
+        for plugin in plugins]).encode('utf-8')).hexdigest()
+
+
+def file_key(diff):
+    """
+    Identifies the change to one file by its name and the blobs compared.
+    """
+    def hexsha(blob):
+        return blob.hexsha if blob else '-'
+
+    return '{0}:{1}:{2}'.format(
+        diff.b_path or diff.a_path, hexsha(diff.a_blob), hexsha(diff.b_blob))
+
+
+class ResultsCache(object):
+
+    """
+    The results of the last run in a Git repository.
+
+    """
+    def __init__(self, gitrepo):
+        self.filename = join(
+            gitrepo, JIG_DIR_NAME, JIG_RESULTS_CACHE_FILENAME)
+
+        self.data = self._read()
+
+        # Fingerprints worked out during this run, by plugin key
+        self._fingerprints = {}
+
+    def _read(self):
+        try:
+            with open(self.filename, 'r') as fh:
+                data = json.load(fh, object_pairs_hook=OrderedDict)
+        except (IOError, OSError, ValueError):
+            # Never saved or unreadable, start over
+            return OrderedDict()
+
+        if not isinstance(data, dict) or \
+                data.get('version') != RESULTS_CACHE_VERSION:
+            return OrderedDict()
+
+        return data
+
+    def _plugin_fingerprint(self, plugin):
+        key = _key(plugin)
+
+        if key not in self._fingerprints:
+            self._fingerprints[key] = plugin_fingerprint(plugin)
+
+        return self._fingerprints[key]
+
+    def fingerprint(self, trees, plugins):
+        """
+        Identifies a run of ``plugins`` on the changes between ``trees``.
+
+        ``trees`` are the SHA-1s of the Git trees being compared.
+        """
+        digest = sha1()
+
+        for tree in trees:
+            digest.update(tree.encode('utf-8'))
+
+        for plugin in plugins:
+            digest.update('{0}={1}\n'.format(
+                _key(plugin),
+                self._plugin_fingerprint(plugin)).encode('utf-8'))
+
+        return digest.hexdigest()
+
+    def lookup(self, fingerprint, plugins):
+        """
+        The results of a run with the same ``fingerprint``.
+
+        Returns ``None`` if the last run was different or a plugin failed,
+        it may not fail the next time. Otherwise an ordered dictionary of
+        plugin to ``(retcode, data, stderr)``, for the ``plugins`` that ran.
+        """
+        if self.data.get('fingerprint') != fingerprint:
+            return None
+
+        cached = self.data.get('plugins', {})
+
+        results = OrderedDict()
+        for plugin in plugins:
+            if _key(plugin) in cached:
+                results[plugin] = tuple(cached[_key(plugin)]['result'])
+
+        if any(i[0] != 0 for i in results.values()):
+            return None
+
+        return results
+
+    def skipped(self, plugins):
+        """
+        The ``plugins`` that did not run last time, because a plugin in an
+        earlier stage stopped the commit.
+        """
+        skipped = self.data.get('skipped', [])
+
+        return [i for i in plugins if _key(i) in skipped]
+
+    def checked(self, plugin):
+        """
+        What ``plugin`` said about each file in the last run.
+
+        Returns a dictionary of :py:func:`file_key` to the messages for that
+        file. Returns ``None`` if they can't be reused, because the plugin has
+        changed or it did not report on individual files.
+        """
+        cached = self.data.get('plugins', {}).get(_key(plugin))
+
+        if not cached or \
+                cached['fingerprint'] != self._plugin_fingerprint(plugin):
+            return None
+
+        return cached.get('files')
+
+    def unchecked(self, plugin, diffs):
+        """
+        The changes in ``diffs`` to files ``plugin`` has not checked before.
+
+        Returns ``None`` if it has to check all of them, see
+        :py:meth:`checked`.
+        """
+        checked = self.checked(plugin)
+
+        if checked is None:
+            return None
+
+        return [i for i in diffs if file_key(i) not in checked]
+
+    def put_back(self, plugin, result, keys):
+        """
+        Add what ``plugin`` said about the files it checked before to the
+        ``(retcode, data, stderr)`` ``result`` of checking the others.
+
+        ``keys`` maps each :py:func:`file_key` to the name of the file.
+        Returns ``None`` if what it said can't be put back, the plugin has to
+        check all the files again.
+        """
+        checked = self.checked(plugin) or {}
+        retcode, data, stderr = result
+
+        if retcode != 0 or not any(checked.values()):
+            return result
+
+        if not isinstance(data, dict):
+            return None
+
+        data = dict(data)
+        for key, name in keys.items():
+            if checked.get(key):
+                data[name] = checked[key]
+
+        return (retcode, data, stderr)
+
+    def store(self, fingerprint, results, keys, skipped=()):
+        """
+        Replace the cache with the ``results`` of this run.
+
+        ``keys`` maps each :py:func:`file_key` that was checked to the name
+        of the file. ``skipped`` are the plugins that did not run.
+        """
+        plugins = OrderedDict()
+
+        for plugin, (retcode, data, stderr) in results.items():
+            data = plain_data(data)
+
+            files = None
+            if retcode == 0 and isinstance(data, dict):
+                # These can be reused file by file
+                files = OrderedDict(
+                    (key, data.get(name, [])) for key, name in keys.items())
+
+            plugins[_key(plugin)] = OrderedDict([
+                ('fingerprint', self._plugin_fingerprint(plugin)),
+                ('result', [retcode, data, stderr]),
+                ('files', files)])
+
+        self.data = OrderedDict([
+            ('version', RESULTS_CACHE_VERSION),
+            ('fingerprint', fingerprint),
+            ('plugins', plugins),
+            ('skipped', [_key(i) for i in skipped])])
+
+    def save(self):
+        """
+        Write the cache to the :file:`.jig` directory.
+        """
+        _save(self.filename, self.data)
+
+
+class ResultsNotes(object):
+
+    """
+    Results of checking ranges of commits, recorded in Git notes.
+
+    The note is on the tree the range ends at. Each line of it is a JSON
+    object for one check, identified by the tree the range started at and the
+    fingerprint of the plugins that ran. Only a check of the same two trees
+    is reused, skipping single commits that were checked before is left to
+    :py:class:`CheckedPatches`.
+
+    """
+    def __init__(self, repo):
+        self.repo = repo
+
+        # Fingerprints worked out during this run, by plugin keys
+        self._fingerprints = {}
+
+    def _check_key(self, trees, plugins):
+        keys = tuple(_key(i) for i in plugins)
+
+        if keys not in self._fingerprints:
+            self._fingerprints[keys] = plugin_set_fingerprint(plugins)
+
+        return '{0}:{1}'.format(trees[0], self._fingerprints[keys])
+
+    def _read(self, tree):
+        # The checks recorded on ``tree`` by their key
+        from jig.gitutils.notes import read_note
+
+        checks = {}
+        for line in read_note(self.repo, tree):
+            try:
+                check = json.loads(line, object_pairs_hook=OrderedDict)
+            except ValueError:
+                # Somebody else's note
+                continue
+
+            if not isinstance(check, dict) or \
+                    check.get('version') != RESULTS_NOTES_VERSION:
+                continue
+
+            checks[check.get('key')] = check
+
+        return checks
+
+    def lookup(self, trees, plugins):
+        """
+        The results of ``plugins`` checking the changes between ``trees``.
+
+        Returns ``None`` if they have not been checked. Otherwise an ordered
+        dictionary of plugin to ``(retcode, data, stderr)``, for the
+        ``plugins`` that ran.
+        """
+        check = self._read(trees[-1]).get(self._check_key(trees, plugins))
+
+        if check is None:
+            return None
+
+        noted = check['plugins']
+
+        results = OrderedDict()
+        for plugin in plugins:
+            if _key(plugin) in noted:
+                results[plugin] = tuple(noted[_key(plugin)])
+
+        return results
+
+    def store(self, trees, plugins, results):
+        """
+        Record the ``results`` of ``plugins`` checking the changes between
+        ``trees``.
+
+        Nothing is recorded if a plugin failed, it may work the next time.
+        """
+        if any(i[0] != 0 for i in results.values()):
+            return
+
+        from git.exc import GitCommandError
+
+        from jig.gitutils.notes import add_note_line
+
+        check = OrderedDict([
+            ('version', RESULTS_NOTES_VERSION),
+            ('key', self._check_key(trees, plugins)),
+            ('passed', ResultsCollator(results).counts[STOP] == 0),
+            ('plugins', OrderedDict(
+                (_key(plugin), [retcode, plain_data(data), stderr])
+                for plugin, (retcode, data, stderr) in results.items()))])
+
+        try:
+            add_note_line(
+                self.repo, trees[-1], json.dumps(check))
+        except (GitCommandError, TypeError, ValueError):
+            # Only saves time, it's fine if we can't record it
+            pass
+
+
+class CheckedPatches(object):
+
+    """
+    The patch-ids of commits the plugins have already checked.
+
+    Only the patch-ids checked by the current plugins are kept, and only the
+    most recent :data:`jig.conf.JIG_CHECKED_PATCHES_MAX` of them.
+
+    """
+    def __init__(self, gitrepo, plugins):
+        self.filename = join(
+            gitrepo, JIG_DIR_NAME, JIG_CHECKED_PATCHES_FILENAME)
+
+        self.fingerprint = plugin_set_fingerprint(plugins)
+
+        self.patch_ids = self._read()
+
+    def _read(self):
+        try:
+            with open(self.filename, 'r') as fh:
+                data = json.load(fh)
+        except (IOError, OSError, ValueError):
+            return []
+
+        if not isinstance(data, dict) or \
+                data.get('version') != CHECKED_PATCHES_VERSION or \
+                data.get('fingerprint') != self.fingerprint:
+            # Different plugins have not checked anything yet
+            return []
+
+        return list(data.get('patch_ids', []))
+
+    def unchecked(self, patch_ids):
+        """
+        The commits in ``patch_ids`` whose patches have not been checked.
+
+        :param dict patch_ids: patch-ids by commit, like
+            :py:func:`jig.gitutils.patches.patch_ids` returns
+        :rtype: list
+        """
+        checked = set(self.patch_ids)
+
+        return [i for i, j in patch_ids.items() if j not in checked]
+
+    def add(self, patch_ids):
+        """
+        Remember that the ``patch_ids`` have been checked.
+        """
+        checked = set(self.patch_ids)
+
+        for patch_id in patch_ids:
+            if patch_id not in checked:
+                checked.add(patch_id)
+                self.patch_ids.append(patch_id)
+
+        self.patch_ids = self.patch_ids[-JIG_CHECKED_PATCHES_MAX:]
+
+    def save(self):
+        """
+        Write the patch-ids to the :file:`.jig` directory.
+        """
+        _save(self.filename, OrderedDict([
+            ('version', CHECKED_PATCHES_VERSION),
+            ('fingerprint', self.fingerprint),
+            ('patch_ids', self.patch_ids)]))
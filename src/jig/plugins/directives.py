@@ -0,0 +1,163 @@
+# coding=utf-8
+"""
+Docutils support for plugin expectations
+========================================
+
+Plugins document and test themselves with a reStructuredText file. This module
+holds the custom directives used in that file and the machinery to parse it.
+
+Importing docutils is expensive so :py:func:`jig.plugins.testrunner.get_expectations`
+will only import this module when it has to parse an expectation document.
+"""
+from io import StringIO
+from configparser import SafeConfigParser
+
+from docutils import nodes, core, io
+from docutils.parsers.rst import Directive, directives
+
+from jig.exc import ExpectationParsingError
+
+# What docutil nodes signify a structural or sectional break
+DOCUTILS_DIFFERENT_SECTION_NODES = (
+    nodes.Root, nodes.Structural, nodes.Titular)
+
+
+def parse_expectations(input_string):
+    """
+    Parse a .rst document and find the expectations it describes.
+
+    Returns a list of ``(range, settings, output)`` tuples, one for each
+    ``expectation`` directive in the document. The ``settings`` are taken from
+    the closest ``plugin-settings`` directive that comes before the
+    expectation in the same section, or ``None`` if there isn't one.
+
+    :param unicode input_string: the reStructuredText document
+    :rtype: list
+    """
+    warning_stream = StringIO()
+    overrides = {
+        'input_encodings': 'unicode',
+        'warning_stream': warning_stream}
+
+    output, pub = core.publish_programmatically(
+        source_class=io.StringInput, source=input_string,
+        source_path=None,
+        destination_class=io.NullOutput, destination=None,
+        destination_path=None,
+        reader=None, reader_name='standalone',
+        parser=None, parser_name='restructuredtext',
+        writer=None, writer_name='null',
+        settings=None, settings_spec=None,
+        settings_overrides=overrides,
+        config_section=None, enable_exit_status=None)
+
+    if warning_stream.getvalue():
+        raise ExpectationParsingError(warning_stream.getvalue())
+
+    expectations = []
+    settings = None
+
+    # A single pass through the document, remembering the last settings we
+    # saw until a structural element tells us we are in a different section
+    for node in pub.writer.document.traverse():
+        if isinstance(node, plugin_settings_node):
+            settings = node.settings
+        elif isinstance(node, expectations_node):
+            expectations.append((node.range, settings, node.rawsource))
+        elif isinstance(node, DOCUTILS_DIFFERENT_SECTION_NODES):
+            settings = None
+
+    return expectations
+
+
+class plugin_settings_node(nodes.literal_block):
+
+    """
+    Represents a docutils node specific to plugin settings.
+
+    """
+    pass
+
+
+class expectations_node(nodes.literal_block):
+
+    """
+    Represents the desired output from a plugin when tested.
+
+    """
+    pass
+
+
+class PluginSettingsDirective(Directive):
+
+    """
+    Docutils directive for expressing plugin settings.
+
+    Example::
+
+        .. plugin-settings::
+
+            underscore_in_filenames = no
+            capital_letters_in_filenames = no
+    """
+    has_content = True
+    required_arguments = 0
+    optional_arguments = 0
+    final_argument_whitespace = False
+    option_spec = {}
+
+    def run(self):
+        code = '\n'.join(self.content)
+
+        # Use the config parser to get our settings
+        config_fp = StringIO('[settings]\n{0}'.format(code))
+        config = SafeConfigParser()
+        config.readfp(config_fp)
+        node = plugin_settings_node(code, code)
+        node.settings = dict(config.items('settings'))
+        return [node]
+
+
+class ExpectationDirective(Directive):
+
+    """
+    Docutils directive for documenting plugin settings.
+
+    Example::
+
+        .. expectation::
+            :from: 01
+            :to: 02
+
+            ▾  File name checker
+
+            ✓  New file looks OK (matches filename rules)
+    """
+    has_content = True
+    required_arguments = 0
+    optional_arguments = 2
+    final_argument_whitespace = True
+    option_spec = {
+        'from': directives.nonnegative_int,
+        'to': directives.nonnegative_int}
+
+    def run(self):
+        code = '\n'.join(self.content)
+        node = expectations_node(code, code)
+
+        # The from and to are required
+        node.range = (
+            self.options.get('from', None),
+            self.options.get('to', None))
+
+        if not node.range[0] or not node.range[1]:
+            # The range is incomplete
+            self.state_machine.reporter.error(
+                'expectation directive requires '
+                '`to` and `from` arguments')
+
+        return [node]
+
+
+directives.register_directive('plugin-settings', PluginSettingsDirective)
+directives.register_directive('expectation', ExpectationDirective)
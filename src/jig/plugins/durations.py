@@ -0,0 +1,182 @@
+"""
+Plugin duration history
+=======================
+
+Remembers how long each plugin has taken in previous runs so that the next
+run can start the slowest plugins first. When plugins run concurrently this
+keeps the long ones from being left until the end while the other workers sit
+idle.
+
+Durations are kept as an exponentially weighted moving average, both overall
+and by the number of files that changed. A plugin that takes 50ms on a single
+file might take a minute on a thousand.
+
+The most memory each plugin used is kept the same way, so the next run knows
+how much it is likely to need.
+"""
+import json
+from os import rename
+from os.path import join, dirname
+from tempfile import mkstemp
+from collections import OrderedDict
+
+from jig.conf import (
+    JIG_DIR_NAME, JIG_DURATIONS_FILENAME, PLUGIN_DURATIONS_WEIGHT)
+
+
+# Bump this if the format of the durations file changes
+DURATIONS_VERSION = 1
+
+
+def _key(plugin):
+    return '{0}:{1}'.format(plugin.bundle, plugin.name)
+
+
+def _bucket(file_count):
+    """
+    Group changed file counts by powers of two.
+
+    1 file is ``'1'``, 2 or 3 files are ``'2'``, 4 to 7 are ``'4'`` and so on.
+    """
+    if file_count < 1:
+        return '0'
+
+    return str(1 << (int(file_count).bit_length() - 1))
+
+
+def _average(stats, seconds, weight):
+    """
+    Fold ``seconds`` into the moving average kept in the ``stats`` dict.
+    """
+    if stats.get('runs'):
+        stats['average'] = \
+            weight * seconds + (1 - weight) * stats['average']
+    else:
+        stats['average'] = seconds
+
+    stats['last'] = seconds
+    stats['runs'] = stats.get('runs', 0) + 1
+
+
+class PluginDurations(object):
+
+    """
+    How long plugins have taken to run in a Git repository.
+
+    """
+    def __init__(self, gitrepo, weight=PLUGIN_DURATIONS_WEIGHT):
+        """
+        Load the durations recorded for ``gitrepo``.
+
+        ``weight`` is how much the latest run counts towards the average.
+        """
+        self.filename = join(gitrepo, JIG_DIR_NAME, JIG_DURATIONS_FILENAME)
+        self.weight = weight
+
+        self.plugins = self._read()
+
+    def _read(self):
+        try:
+            with open(self.filename, 'r') as fh:
+                data = json.load(fh, object_pairs_hook=OrderedDict)
+        except (IOError, OSError, ValueError):
+            # Never recorded or unreadable, start over
+            return OrderedDict()
+
+        if not isinstance(data, dict) or \
+                data.get('version') != DURATIONS_VERSION:
+            return OrderedDict()
+
+        return data.get('plugins', OrderedDict())
+
+    def save(self):
+        """
+        Write the durations back to the :file:`.jig` directory.
+
+        The file is replaced atomically so that a concurrent run never reads
+        half of it.
+        """
+        data = OrderedDict([
+            ('version', DURATIONS_VERSION),
+            ('plugins', self.plugins)])
+
+        try:
+            fd, tmp = mkstemp(dir=dirname(self.filename))
+            with open(fd, 'w') as fh:
+                json.dump(data, fh, indent=2)
+            rename(tmp, self.filename)
+        except (IOError, OSError):
+            # Only used to schedule plugins, it's fine if we can't save it
+            pass
+
+    def record(self, plugin, seconds, file_count, maxrss=None):
+        """
+        Record that ``plugin`` took ``seconds`` to check ``file_count`` files.
+
+        ``maxrss`` is the most memory it used, in kilobytes, if that's known.
+        """
+        stats = self.plugins.setdefault(_key(plugin), OrderedDict())
+
+        _average(stats, seconds, self.weight)
+
+        if maxrss:
+            memory = stats.get('memory')
+            stats['memory'] = int(
+                self.weight * maxrss + (1 - self.weight) * memory
+                if memory else maxrss)
+
+        by_files = stats.setdefault('files', OrderedDict())
+
+        _average(
+            by_files.setdefault(_bucket(file_count), OrderedDict()),
+            seconds, self.weight)
+
+    def stats(self, plugin):
+        """
+        The recorded stats for ``plugin`` or ``None`` if it's never run.
+
+        This is a dictionary with the ``average``, ``last`` duration and the
+        number of ``runs``. The ``files`` key holds the same for each group of
+        changed file counts.
+        """
+        return self.plugins.get(_key(plugin))
+
+    def memory(self, plugin):
+        """
+        How much memory ``plugin`` is expected to use, in kilobytes.
+
+        Returns ``None`` if that's not known.
+        """
+        return (self.stats(plugin) or {}).get('memory')
+
+    def estimate(self, plugin, file_count):
+        """
+        How long ``plugin`` is expected to take for ``file_count`` files.
+
+        Returns ``None`` if the plugin has never run before.
+        """
+        stats = self.stats(plugin)
+
+        if not stats:
+            return None
+
+        by_files = stats.get('files', {}).get(_bucket(file_count))
+
+        if by_files:
+            return by_files['average']
+
+        return stats['average']
+
+    def longest_first(self, plugins, file_count):
+        """
+        Order ``plugins`` so the ones expected to take longest come first.
+
+        Plugins that have never run before are started first, there is no way
+        to know how long they will take. Otherwise the original order is kept
+        for plugins with the same estimate.
+        """
+        def sort_key(plugin):
+            estimate = self.estimate(plugin, file_count)
+            return (estimate is not None, -(estimate or 0))
+
+        return sorted(plugins, key=sort_key)
@@ -0,0 +1,264 @@
+"""
+Plugin resource limits
+======================
+
+Keeps a plugin from using more than its share of the machine. Each limit can
+be set for every plugin in a repository in the ``[jig]`` section of
+:file:`.jig/plugins.cfg`, by the plugin in its :file:`config.cfg` or for one
+plugin in its own section of :file:`.jig/plugins.cfg`. The last of those wins.
+
+``max_memory``
+    The most address space the plugin's process can have, in bytes or with a
+    ``K``, ``M`` or ``G`` suffix.
+``max_cpu_time``
+    How many seconds of CPU time the process can use before it's killed.
+``max_open_files``
+    How many files the process can have open.
+``nice``
+    How much to lower the process's priority.
+``timeout``
+    How many seconds the plugin can run for. Every process it started is
+    killed along with it.
+
+Each plugin runs in a process group of its own so that stopping it also stops
+anything it started.
+
+The memory the plugins are expected to use, going by the last time they ran,
+is also kept within what the machine has available by
+:py:class:`MemoryBudget`.
+"""
+import os
+import sys
+import json
+from os.path import abspath
+from threading import Condition
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:   # pragma: no cover
+    resource = None
+
+# Options that set the limits, they are not passed on to the plugin
+LIMIT_OPTIONS = (
+    'max_memory', 'max_cpu_time', 'max_open_files', 'nice', 'timeout')
+
+ResourceLimits = namedtuple('ResourceLimits', ' '.join(LIMIT_OPTIONS))
+ResourceLimits.__new__.__defaults__ = (None,) * len(LIMIT_OPTIONS)
+ResourceLimits.__doc__ = """
+The limits for one plugin, ``None`` for each one that is not limited.
+
+``max_memory`` is in bytes and ``max_cpu_time`` and ``timeout`` are in
+seconds.
+"""
+
+_SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(value):
+    """
+    Convert a size like ``512M`` to bytes.
+
+    Raises :py:exc:`ValueError` if it's not a size.
+    """
+    value = str(value).strip().upper()
+
+    if value[-1:] in _SIZE_SUFFIXES:
+        return int(float(value[:-1]) * _SIZE_SUFFIXES[value[-1]])
+
+    return int(value)
+
+
+# How the value of each option is read
+_PARSERS = {
+    'max_memory': parse_size,
+    'max_cpu_time': int,
+    'max_open_files': int,
+    'nice': int,
+    'timeout': float}
+
+
+def read_limits(*sections):
+    """
+    The :py:class:`ResourceLimits` set in ``sections``.
+
+    Each section is a dictionary of options, an option in a later section
+    replaces the same one in an earlier section. Raises :py:exc:`ValueError`
+    if a value can't be understood.
+    """
+    values = {}
+
+    for section in sections:
+        for option in LIMIT_OPTIONS:
+            if section.get(option) not in (None, ''):
+                try:
+                    values[option] = _PARSERS[option](section[option])
+                except ValueError:
+                    raise ValueError('{0} = {1} is not valid'.format(
+                        option, section[option]))
+
+    return ResourceLimits(**values)
+
+
+def _lower(limit, value):
+    """
+    Lower the soft and hard ``limit`` to ``value``.
+    """
+    soft, hard = resource.getrlimit(limit)
+
+    if hard != resource.RLIM_INFINITY:
+        # Only root can raise it
+        value = min(value, hard)
+
+    resource.setrlimit(limit, (value, value))
+
+
+def apply_limits(limits):
+    """
+    Apply ``limits`` to the current process.
+
+    Limits the system won't allow are left as they are, the plugin still
+    runs.
+    """
+    if limits.nice:
+        try:
+            os.nice(limits.nice)
+        except OSError:   # pragma: no cover
+            pass
+
+    if resource is None:   # pragma: no cover
+        return
+
+    for option, limit in (
+            ('max_memory', 'RLIMIT_AS'),
+            ('max_cpu_time', 'RLIMIT_CPU'),
+            ('max_open_files', 'RLIMIT_NOFILE')):
+        value = getattr(limits, option)
+
+        if value is None or not hasattr(resource, limit):
+            continue
+
+        try:
+            _lower(getattr(resource, limit), value)
+        except (ValueError, OSError):   # pragma: no cover
+            pass
+
+
+def limited_command(args, limits):
+    """
+    The command that runs ``args`` with ``limits`` applied.
+
+    Running Python code between fork and exec, in ``preexec_fn``, isn't safe
+    while other threads are running, the child can deadlock. Instead this
+    module is run on its own to apply the limits, it then replaces itself
+    with the plugin. ``args`` is returned as it is if there is nothing to
+    apply.
+    """
+    if not any((limits.max_memory, limits.max_cpu_time,
+                limits.max_open_files, limits.nice)):
+        return list(args)
+
+    # Isolated, nothing from the environment or jig's directory is imported
+    return [
+        sys.executable, '-I', abspath(__file__),
+        json.dumps(limits._asdict())] + list(args)
+
+
+def main(argv):
+    """
+    Apply the limits in ``argv[1]`` and run the command that follows.
+    """
+    apply_limits(ResourceLimits(**json.loads(argv[1])))
+
+    try:
+        os.execv(argv[2], argv[2:])
+    except OSError as e:
+        sys.stderr.write('{0}\n'.format(e))
+        sys.exit(1)
+
+
+def available_memory():
+    """
+    How much memory the machine has available, in kilobytes.
+
+    Returns ``None`` if it can't be found out.
+    """
+    try:
+        with open('/proc/meminfo') as fh:
+            for line in fh:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1])
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * \
+            os.sysconf('SC_PAGE_SIZE') // 1024
+    except (AttributeError, ValueError, OSError):   # pragma: no cover
+        return None
+
+
+def memory_budget(config):
+    """
+    How much memory the plugins running at once can use, in kilobytes.
+
+    This is ``memory_budget`` in the ``[jig]`` section of ``config``, the
+    repository's :file:`.jig/plugins.cfg`, or the memory available right now.
+    Returns ``None`` if there is no limit.
+    """
+    value = config.get('jig', 'memory_budget', fallback=None)
+
+    if value:
+        try:
+            return parse_size(value) // 1024
+        except ValueError:
+            # Not worth stopping for, use what's available
+            pass
+
+    return available_memory()
+
+
+class MemoryBudget(object):
+
+    """
+    Keeps the memory used by the plugins running at once within ``total``.
+
+    ``total`` is in kilobytes, ``None`` means there is no limit. A plugin is
+    only held back while others are running, one plugin that needs more than
+    the whole budget still gets to run on its own.
+
+    """
+    def __init__(self, total):
+        self.total = total
+        self.used = 0
+        self.running = 0
+
+        self._condition = Condition()
+
+    @contextmanager
+    def reserve(self, amount):
+        """
+        Wait until ``amount`` kilobytes are free and hold on to them.
+        """
+        amount = amount or 0
+
+        with self._condition:
+            while self.total is not None and self.running and \
+                    self.used + amount > self.total:
+                self._condition.wait()
+
+            self.used += amount
+            self.running += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.used -= amount
+                self.running -= 1
+                self._condition.notify_all()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,18 +1,490 @@
+import os
+import sys
 import json
+import fcntl
+import signal
+import selectors
+import traceback
+from hashlib import sha1
+from fnmatch import fnmatch
+from importlib import import_module
+from importlib.util import spec_from_file_location, module_from_spec
 from os import listdir
 from os.path import join, isfile, isdir, realpath
+from stat import S_IRUSR
+from tempfile import mkstemp
 from subprocess import Popen, PIPE
+from threading import Lock, Thread
+from time import time, thread_time
 from configparser import SafeConfigParser
 from configparser import Error as ConfigParserError
 from configparser import NoSectionError
+from collections import OrderedDict
 
 from jig.exc import PluginError
-from jig.conf import PLUGIN_CONFIG_FILENAME, PLUGIN_PRE_COMMIT_SCRIPT
+from jig.conf import (
+    CODEC, PLUGIN_CONFIG_FILENAME, PLUGIN_PRE_COMMIT_SCRIPT, PLUGIN_MAX_OUTPUT)
+from jig.timings import Timings, PluginTiming, process_usage
+from jig.plugins.limits import (
+    LIMIT_OPTIONS, ResourceLimits, read_limits, apply_limits,
+    limited_command)
 
-try:
-    from collections import OrderedDict
-except ImportError:   # pragma: no cover
-    from ordereddict import OrderedDict
+
+# GitPython reads blobs through a single git process per repository, only one
+# plugin at a time can be reading the diff
+_encode_lock = Lock()
+
+# Importing Python plugins changes sys.path for a moment
+_import_lock = Lock()
+
+# Run a Python plugin in a forked worker instead of jig's own process
+ISOLATION_FORK = 'fork'
+
+# How a plugin receives the changes, all of it through stdin or just a header
+# that points to a shared file
+PAYLOAD_STDIN = 'stdin'
+PAYLOAD_FILE = 'file'
+
+# Environment variables that tell a plugin where the shared payload is
+PAYLOAD_PATH_ENV = 'JIG_PAYLOAD'
+PAYLOAD_SIZE_ENV = 'JIG_PAYLOAD_SIZE'
+
+# What a plugin's input and output are serialized as
+FORMAT_JSON = 'json'
+FORMAT_MSGPACK = 'msgpack'
+
+# Environment variable that tells a plugin which format jig picked
+FORMAT_ENV = 'JIG_FORMAT'
+
+# What a plugin gets for each changed file, every line with its content or
+# only the ranges of line numbers that changed
+DIFF_LINES = 'lines'
+DIFF_RANGES = 'ranges'
+
+
+def _msgpack():
+    """
+    The ``msgpack`` module, ``None`` if it isn't installed.
+
+    It is imported the first time a plugin asks for MessagePack, commits that
+    don't use it don't pay for the import.
+    """
+    try:
+        import msgpack
+    except ImportError:   # pragma: no cover
+        return None
+
+    return msgpack
+
+
+def negotiate_format(formats):
+    """
+    Pick the format to talk to a plugin in.
+
+    ``formats`` is the comma-separated list from the plugin's config.cfg, in
+    the order the plugin prefers them. MessagePack is only used if the
+    ``msgpack`` package is installed, JSON is always available.
+    """
+    for name in (i.strip().lower() for i in (formats or '').split(',')):
+        if name == FORMAT_MSGPACK and _msgpack() is not None:
+            return FORMAT_MSGPACK
+        if name == FORMAT_JSON:
+            return FORMAT_JSON
+
+    return FORMAT_JSON
+
+
+def plugin_files(git_diff_index, timings=None, diff=DIFF_LINES):
+    """
+    The changed files in ``git_diff_index`` as plain lists and dictionaries.
+
+    With ``diff`` set to ``ranges`` the lines and their content are left out,
+    only the ranges of line numbers that changed are included.
+    """
+    timings = timings or Timings()
+
+    files = []
+    for f in git_diff_index.files(timings=timings):
+        changed = {
+            'type': str(f['type']),
+            'name': str(f['name']),
+            'filename': str(f['filename']),
+            'ranges': f['ranges']}
+
+        if diff != DIFF_RANGES:
+            with timings.phase('describe_diff'):
+                changed['diff'] = [j for j in f['diff']]
+
+        files.append(changed)
+
+    return files
+
+
+def encode_input(data, format=FORMAT_JSON, timings=None, indent=2,
+                 diff=DIFF_LINES):
+    """
+    Serialize ``data`` for a plugin in ``format``.
+
+    Any :py:class:`jig.diffconvert.GitDiffIndex` in ``data`` is converted to
+    the list of changed files, see :py:func:`plugin_files` for ``diff``.
+    """
+    if format == FORMAT_MSGPACK:
+        msgpack = _msgpack()
+
+        return msgpack.packb(
+            data, default=lambda obj: plugin_files(obj, timings, diff),
+            use_bin_type=True)
+
+    return json.dumps(
+        data, indent=indent, cls=PluginDataJSONEncoder,
+        timings=timings, diff=diff).encode(CODEC)
+
+
+def decode_stdout(stdout, format=FORMAT_JSON):
+    """
+    Convert the bytes a plugin wrote to stdout.
+
+    JSON output is returned as a string and parsed later by
+    :py:func:`decode_output`. MessagePack output is unpacked here, if it can't
+    be the plugin probably wrote an error message and it's kept as a string.
+    """
+    if format == FORMAT_MSGPACK:
+        msgpack = _msgpack()
+
+        try:
+            return msgpack.unpackb(stdout, raw=False)
+        except (ValueError, msgpack.UnpackException):
+            return stdout.decode('utf-8', 'replace')
+
+    return stdout.decode('utf-8')
+
+
+class PluginProcess(Popen):
+
+    """
+    A plugin's pre-commit script running in a sub-process.
+
+    Keeps the resource usage of the process once it has finished, in
+    ``rusage``. With several plugins running at once this is the only way to
+    tell which of them used the CPU and memory.
+
+    No more than ``limit`` bytes are kept from stdout or stderr. A plugin that
+    writes more than that to stdout is killed and ``truncated`` is set.
+
+    A plugin still running after ``timeout`` seconds is killed and
+    ``timed_out`` is set. Started with ``start_new_session``, the plugin has a
+    process group of its own and anything it started is killed too.
+
+    When things happened is kept for tracing: ``started`` and ``spawned``
+    around starting the process, ``written`` once all of stdin was sent,
+    ``reading`` and ``read`` for the first and last of stdout and ``exited``.
+
+    """
+    rusage = None
+
+    written = reading = read = exited = None
+
+    # How much to read at a time
+    chunk_size = 64 * 1024
+
+    def __init__(self, args, limit=PLUGIN_MAX_OUTPUT, timeout=None,
+                 **kwargs):
+        self.limit = limit
+        self.timeout = timeout
+        self.truncated = False
+        self.timed_out = False
+
+        # The plugin leads its own process group
+        self._group = kwargs.get('start_new_session', False)
+
+        self.started = time()
+
+        super(PluginProcess, self).__init__(args, **kwargs)
+
+        self.spawned = time()
+
+    def kill(self):
+        """
+        Kill the plugin, and every process it started if it has a group of
+        its own.
+        """
+        if self._group:
+            try:
+                os.killpg(self.pid, signal.SIGKILL)
+                return
+            except OSError:   # pragma: no cover
+                # Already gone
+                pass
+
+        super(PluginProcess, self).kill()
+
+    def _try_wait(self, wait_flags):
+        if not hasattr(os, 'wait4'):   # pragma: no cover
+            return super(PluginProcess, self)._try_wait(wait_flags)
+
+        try:
+            pid, sts, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:   # pragma: no cover
+            return (self.pid, 0)
+
+        if pid:
+            self.rusage = rusage
+
+        return (pid, sts)
+
+    def _feed(self, input):
+        """
+        Write ``input`` to the process and close its stdin.
+        """
+        try:
+            if input:
+                self.stdin.write(input)
+            self.stdin.close()
+        except (IOError, OSError, ValueError):
+            # The plugin exited or closed stdin before reading all of it
+            pass
+
+        self.written = time()
+
+    def communicate(self, input=None):
+        """
+        Send ``input`` and read stdout and stderr until the process exits.
+
+        Returns a tuple of ``(stdout, stderr)`` bytes, neither is longer than
+        ``limit``.
+        """
+        feeder = Thread(target=self._feed, args=(input,))
+        feeder.daemon = True
+        feeder.start()
+
+        output = {self.stdout: [], self.stderr: []}
+        length = {self.stdout: 0, self.stderr: 0}
+
+        deadline = time() + self.timeout if self.timeout else None
+
+        with selectors.DefaultSelector() as selector:
+            for stream in output:
+                selector.register(stream, selectors.EVENT_READ)
+
+            while selector.get_map():
+                remaining = None
+                if deadline is not None:
+                    remaining = max(0, deadline - time())
+
+                ready = selector.select(remaining)
+
+                if not ready and deadline is not None and \
+                        time() >= deadline:
+                    # Taking too long, stop it and anything it started
+                    self.timed_out = True
+                    self.kill()
+                    for key in list(selector.get_map().values()):
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+                    break
+
+                for key, _ in ready:
+                    stream = key.fileobj
+                    chunk = os.read(key.fd, self.chunk_size)
+
+                    if stream is self.stdout:
+                        if self.reading is None:
+                            self.reading = time()
+                        self.read = time()
+
+                    if not chunk:
+                        selector.unregister(stream)
+                        stream.close()
+                        continue
+
+                    # Anything past the limit is thrown away
+                    room = self.limit - length[stream]
+                    output[stream].append(chunk[:room])
+                    length[stream] += len(chunk[:room])
+
+                    if len(chunk) > room and stream is self.stdout:
+                        # The output is useless now, no need to let it
+                        # carry on
+                        self.truncated = True
+                        self.kill()
+                        selector.unregister(stream)
+                        stream.close()
+
+        feeder.join()
+        self.wait()
+
+        self.exited = time()
+
+        return (b''.join(output[self.stdout]), b''.join(output[self.stderr]))
+
+
+class SharedPayload(object):
+
+    """
+    The changes every plugin receives, serialized once and shared.
+
+    Instead of sending the whole JSON document through each plugin's stdin,
+    the ``files`` are written one time to an anonymous shared-memory file
+    (or a temporary file where that is not available). Plugins get the path
+    in the ``JIG_PAYLOAD`` environment variable and can ``mmap`` it.
+
+    The payload is written in ``format`` with the ``diff`` plugins asked for,
+    plugins that asked for something else need a payload of their own.
+
+    The file is sealed or made read-only so one plugin can't change what the
+    others see.
+
+    """
+    def __init__(self, git_diff_index, timings=None, format=FORMAT_JSON,
+                 diff=DIFF_LINES):
+        timings = timings or Timings()
+
+        with _encode_lock, timings.phase('json_encode'):
+            data = encode_input(
+                git_diff_index, format, timings=timings, indent=None,
+                diff=diff)
+
+        self.format = format
+        self.diff = diff
+        self.size = len(data)
+        self.fd = None
+        self.filename = None
+
+        if hasattr(os, 'memfd_create'):
+            self.fd = os.memfd_create(
+                'jig-payload', os.MFD_CLOEXEC | os.MFD_ALLOW_SEALING)
+            self._write(self.fd, data)
+
+            fcntl.fcntl(
+                self.fd, fcntl.F_ADD_SEALS,
+                fcntl.F_SEAL_SEAL | fcntl.F_SEAL_SHRINK |
+                fcntl.F_SEAL_GROW | fcntl.F_SEAL_WRITE)
+
+            # Plugins inherit the descriptor, this is how they open it
+            self.path = '/dev/fd/{0}'.format(self.fd)
+        else:   # pragma: no cover
+            fd, self.filename = mkstemp(prefix='jig-payload-')
+            self._write(fd, data)
+            os.close(fd)
+            os.chmod(self.filename, S_IRUSR)
+
+            self.path = self.filename
+
+    def _write(self, fd, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    @property
+    def pass_fds(self):
+        """
+        File descriptors a plugin process has to inherit.
+        """
+        return (self.fd,) if self.fd is not None else ()
+
+    def environ(self):
+        """
+        The environment for a plugin that reads the shared payload.
+        """
+        env = dict(os.environ)
+        env[PAYLOAD_PATH_ENV] = self.path
+        env[PAYLOAD_SIZE_ENV] = str(self.size)
+        env[FORMAT_ENV] = self.format
+
+        return env
+
+    def header(self, config):
+        """
+        What the plugin receives through stdin instead of the payload.
+        """
+        return encode_input({
+            'config': config,
+            'payload': {
+                'path': self.path,
+                'size': self.size,
+                'format': self.format}}, self.format, indent=None)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+        if self.filename:   # pragma: no cover
+            os.unlink(self.filename)
+            self.filename = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _truncated_message(limit):
+    return (
+        'Error: the plugin wrote more than {0} bytes to stdout and was '
+        'stopped\n'.format(limit))
+
+
+# Parsed plugin config files by filename, with the modification time and size
+# of the file when it was parsed
+_plugin_configs = {}
+_plugin_configs_lock = Lock()
+
+
+def read_plugin_config(filename):
+    """
+    Parse a plugin's :file:`config.cfg`.
+
+    The file is only parsed again if its modification time or size has
+    changed since the last time. Everything that creates a
+    :py:class:`PluginManager` in this process shares the same parser, it
+    should not be changed.
+
+    Raises :py:exc:`configparser.Error` if the file can't be parsed.
+    """
+    stat = os.stat(filename)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _plugin_configs_lock:
+        cached = _plugin_configs.get(filename)
+
+    if cached and cached[0] == version:
+        return cached[1]
+
+    config = SafeConfigParser()
+
+    with open(filename) as fh:
+        config.readfp(fh)   # pragma: no branch
+
+    with _plugin_configs_lock:
+        _plugin_configs[filename] = (version, config)
+
+    return config
+
+
+def _timed_out_message(timeout):
+    return (
+        'The plugin was stopped after running for {0} seconds.\n'.format(
+            timeout))
+
+
+def decode_output(stdout):
+    """
+    Decode what a plugin wrote to stdout.
+
+    Plugins normally write JSON but anything else is kept as a string. Python
+    plugins return their data directly, it's already decoded.
+    """
+    if not isinstance(stdout, str):
+        return stdout
+
+    try:
+        # Is it JSON data?
+        return json.loads(stdout)
+    except ValueError:
+        # Not JSON
+        return stdout
 
 
 class PluginManager(object):
@@ -42,38 +514,102 @@ class PluginManager(object):
         """
         Creates :py:class:`Plugin` instances from ``config``.
         """
-        plugins = []
-        for section_name in config.sections():
-            if not section_name.startswith('plugin:'):
-                # We are only interested in the plugin configs
-                continue
+        return [
+            self._init_plugin(config, section_name)
+            for section_name in config.sections()
+            # We are only interested in the plugin configs
+            if section_name.startswith('plugin:')]
 
-            _, bundle, name = section_name.split(':')
+    def _init_plugin(self, config, section_name):
+        """
+        Creates the :py:class:`Plugin` for one section of ``config``.
+        """
+        # The repository can change the output limit for all of its plugins
+        max_output = config.getint(
+            'jig', 'max_output', fallback=PLUGIN_MAX_OUTPUT)
 
-            path = config.get(section_name, 'path')
+        # And the resource limits
+        jig_section = OrderedDict(
+            config.items('jig') if config.has_section('jig') else [])
 
-            plugin_cfg = join(path, PLUGIN_CONFIG_FILENAME)
+        _, bundle, name = section_name.split(':')
 
-            with open(plugin_cfg) as fh:
-                plugin_config = SafeConfigParser()
-                try:
-                    plugin_config.readfp(fh)   # pragma: no branch
-                except ConfigParserError as cpe:
-                    # Something happened when parsing the config
-                    line = cpe.errors.pop()[0]
-                    raise PluginError(
-                        'Could not parse config file for '
-                        '{0} in {1}, line {2}.'.format(name, path, line))
+        path = config.get(section_name, 'path')
+
+        plugin_cfg = join(path, PLUGIN_CONFIG_FILENAME)
+
+        try:
+            plugin_config = read_plugin_config(plugin_cfg)
+        except ConfigParserError as cpe:
+            # Something happened when parsing the config
+            line = cpe.errors[-1][0]
+            raise PluginError(
+                'Could not parse config file for '
+                '{0} in {1}, line {2}.'.format(name, path, line))
 
-            # Get rid of the path, we don't need to send this as part of the
-            # config for the plugin
-            pc = OrderedDict(config.items(section_name))
-            del pc['path']
+        # Get rid of the path, we don't need to send this as part of the
+        # config for the plugin
+        pc = OrderedDict(config.items(section_name))
+        del pc['path']
 
-            section = Plugin(bundle, name, path, pc)
-            plugins.append(section)
+        # The limits are for jig, not the plugin
+        plugin_limits = OrderedDict(
+            (i, pc.pop(i)) for i in LIMIT_OPTIONS if i in pc)
 
-        return plugins
+        try:
+            limits = read_limits(
+                jig_section, OrderedDict(
+                    plugin_config.items('plugin')
+                    if plugin_config.has_section('plugin') else []),
+                plugin_limits)
+        except ValueError as ve:
+            raise PluginError(
+                'Could not read the limits for {0} in {1}: {2}.'.format(
+                    name, path, ve))
+
+        # And a plugin that knows it's chatty can ask for more
+        plugin_max_output = plugin_config.getint(
+            'plugin', 'max_output', fallback=max_output)
+
+        # Which files the plugin checks, all of them if it doesn't say
+        patterns = tuple(
+            i.strip() for i in plugin_config.get(
+                'plugin', 'files', fallback='').split(',') if i.strip())
+
+        # When the plugin runs and which plugins it runs after
+        stage = plugin_config.getint('plugin', 'stage', fallback=0)
+        requires = tuple(
+            i.strip() for i in plugin_config.get(
+                'plugin', 'requires', fallback='').split(',')
+            if i.strip())
+
+        # Whether copies of the plugin can check some of the files each
+        shardable = plugin_config.getboolean(
+            'plugin', 'shardable', fallback=False)
+
+        if plugin_config.has_option('plugin', 'entry_point'):
+            # Written in Python and runs without a separate script
+            section = PythonPlugin(
+                bundle, name, path, pc,
+                max_output=plugin_max_output, patterns=patterns,
+                limits=limits, stage=stage, requires=requires,
+                shardable=shardable,
+                entry_point=plugin_config.get('plugin', 'entry_point'),
+                isolation=plugin_config.get(
+                    'plugin', 'isolation', fallback=None))
+        else:
+            section = Plugin(
+                bundle, name, path, pc, max_output=plugin_max_output,
+                patterns=patterns, payload=plugin_config.get(
+                    'plugin', 'payload', fallback=PAYLOAD_STDIN),
+                format=negotiate_format(plugin_config.get(
+                    'plugin', 'format', fallback=FORMAT_JSON)),
+                diff=plugin_config.get(
+                    'plugin', 'diff', fallback=DIFF_LINES),
+                limits=limits, stage=stage, requires=requires,
+                shardable=shardable)
+
+        return section
 
     def __iter__(self):
         return iter(self._plugins)
@@ -142,13 +678,10 @@ class PluginManager(object):
             raise PluginError('The plugin file {0} is missing.'.format(
                 config_filename))
 
-        config = SafeConfigParser()
-
-        with open(config_filename, 'r') as fh:
-            try:
-                config.readfp(fh)
-            except ConfigParserError as e:
-                raise PluginError(e)
+        try:
+            config = read_plugin_config(config_filename)
+        except ConfigParserError as e:
+            raise PluginError(e)
 
         try:
             settings = OrderedDict(config.items('settings'))
@@ -184,13 +717,16 @@ class PluginManager(object):
             option, value = setting, settings[setting]
             self.config.set(new_section, option, value)
 
-        # Re-initialize the self.plugins list
-        self._plugins = self._init_plugins(self.config)
+        # Only the new plugin needs creating, the others are unchanged
+        try:
+            plugin = self._init_plugin(self.config, new_section)
+        except PluginError:
+            self.config.remove_section(new_section)
+            raise
 
-        # And return the plugin once we find it
-        for plugin in self._plugins:   # pragma: no branch
-            if plugin.name == name and plugin.bundle == bundle:
-                return plugin
+        self._plugins.append(plugin)
+
+        return plugin
 
     def remove(self, bundle, name):
         """
@@ -208,8 +744,9 @@ class PluginManager(object):
 
         self.config.remove_section(section_name)
 
-        # Again, re-initialize the self.plugins list
-        self._plugins = self._init_plugins(self.config)
+        self._plugins = [
+            i for i in self._plugins
+            if (i.bundle, i.name) != (bundle, name)]
 
 
 class Plugin(object):
@@ -218,7 +755,10 @@ class Plugin(object):
     A single unit that performs some helpful operation for the user.
 
     """
-    def __init__(self, bundle, name, path, config={}, help={}):
+    def __init__(self, bundle, name, path, config={}, help={},
+                 max_output=PLUGIN_MAX_OUTPUT, patterns=(),
+                 payload=PAYLOAD_STDIN, format=FORMAT_JSON, diff=DIFF_LINES,
+                 limits=None, stage=0, requires=(), shardable=False):
         # What bundle is this plugin a part of
         self.bundle = bundle
         # What is the name of this plugin?
@@ -229,8 +769,41 @@ class Plugin(object):
         self.config = config
         # Helpful descriptions of the configurations
         self.help = help
+        # The most output we will read from the plugin, in bytes
+        self.max_output = max_output
+        # How the plugin wants to receive the changes
+        self.payload = payload
+        # What the input and output are serialized as
+        self.format = format
+        # Whether the plugin wants the changed lines or just their ranges
+        self.diff = diff
+        # Shell-style patterns for the files the plugin checks, empty for all
+        self.patterns = patterns
+        # How much of the machine the plugin can use
+        self.limits = limits or ResourceLimits()
+        # Plugins in earlier stages run first, see jig.plugins.pipeline
+        self.stage = stage
+        # Names of the plugins this one runs after
+        self.requires = requires
+        # Whether copies can check some of the files each, see
+        # jig.plugins.shards
+        self.shardable = shardable
+
+    def matches(self, names):
+        """
+        Whether any of the file ``names`` is one this plugin checks.
+
+        ``names`` are paths relative to the Git repository. A plugin with no
+        ``files`` patterns in its config.cfg checks every file.
+        """
+        if not self.patterns:
+            return True
+
+        return any(
+            fnmatch(name, pattern)
+            for name in names for pattern in self.patterns)
 
-    def pre_commit(self, git_diff_index):
+    def pre_commit(self, git_diff_index, timings=None, payload=None):
         """
         Runs the plugin's pre-commit script, passing in the diff.
 
@@ -247,60 +820,387 @@ class Plugin(object):
         The ``diff`` attribute is a list of files and changes that have
         occurred to them.  See :py:module:`jig.diffconvert` for
         information on what this object provides.
+
+        If ``timings`` is a :py:class:`jig.timings.Timings` object, the time
+        and resources this plugin used will be recorded with it.
+
+        Plugins configured with ``payload = file`` receive a small header on
+        stdin instead and read the ``files`` from a :py:class:`SharedPayload`.
+        Pass ``payload`` to share one between plugins, otherwise one is
+        created for this plugin alone.
+
+        Plugins configured with ``format = msgpack`` talk MessagePack instead
+        of JSON, both ways. The data they return has already been unpacked.
+
+        Plugins configured with ``diff = ranges`` only get the ranges of line
+        numbers that changed in each file, not the lines themselves.
         """
-        # Grab this plugin's settings
-        data_in = {
-            'config': self.config,
-            'files': git_diff_index}
+        timings = timings or Timings()
 
-        script = join(self.path, PLUGIN_PRE_COMMIT_SCRIPT)
-        ph = Popen([script], stdin=PIPE, stdout=PIPE, stderr=PIPE)
+        own_payload = None
+
+        if self.payload == PAYLOAD_FILE:
+            if not payload or payload.format != self.format or \
+                    payload.diff != self.diff:
+                payload = own_payload = SharedPayload(
+                    git_diff_index, timings=timings, format=self.format,
+                    diff=self.diff)
+
+            stdin = payload.header(self.config)
+
+            popen_kwargs = {
+                'env': payload.environ(), 'pass_fds': payload.pass_fds}
+        else:
+            # Grab this plugin's settings
+            data_in = {
+                'config': self.config,
+                'files': git_diff_index}
+
+            # Serialize the data we send to the script
+            with _encode_lock, timings.phase('json_encode'):
+                stdin = encode_input(
+                    data_in, self.format, timings=timings, diff=self.diff)
 
-        # Send the data to the script
-        stdin = json.dumps(data_in, indent=2, cls=PluginDataJSONEncoder)
+            env = dict(os.environ)
+            env[FORMAT_ENV] = self.format
+
+            popen_kwargs = {'env': env}
+
+        script = join(self.path, PLUGIN_PRE_COMMIT_SCRIPT)
 
         retcode = None
-        stdout = ''
+        stdout = b''
         stderr = ''
+        rusage = None
 
-        try:
-            stdout, stderr = ph.communicate(stdin)
+        started = time()
 
-            # Convert to unicode
-            stdout = stdout.decode('utf-8')
-            stderr = stderr.decode('utf-8')
-
-            retcode = ph.returncode
+        try:
+            with timings.phase('plugins'):
+                ph = PluginProcess(
+                    limited_command([script], self.limits),
+                    stdin=PIPE, stdout=PIPE, stderr=PIPE,
+                    limit=self.max_output, timeout=self.limits.timeout,
+                    start_new_session=True, **popen_kwargs)
+
+                stdout, stderr = ph.communicate(stdin)
+
+            timings.add_span('spawn', ph.started, ph.spawned)
+            timings.add_span('write', ph.spawned, ph.written)
+            timings.add_span('run', ph.spawned, ph.exited)
+            timings.add_span('read', ph.reading, ph.read)
+
+            rusage = ph.rusage
+
+            stdout_bytes = len(stdout)
+
+            # Convert to unicode, stderr may have been cut off mid-character
+            stderr = stderr.decode('utf-8', 'replace')
+
+            if ph.timed_out:
+                retcode = 1
+                stdout = ''
+                stderr = _timed_out_message(self.limits.timeout) + stderr
+            elif ph.truncated:
+                # Half of a JSON document is no use to anyone
+                retcode = 1
+                stdout = ''
+                stderr = _truncated_message(self.max_output) + stderr
+            else:
+                stdout = decode_stdout(stdout, self.format)
+                retcode = ph.returncode
         except OSError as ose:
             # Generic non-zero retcode that indicates an error
             retcode = 1
+            stdout = ''
+            stdout_bytes = 0
             if ose.errno == 32:
                 stderr = 'Error: received SIGPIPE from the command'
             else:
                 stderr = str(ose)
 
+        wall = time() - started
+        cpu, maxrss = process_usage(rusage)
+
+        if own_payload:
+            own_payload.close()
+
+        timings.add_plugin(self, PluginTiming(
+            wall=wall, cpu=cpu, maxrss=maxrss,
+            stdin_bytes=len(stdin), stdout_bytes=stdout_bytes))
+
         # And return the relevant stuff
         return retcode, stdout, stderr
 
 
+def _import_plugin_module(path, module_name):
+    """
+    Import ``module_name`` for the plugin that lives in ``path``.
+
+    Modules inside the plugin directory are imported under a name of their
+    own so that two plugins can both have a module called ``check``. Anything
+    else is imported normally.
+    """
+    filename = join(path, *module_name.split('.'))
+
+    if isdir(filename):
+        filename = join(filename, '__init__.py')
+    else:
+        filename = filename + '.py'
+
+    if not isfile(filename):
+        return import_module(module_name)
+
+    unique_name = '_jig_plugin_{0}'.format(
+        sha1(filename.encode(CODEC)).hexdigest())
+
+    if unique_name in sys.modules:
+        return sys.modules[unique_name]
+
+    spec = spec_from_file_location(unique_name, filename)
+    module = module_from_spec(spec)
+
+    # Let the module import anything else the plugin comes with
+    sys.path.insert(0, path)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(path)
+
+    sys.modules[unique_name] = module
+
+    return module
+
+
+class PythonPlugin(Plugin):
+
+    """
+    A plugin written in Python that runs inside jig's own process.
+
+    Instead of a pre-commit script the plugin's config.cfg names a function::
+
+        [plugin]
+        bundle = mybundle
+        name = myplugin
+        entry_point = check:run
+
+    The function is called with a :py:class:`jig.diffconvert.GitDiffIndex`
+    and the plugin's config. It returns the same data a pre-commit script
+    would write to stdout as JSON, there is no serialization, pipe or new
+    process.
+
+    With ``isolation = fork`` the function runs in a forked worker so a
+    plugin that crashes or leaks memory can't take jig down with it.
+    Resource limits, ``timeout`` included, apply to the forked worker, a
+    function running in jig's own process can't be limited.
+
+    """
+    def __init__(self, bundle, name, path, config={}, help={},
+                 max_output=PLUGIN_MAX_OUTPUT, patterns=(), entry_point=None,
+                 isolation=None, limits=None, stage=0, requires=(),
+                 shardable=False):
+        super(PythonPlugin, self).__init__(
+            bundle, name, path, config, help, max_output=max_output,
+            patterns=patterns, limits=limits, stage=stage, requires=requires,
+            shardable=shardable)
+
+        # Where to find the function, as module:function
+        self.entry_point = entry_point
+        # How to run the function, in this process or a forked one
+        self.isolation = isolation
+
+        self._function = None
+
+    def load(self):
+        """
+        Import the plugin's entry point function.
+
+        Raises :py:exc:`PluginError` if it can't be found.
+        """
+        if self._function:
+            return self._function
+
+        module_name, _, function_name = self.entry_point.partition(':')
+
+        try:
+            with _import_lock:
+                module = _import_plugin_module(self.path, module_name)
+
+            self._function = getattr(module, function_name)
+        except Exception as e:
+            raise PluginError(
+                'Could not load the entry point {0} for plugin {1}: '
+                '{2}'.format(self.entry_point, self.name, e))
+
+        return self._function
+
+    def _call(self, git_diff_index):
+        """
+        Call the entry point.
+
+        Returns a tuple of ``(retcode, data, stderr)``.
+        """
+        try:
+            data = self.load()(git_diff_index, self.config)
+        except PluginError as pe:
+            return (1, '', str(pe))
+        except Exception:
+            return (1, '', traceback.format_exc())
+
+        if data is None:
+            # Nothing to say
+            data = {}
+
+        return (0, data, '')
+
+    def _call_forked(self, git_diff_index):
+        """
+        Call the entry point in a forked worker.
+
+        Jig forks from one of its worker threads, so the worker must not wait
+        on a lock another thread held at the time. The entry point is
+        imported before forking so the worker never needs the import lock,
+        and a worker that still gets stuck is killed once ``timeout`` runs
+        out like any other plugin.
+
+        Returns a tuple of ``(retcode, data, stderr, stdout_bytes, rusage)``.
+        """
+        try:
+            self.load()
+        except PluginError as pe:
+            return (1, '', str(pe), 0, None)
+
+        read_fd, write_fd = os.pipe()
+
+        pid = os.fork()
+
+        if pid == 0:   # pragma: no cover
+            # This is the worker, send the result back as JSON
+            try:
+                os.close(read_fd)
+                # Anything the plugin starts is killed along with it
+                os.setsid()
+                apply_limits(self.limits)
+                result = self._call(git_diff_index)
+
+                try:
+                    payload = json.dumps(result)
+                except (TypeError, ValueError):
+                    payload = json.dumps(
+                        (1, '', traceback.format_exc()))
+
+                with os.fdopen(write_fd, 'wb') as fh:
+                    fh.write(payload.encode(CODEC))
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+
+        timeout = self.limits.timeout
+        deadline = time() + timeout if timeout else None
+        timed_out = False
+
+        chunks = []
+        received = 0
+        with os.fdopen(read_fd, 'rb', 0) as fh, \
+                selectors.DefaultSelector() as selector:
+            selector.register(fh, selectors.EVENT_READ)
+
+            while received <= self.max_output:
+                wait = None if deadline is None else deadline - time()
+
+                if wait is not None and \
+                        (wait <= 0 or not selector.select(wait)):
+                    timed_out = True
+                    break
+
+                chunk = fh.read(self.max_output + 1 - received)
+                if not chunk:
+                    break
+
+                chunks.append(chunk)
+                received += len(chunk)
+
+        payload = b''.join(chunks)
+
+        if timed_out or len(payload) > self.max_output:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                # Killed before it had a group of its own
+                os.kill(pid, signal.SIGKILL)
+
+        _, status, rusage = os.wait4(pid, 0)
+
+        if timed_out:
+            return (
+                1, '', _timed_out_message(timeout), len(payload), rusage)
+
+        if len(payload) > self.max_output:
+            return (
+                1, '', _truncated_message(self.max_output),
+                len(payload), rusage)
+
+        try:
+            retcode, data, stderr = json.loads(payload.decode(CODEC))
+        except ValueError:
+            # The worker died before it could tell us anything
+            retcode, data, stderr = (
+                1, '', 'The plugin exited unexpectedly with status '
+                '{0}'.format(status))
+
+        return (retcode, data, stderr, len(payload), rusage)
+
+    def pre_commit(self, git_diff_index, timings=None, payload=None):
+        """
+        Call the plugin's entry point with the diff.
+
+        Returns the same ``(retcode, data, stderr)`` as
+        :py:meth:`Plugin.pre_commit` but ``data`` has already been decoded.
+        There is no use for a shared ``payload``, the function gets the diff
+        itself.
+        """
+        timings = timings or Timings()
+
+        # The plugin gets a copy of the diff it can use while other plugins
+        # read theirs
+        with _encode_lock:
+            frozen = git_diff_index.freeze(timings=timings)
+
+        started = time()
+        cpu_started = thread_time()
+
+        with timings.phase('plugins'):
+            if self.isolation == ISOLATION_FORK:
+                retcode, data, stderr, stdout_bytes, rusage = \
+                    self._call_forked(frozen)
+                cpu, maxrss = process_usage(rusage)
+            else:
+                retcode, data, stderr = self._call(frozen)
+                stdout_bytes = 0
+                cpu, maxrss = (thread_time() - cpu_started, 0)
+
+        timings.add_plugin(self, PluginTiming(
+            wall=time() - started, cpu=cpu, maxrss=maxrss,
+            stdin_bytes=0, stdout_bytes=stdout_bytes))
+
+        return retcode, data, stderr
+
+
 class PluginDataJSONEncoder(json.JSONEncoder):
 
     """
     Converts the special data objects used when a plugin runs pre-commit.
 
     """
+    def __init__(self, *args, **kwargs):
+        self.timings = kwargs.pop('timings', None) or Timings()
+        self.diff = kwargs.pop('diff', DIFF_LINES)
+
+        super(PluginDataJSONEncoder, self).__init__(*args, **kwargs)
+
     def default(self, obj):
         """
         Implements JSONEncoder default method.
         """
-        files = [i for i in obj.files()]
-
-        obj = []
-        for f in files:
-            obj.append({
-                'type': str(f['type']),
-                'name': str(f['name']),
-                'filename': str(f['filename']),
-                'diff': [j for j in f['diff']]})
-
-        return obj
+        return plugin_files(obj, timings=self.timings, diff=self.diff)
@@ -0,0 +1,149 @@
+"""
+Plugin stages
+=============
+
+Plugins can say which stage they run in and which other plugins they need to
+run after::
+
+    [plugin]
+    bundle = mybundle
+    name = typecheck
+    stage = 10
+    requires = whitespace, mybundle:filenames
+
+Stages run one after the other, lowest first, and the plugins in a stage run
+at the same time. If any plugin in a stage has a STOP message, the later
+stages don't run at all. Cheap checks go in the early stages so that slow
+ones, type checkers and test runners, are not started for a commit that is
+going to be stopped anyway.
+
+A plugin always runs in a later stage than the plugins it requires and is
+skipped if one of them has a STOP message or fails.
+"""
+from jig.exc import PluginError
+from jig.output import ResultsCollator, STOP
+
+
+def _names(plugin):
+    return (plugin.name, '{0}:{1}'.format(plugin.bundle, plugin.name))
+
+
+def required(plugin, plugins):
+    """
+    The plugins in ``plugins`` that ``plugin`` requires.
+
+    Plugins it requires that are not in ``plugins``, because they are not
+    installed or were not picked to run, are left out.
+    """
+    by_name = {}
+    for other in plugins:
+        for name in _names(other):
+            by_name[name] = other
+
+    return [
+        by_name[i] for i in plugin.requires
+        if i in by_name and by_name[i] is not plugin]
+
+
+def plan_stages(plugins):
+    """
+    Group ``plugins`` into the stages they run in.
+
+    Returns a list of lists of plugins, the earliest stage first. Plugins keep
+    the order they are in ``plugins`` within their stage.
+
+    Raises :py:exc:`PluginError` if plugins require each other.
+    """
+    stages = {}
+    resolving = []
+
+    def resolve(plugin):
+        if plugin in stages:
+            return stages[plugin]
+
+        if plugin in resolving:
+            raise PluginError(
+                'The plugins {0} require each other.'.format(', '.join(
+                    i.name for i in resolving[resolving.index(plugin):])))
+
+        resolving.append(plugin)
+
+        stage = plugin.stage
+        for other in required(plugin, plugins):
+            stage = max(stage, resolve(other) + 1)
+
+        resolving.pop()
+        stages[plugin] = stage
+
+        return stage
+
+    for plugin in plugins:
+        resolve(plugin)
+
+    return [
+        [i for i in plugins if stages[i] == stage]
+        for stage in sorted(set(stages.values()))]
+
+
+def stops(plugin, result):
+    """
+    Whether the ``(retcode, data, stderr)`` ``result`` of ``plugin`` has a
+    STOP message.
+    """
+    return ResultsCollator({plugin: result}).counts[STOP] > 0
+
+
+class Pipeline(object):
+
+    """
+    Keeps track of one run of plugins in stages.
+
+    :py:meth:`stages` gives the plugins that can run in each stage, after the
+    results of the stage before have been passed to :py:meth:`finish`.
+
+    """
+    def __init__(self, plugins):
+        self.plugins = plugins
+        # Results of the plugins that ran, by plugin
+        self.finished = {}
+        # Plugins that did not run because of the ones before them
+        self.skipped = []
+        # Whether a plugin that ran has a STOP message
+        self.stopped = False
+
+    def blocked(self, plugin):
+        """
+        Whether a plugin that ``plugin`` requires did not run, failed or has
+        a STOP message.
+        """
+        for other in required(plugin, self.plugins):
+            if other not in self.finished:
+                return True
+
+            result = self.finished[other]
+
+            if result[0] != 0 or stops(other, result):
+                return True
+
+        return False
+
+    def stages(self):
+        """
+        The plugins that can run in each stage, the earliest stage first.
+
+        Raises :py:exc:`PluginError` if plugins require each other.
+        """
+        for stage in plan_stages(self.plugins):
+            ready = [
+                i for i in stage if not self.stopped and not self.blocked(i)]
+
+            self.skipped.extend(i for i in stage if i not in ready)
+
+            yield ready
+
+    def finish(self, plugin, result):
+        """
+        Record the ``(retcode, data, stderr)`` ``result`` of ``plugin``.
+        """
+        self.finished[plugin] = result
+        self.stopped = self.stopped or stops(plugin, result)
@@ -0,0 +1,247 @@
+"""
+Running plugins
+===============
+
+:py:class:`Scheduler` runs the plugins for one run of jig on the changes in
+a :py:class:`jig.diffconvert.GitDiffIndex`.
+
+The plugins run in stages, see :py:mod:`jig.plugins.pipeline`. Within a stage
+as many run at once as there are jobs, the ones that took longest last time
+first. Shardable plugins are split between copies, see
+:py:mod:`jig.plugins.shards`, and plugins that checked some of the files in
+the last run only check the others.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+
+from jig.plugins.manager import SharedPayload, PAYLOAD_FILE, decode_output
+from jig.plugins.pipeline import Pipeline
+from jig.plugins.shards import plan_shards, merge_results, merge_timings
+from jig.timings import Timings
+
+
+def _track(plugin):
+    return '{0}:{1}'.format(plugin.bundle, plugin.name)
+
+
+class Scheduler(object):
+
+    """
+    Runs plugins on the changes in ``gdi``.
+
+    ``diff`` is the list of changes ``gdi`` was made from. With a
+    :py:class:`jig.plugins.cache.ResultsCache`, ``keys`` maps each
+    :py:func:`jig.plugins.cache.file_key` to the name of the file.
+
+    """
+    def __init__(self, gdi, diff, jobs, timings, durations, budget,
+                 cache=None, keys=None):
+        self.gdi = gdi
+        self.diff = diff
+        # How many plugins can run at the same time
+        self.jobs = jobs
+        # Where the time goes while the plugins run
+        self.timings = timings
+        # How long each plugin took last time and how much memory it used
+        self.durations = durations
+        # Plugins that used a lot of memory last time wait for others to
+        # finish rather than run the machine out of memory
+        self.budget = budget
+        # What the plugins said about the files they checked last time
+        self.cache = cache
+        self.keys = keys
+
+        # Plugins that can read the changes from a shared file all get the
+        # same one, or one for each format and kind of diff they asked for
+        self.payloads = {}
+
+    def unchecked(self, plugin):
+        """
+        The changes ``plugin`` has not checked before, ``None`` for all of
+        them.
+        """
+        if not self.cache:
+            return None
+
+        return self.cache.unchecked(plugin, self.diff)
+
+    def run(self, plugins):
+        """
+        Run ``plugins`` stage by stage.
+
+        Returns the :py:class:`jig.plugins.pipeline.Pipeline` with the
+        results of the plugins that ran and the ones that were skipped.
+        """
+        # Cheap checks run in the early stages, once one of them stops the
+        # commit there is no point running the rest
+        pipeline = Pipeline(plugins)
+
+        try:
+            with self.timings.phase('scheduler'):
+                with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                    for ready in pipeline.stages():
+                        for plugin, result in self._run_stage(
+                                executor, ready):
+                            pipeline.finish(plugin, result)
+        finally:
+            for payload in self.payloads.values():
+                payload.close()
+
+        return pipeline
+
+    def _run_stage(self, executor, plugins):
+        """
+        Run the plugins in one stage at the same time.
+
+        Returns a list of ``(plugin, result)`` for each of them.
+        """
+        # Start the plugins that took longest last time first so they are not
+        # left running on their own at the end
+        scheduled = self.durations.longest_first(plugins, len(self.diff))
+
+        finished = []
+        again = []
+        for plugin, outcomes in self._run_plugins(executor, scheduled):
+            result = self.finish(plugin, outcomes)
+
+            if result is None:
+                again.append(plugin)
+            else:
+                finished.append((plugin, result))
+
+        # What they said before can't be put back, so they check all the
+        # files again, sharded and within the memory budget like any other run
+        for plugin, outcomes in self._run_plugins(
+                executor, again, partial=False):
+            finished.append(
+                (plugin, merge_results([self.decode(i) for i in outcomes])))
+
+        return finished
+
+    def _run_plugins(self, executor, plugins, partial=True):
+        """
+        Run the tasks for each of ``plugins`` on the ``executor``, in order.
+
+        With ``partial`` a plugin only checks the files it has not checked
+        before. Returns a list of ``(plugin, outcomes)``, the output of each
+        of its tasks.
+        """
+        tasks = []
+        for plugin in plugins:
+            files = self.unchecked(plugin) if partial else None
+
+            if files is None:
+                self.share_payload(plugin)
+
+            tasks.extend(self.shard_tasks(plugin, files))
+
+        ran = OrderedDict((i, []) for i in plugins)
+        for task, outcome in zip(tasks, executor.map(self.run_task, tasks)):
+            ran[task[0]].append((task, outcome))
+
+        for plugin, outcomes in ran.items():
+            self._merge_shard_timings(plugin, [i[0][2] for i in outcomes])
+
+        return [(plugin, [i[1] for i in outcomes])
+                for plugin, outcomes in ran.items()]
+
+    def share_payload(self, plugin):
+        """
+        Write the shared payload ``plugin`` reads, unless another plugin
+        asked for the same one.
+        """
+        if plugin.payload != PAYLOAD_FILE:
+            return
+
+        key = (plugin.format, plugin.diff)
+        if key not in self.payloads:
+            self.payloads[key] = SharedPayload(
+                self.gdi, timings=self.timings, format=plugin.format,
+                diff=plugin.diff)
+
+    def shard_tasks(self, plugin, files):
+        """
+        What to run for ``plugin``, a ``(plugin, files, timings, track)``
+        task for each of its shards.
+
+        ``files`` are the changes it has to check, ``None`` for all of them.
+        Shards each keep their own timings and have their own track in a
+        trace.
+        """
+        shards = plan_shards(plugin, files, self.diff, self.jobs)
+
+        if len(shards) == 1:
+            return [(plugin, files, self.timings, _track(plugin))]
+
+        return [
+            (plugin, shard, Timings(trace=self.timings.trace),
+             '{0} shard {1}'.format(_track(plugin), number + 1))
+            for number, shard in enumerate(shards)]
+
+    def run_task(self, task):
+        """
+        Run the plugin in a task from :py:meth:`shard_tasks`.
+
+        Returns what its ``pre_commit`` did, ``None`` if there was nothing
+        left for it to check.
+        """
+        from jig.diffconvert import GitDiffIndex
+
+        plugin, files, timings, track = task
+
+        if files == []:
+            # Every file has been checked before
+            return None
+
+        with self.budget.reserve(self.durations.memory(plugin)), \
+                timings.track(track):
+            if files is not None:
+                return plugin.pre_commit(
+                    GitDiffIndex(self.gdi.gitrepo, files), timings=timings)
+
+            return plugin.pre_commit(
+                self.gdi, timings=timings,
+                payload=self.payloads.get((plugin.format, plugin.diff)))
+
+    def decode(self, ran):
+        """
+        Decode the output of a task, see :py:meth:`run_task`.
+        """
+        if ran is None:
+            return (0, {}, '')
+
+        retcode, stdout, stderr = ran
+
+        with self.timings.phase('json_decode'):
+            return (retcode, decode_output(stdout), stderr)
+
+    def finish(self, plugin, ran):
+        """
+        The ``(retcode, data, stderr)`` result of ``plugin`` from the output
+        of each of its tasks.
+
+        Returns ``None`` if what it said about the files it checked before
+        can't be put back, it has to check all of them again.
+        """
+        result = merge_results([self.decode(i) for i in ran])
+
+        if not self.cache:
+            return result
+
+        # Put back what was said about the files checked before
+        return self.cache.put_back(plugin, result, self.keys)
+
+    def _merge_shard_timings(self, plugin, timings):
+        """
+        Add up the ``timings`` of the shards of ``plugin`` that ran.
+        """
+        if len(timings) < 2:
+            return
+
+        for shard in timings:
+            self.timings.add_phases(shard)
+
+        ran = [i.plugins[plugin] for i in timings if plugin in i.plugins]
+
+        if ran:
+            self.timings.add_plugin(plugin, merge_timings(ran))
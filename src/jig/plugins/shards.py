@@ -0,0 +1,131 @@
+"""
+Sharding plugins
+================
+
+A plugin that checks each file on its own can say so in its
+:file:`config.cfg`::
+
+    [plugin]
+    bundle = mybundle
+    name = myplugin
+    shardable = yes
+
+When a lot of files have changed, jig splits them into shards of roughly the
+same size and runs a copy of the plugin on each shard at the same time. What
+the copies said about each file is put back together before anyone sees it,
+the results look the same as if one copy had checked everything.
+"""
+from jig.conf import PLUGIN_SHARD_MIN_FILES
+from jig.timings import PluginTiming
+
+
+def _size(diff):
+    """
+    Roughly how much work checking the file in ``diff`` is.
+    """
+    blob = diff.b_blob or diff.a_blob
+
+    try:
+        size = blob.size if blob else 0
+    except (AttributeError, ValueError):   # pragma: no cover
+        size = 0
+
+    # Every file costs something, even an empty one
+    return size + 1024
+
+
+def shard_count(file_count, jobs, min_files=PLUGIN_SHARD_MIN_FILES):
+    """
+    How many shards to split ``file_count`` files into.
+
+    There is never more than one shard for each of the ``jobs`` that can run
+    at once, or fewer than ``min_files`` files in a shard.
+    """
+    return max(1, min(jobs, file_count // min_files))
+
+
+def split(diffs, count):
+    """
+    Split ``diffs`` into ``count`` lists of about the same total size.
+
+    The largest files are handed out first, each to the shard with the least
+    in it so far. Each shard keeps the files in their original order.
+    """
+    shards = [[] for _ in range(count)]
+    totals = [0] * count
+
+    sizes = [(_size(i), position) for position, i in enumerate(diffs)]
+
+    for size, position in sorted(sizes, key=lambda i: (-i[0], i[1])):
+        smallest = totals.index(min(totals))
+        shards[smallest].append(position)
+        totals[smallest] += size
+
+    return [[diffs[i] for i in sorted(shard)] for shard in shards if shard]
+
+
+def plan_shards(plugin, files, diffs, jobs):
+    """
+    The files each copy of ``plugin`` checks.
+
+    ``files`` are the changes in ``diffs`` it has to check, ``None`` for all
+    of them. Returns a list with the files for each copy, just ``[files]``
+    if the plugin isn't split.
+    """
+    if not plugin.shardable:
+        return [files]
+
+    checked = list(diffs) if files is None else files
+    count = shard_count(len(checked), jobs)
+
+    if count == 1:
+        return [files]
+
+    return split(checked, count)
+
+
+def merge_results(results):
+    """
+    Put the ``(retcode, data, stderr)`` results of each shard back together.
+
+    If any shard failed, the plugin failed. Otherwise the messages about each
+    file, or about the commit as a whole, from every shard are combined.
+    """
+    if len(results) == 1:
+        return results[0]
+
+    stderr = ''.join(i[2] for i in results)
+
+    failed = [i for i in results if i[0] != 0]
+    if failed:
+        return (failed[0][0], failed[0][1], stderr)
+
+    datas = [i[1] for i in results]
+
+    if all(isinstance(i, dict) for i in datas):
+        merged = {}
+        for data in datas:
+            merged.update(data)
+        return (0, merged, stderr)
+
+    if all(isinstance(i, list) for i in datas):
+        return (0, [j for i in datas for j in i], stderr)
+
+    return (
+        1, '', stderr + 'The shards of the plugin returned different kinds '
+        'of results.\n')
+
+
+def merge_timings(timings):
+    """
+    One :py:class:`jig.timings.PluginTiming` for the shards of a plugin.
+
+    They ran at the same time, so it took as long as the slowest shard. The
+    CPU time and bytes add up.
+    """
+    return PluginTiming(
+        wall=max(i.wall for i in timings),
+        cpu=sum(i.cpu for i in timings),
+        maxrss=max(i.maxrss for i in timings),
+        stdin_bytes=sum(i.stdin_bytes for i in timings),
+        stdout_bytes=sum(i.stdout_bytes for i in timings))
@@ -2,37 +2,29 @@
 import json
 import re
 from codecs import open
-from os.path import join, abspath
-from io import StringIO
-from collections import namedtuple
+from hashlib import sha1
+from os import makedirs, rename, unlink, fdopen, walk
+from os.path import join, abspath, dirname, expanduser, isfile
+from tempfile import mkstemp
+from collections import namedtuple, OrderedDict
 from operator import itemgetter
 from configparser import SafeConfigParser
 
-from docutils import nodes, core, io
-from docutils.parsers.rst import Directive, directives
-
 from jig.exc import (
-    ExpectationNoTests, ExpectationFileNotFound, ExpectationParsingError,
+    ExpectationError, ExpectationNoTests, ExpectationFileNotFound,
     RangeError)
 from jig.conf import (
-    CODEC, PLUGIN_EXPECTATIONS_FILENAME, PLUGIN_TESTS_DIRECTORY)
+    CODEC, JIG_DIR_NAME, PLUGIN_CONFIG_FILENAME, PLUGIN_EXPECTATIONS_FILENAME,
+    PLUGIN_EXPECTATIONS_CACHE_DIR, PLUGIN_TESTS_DIRECTORY)
 from jig.tools import NumberedDirectoriesToGit, cwd_bounce, indent
 from jig.diffconvert import describe_diff
 from jig.formatters.utils import green_bold, red_bold
 from jig.formatters.fancy import FancyFormatter
 from jig.output import ConsoleView, ResultsCollator, strip_paint
-from jig.plugins import PluginManager
+from jig.plugins import PluginManager, decode_output
 from jig.plugins.manager import PluginDataJSONEncoder
 from jig.diffconvert import GitDiffIndex
 
-try:
-    from collections import OrderedDict
-except ImportError:   # pragma: no cover
-    from ordereddict import OrderedDict
-
-# What docutil nodes signify a structural or sectional break
-DOCUTILS_DIFFERENT_SECTION_NODES = (
-    nodes.Root, nodes.Structural, nodes.Titular)
 
 # How wide do we want the columns to be when we report test output
 REPORTER_COLUMN_WIDTH = 80
@@ -48,8 +40,80 @@ RESULTS_SUMMARY_COUNT_RE = re.compile(
 RANGE_RE = re.compile(
     r'^(\d+)\.\.(\d+)$')
 
+# Bump this when the parsing of expectations changes, it invalidates any
+# expectations that have been cached on disk
+EXPECTATIONS_CACHE_VERSION = 1
+
+
+def _expectations_cache_filename(cache_dir, input_string):
+    """
+    Name of the file that caches the expectations parsed from the document.
+
+    The name is a hash of the document's content, so any edit to it will
+    result in a different cache file.
+    """
+    digest = sha1('{0}\n{1}'.format(
+        EXPECTATIONS_CACHE_VERSION, input_string).encode(CODEC)).hexdigest()
+
+    return join(cache_dir, '{0}.json'.format(digest))
+
+
+def _read_expectations_cache(cache_filename):
+    """
+    Read a list of :py:class:`Expectation` from a cache file.
+
+    Returns ``None`` if the cache file is missing or can't be understood.
+    """
+    try:
+        with open(cache_filename, 'r', CODEC) as fh:
+            cached = json.load(fh)
+
+        return [
+            Expectation(range=tuple(r), settings=s, output=o)
+            for r, s, o in cached]
+    except (IOError, OSError, ValueError, TypeError):
+        return None
+
+
+def _write_expectations_cache(cache_filename, expectations):
+    """
+    Save a list of :py:class:`Expectation` to a cache file.
+
+    The cache is only an optimization, failing to write it is not an error.
+    """
+    cache_dir = dirname(cache_filename)
+
+    try:
+        makedirs(cache_dir)
+    except OSError:
+        # Directory may already exist
+        pass
+
+    try:
+        fd, tmp_filename = mkstemp(dir=cache_dir, suffix='.tmp')
+    except OSError:
+        return
+
+    try:
+        # Write to a temporary file and move it into place so that a
+        # concurrent reader will never see a partially written cache
+        with fdopen(fd, 'w') as fh:
+            json.dump([list(i) for i in expectations], fh)
+
+        rename(tmp_filename, cache_filename)
+    except (IOError, OSError):
+        unlink(tmp_filename)
+
+
+def expectations_cache_dir():
+    """
+    Where parsed expectations are cached, inside the user's :file:`~/.jig`.
+    """
+    return join(
+        expanduser('~'), JIG_DIR_NAME, PLUGIN_EXPECTATIONS_CACHE_DIR)
 
-def get_expectations(input_string):
+
+def get_expectations(input_string, cache_dir=None):
     """
     Converts a .rst document into a list of :py:class:`Expectation`.
 
@@ -90,50 +154,32 @@ def get_expectations(input_string):
 
             Ran 1 plugin
                 Info 1 Warn 0 Stop 0
+
+    If ``cache_dir`` is given, the parsed expectations are saved there keyed
+    by the content of ``input_string``. Parsing the same document again will
+    read them back instead of running docutils.
     """
-    warning_stream = StringIO()
-    overrides = {
-        'input_encodings': 'unicode',
-        'warning_stream': warning_stream}
-
-    output, pub = core.publish_programmatically(
-        source_class=io.StringInput, source=input_string,
-        source_path=None,
-        destination_class=io.NullOutput, destination=None,
-        destination_path=None,
-        reader=None, reader_name='standalone',
-        parser=None, parser_name='restructuredtext',
-        writer=None, writer_name='null',
-        settings=None, settings_spec=None,
-        settings_overrides=overrides,
-        config_section=None, enable_exit_status=None)
-
-    if warning_stream.getvalue():
-        raise ExpectationParsingError(warning_stream.getvalue())
-
-    flat_nodes = pub.writer.document.traverse()
-    for i, node in enumerate(flat_nodes):
-        if isinstance(node, expectations_node):
-            # We have an expectation
-            expectation = node
-            settings = None
-
-            # Hunt for settings
-            for hunt_i in range(i - 1, 0, -1):   # pragma: no branch
-                contender = flat_nodes[hunt_i]
-                if isinstance(contender, plugin_settings_node):
-                    # We found a plugin setting in the same area as the
-                    # expectation, let's use this.
-                    settings = contender.settings
-                    break
-                if isinstance(contender, DOCUTILS_DIFFERENT_SECTION_NODES):
-                    # This is a structural element, anything past this is in a
-                    # different section so we will stop.
-                    break
-
-            yield Expectation(
-                range=expectation.range, settings=settings,
-                output=expectation.rawsource)
+    cache_filename = None
+
+    if cache_dir:
+        cache_filename = _expectations_cache_filename(cache_dir, input_string)
+
+        expectations = _read_expectations_cache(cache_filename)
+
+        if expectations is not None:
+            return expectations
+
+    # Docutils is slow to import, only do it when we have to parse
+    from jig.plugins.directives import parse_expectations
+
+    expectations = [
+        Expectation(range=r, settings=s, output=o)
+        for r, s, o in parse_expectations(input_string)]
+
+    if cache_filename:
+        _write_expectations_cache(cache_filename, expectations)
+
+    return expectations
 
 
 def parse_range(range_string):
@@ -268,8 +314,9 @@ class InstrumentedGitDiffIndex(GitDiffIndex):
         # This should be a tuple of (REAL_PATH, REPLACEMENT_PATH)
         self.replace_path = (None, None)
 
-    def files(self):
-        real_files = super(InstrumentedGitDiffIndex, self).files()
+    def files(self, timings=None):
+        real_files = super(InstrumentedGitDiffIndex, self).files(
+            timings=timings)
 
         for f in real_files:
             if all(self.replace_path):
@@ -284,7 +331,14 @@ class PluginTestRunner(object):
     Run tests to verify a plugin functions as expected.
 
     """
-    def __init__(self, plugin_dir):
+    def __init__(self, plugin_dir, cache_dir=None, cache=True):
+        """
+        Load the test timeline and the expectations for the plugin.
+
+        Parsed expectations are cached in ``cache_dir`` which defaults to
+        :py:func:`expectations_cache_dir`. With ``cache`` set to ``False``
+        they are parsed every time and nothing is written.
+        """
         self.plugin_dir = plugin_dir
         self.timeline = None
         self.expectations = None
@@ -307,7 +361,13 @@ class PluginTestRunner(object):
             with open(expect_filename, 'r', CODEC) as fh:
                 expectation_text = fh.read()   # pragma: no branch
 
-            self.expectations = list(get_expectations(expectation_text))
+            if not cache:
+                cache_dir = None
+            elif cache_dir is None:
+                cache_dir = expectations_cache_dir()
+
+            self.expectations = get_expectations(
+                expectation_text, cache_dir=cache_dir)
         except (IOError, OSError):
             raise ExpectationFileNotFound(
                 'Missing expectation file: {0}.'.format(expect_filename))
@@ -359,7 +419,7 @@ class PluginTestRunner(object):
 
             # Get a GitDiffIndex object from
             gdi = InstrumentedGitDiffIndex(
-                self.timeline.repo.working_dir,
+                self.timeline.target,
                 self.timeline.diffs()[exp.range[0] - 1])
 
             # What is the numbered test directory reprsenting our commit?
@@ -370,7 +430,7 @@ class PluginTestRunner(object):
             with cwd_bounce(wd):
                 # Patch up the filename to be within our numbered directory
                 # instead of the Git repository
-                gdi.replace_path = (self.timeline.repo.working_dir, wd)
+                gdi.replace_path = (self.timeline.target, wd)
 
                 # Gather up the input to the plugin for logging
                 stdin = json.dumps({
@@ -383,12 +443,11 @@ class PluginTestRunner(object):
                 # Break apart into its pieces
                 retcode, stdout, stderr = res   # pragma: no branch
 
-            try:
-                # Is it JSON data?
-                data = json.loads(stdout)
-            except ValueError:
-                # Not JSON
-                data = stdout
+            data = decode_output(stdout)
+
+            if not isinstance(stdout, str):
+                # A Python plugin, show what it returned as JSON when verbose
+                stdout = json.dumps(stdout)
 
             if retcode == 0:
                 # Format the results according to what you normally see in the
@@ -530,94 +589,122 @@ class PluginTestReporter(object):
 Expectation = namedtuple('Expectation', 'range settings output')
 
 
-class plugin_settings_node(nodes.literal_block):
+PluginTestRun = namedtuple(
+    'PluginTestRun', 'plugin_dir report passed failed error')
+PluginTestRun.__doc__ = """
+The outcome of running the tests of one plugin.
 
-    """
-    Represents a docutils node specific to plugin settings.
+``report`` is what :py:class:`PluginTestReporter` made of the results.
+``error`` is the reason the tests could not run, ``None`` if they did.
+"""
 
-    """
-    pass
 
+def _is_plugin(directory):
+    return isfile(join(directory, PLUGIN_CONFIG_FILENAME))
 
-class expectations_node(nodes.literal_block):
 
+def _has_expectations(directory):
+    return isfile(join(
+        directory, PLUGIN_TESTS_DIRECTORY, PLUGIN_EXPECTATIONS_FILENAME))
+
+
+def find_plugin_suites(paths):
     """
-    Represents the desired output from a plugin when tested.
+    The plugin directories to test in ``paths``.
 
+    A path that is a plugin is tested even if it has no tests, so that the
+    reason can be reported. Other paths, a bundle of plugins for example, are
+    searched for plugins that have a :file:`tests/expect.rst`.
     """
-    pass
+    found = []
 
+    for path in paths:
+        if _is_plugin(path):
+            found.append(path)
+            continue
 
-class PluginSettingsDirective(Directive):
+        for dirpath, dirnames, filenames in walk(path):
+            dirnames[:] = sorted(
+                i for i in dirnames
+                if i != '.git' and i != PLUGIN_TESTS_DIRECTORY)
 
-    """
-    Docutils directive for expressing plugin settings.
+            if _is_plugin(dirpath) and _has_expectations(dirpath):
+                found.append(dirpath)
+                # Plugins don't have plugins inside them
+                dirnames[:] = []
 
-    Example::
+    return found
 
-        .. plugin-settings::
 
-            underscore_in_filenames = no
-            capital_letters_in_filenames = no
+def run_plugin_suite(plugin_dir, test_range=None, verbose=False,
+                     cache=True):
     """
-    has_content = True
-    required_arguments = 0
-    optional_arguments = 0
-    final_argument_whitespace = False
-    option_spec = {}
+    Run the tests of the plugin in ``plugin_dir``.
 
-    def run(self):
-        code = '\n'.join(self.content)
+    Everything returned can be sent back from another process. Whatever
+    stops the tests from running, a broken :file:`config.cfg` for example,
+    is returned as the error of this plugin so the other plugins being tested
+    with it still get their results.
 
-        # Use the config parser to get our settings
-        config_fp = StringIO('[settings]\n{0}'.format(code))
-        config = SafeConfigParser()
-        config.readfp(config_fp)
-        node = plugin_settings_node(code, code)
-        node.settings = dict(config.items('settings'))
-        return [node]
+    :rtype: PluginTestRun
+    """
+    try:
+        results = PluginTestRunner(plugin_dir, cache=cache).run(
+            test_range=test_range)
+    except ExpectationError as e:
+        return PluginTestRun(plugin_dir, '', 0, 0, str(e))
+    except Exception as e:
+        return PluginTestRun(
+            plugin_dir, '', 0, 0, '{0}: {1}'.format(type(e).__name__, e))
 
+    passed = len([i for i in results if isinstance(i, SuccessResult)])
 
-class ExpectationDirective(Directive):
+    return PluginTestRun(
+        plugin_dir, PluginTestReporter(results).dumps(verbose=verbose),
+        passed, len(results) - passed, None)
+
+
+class PluginSuiteReporter(object):
 
     """
-    Docutils directive for documenting plugin settings.
+    Formats the :py:class:`PluginTestRun` of many plugins into one report.
 
-    Example::
+    """
+    def __init__(self, runs):
+        self.runs = runs
 
-        .. expectation::
-            :from: 01
-            :to: 02
+    def _indent(self, text):
+        return [indent(i) if i else i for i in text.splitlines()]
 
-            ▾  File name checker
+    @property
+    def failed(self):
+        """
+        Whether any of the plugins had a failing test or could not be tested.
+        """
+        return any(i.failed or i.error for i in self.runs)
 
-            ✓  New file looks OK (matches filename rules)
-    """
-    has_content = True
-    required_arguments = 0
-    optional_arguments = 2
-    final_argument_whitespace = True
-    option_spec = {
-        'from': directives.nonnegative_int,
-        'to': directives.nonnegative_int}
-
-    def run(self):
-        code = '\n'.join(self.content)
-        node = expectations_node(code, code)
-
-        # The from and to are required
-        node.range = (
-            self.options.get('from', None),
-            self.options.get('to', None))
-
-        if not node.range[0] or not node.range[1]:
-            # The range is incomplete
-            self.state_machine.reporter.error(
-                'expectation directive requires '
-                '`to` and `from` arguments')
-
-        return [node]
-
-
-directives.register_directive('plugin-settings', PluginSettingsDirective)
-directives.register_directive('expectation', ExpectationDirective)
+    def dumps(self):
+        """
+        Formats the report of each plugin followed by a summary of them all.
+        """
+        out = []
+
+        for run in self.runs:
+            if run.error:
+                out.append(red_bold('{0} Error'.format(run.plugin_dir)))
+                out.append('')
+                out.extend(self._indent(run.error))
+            else:
+                decorator = red_bold if run.failed else green_bold
+                out.append(decorator(run.plugin_dir))
+                out.append('')
+                out.extend(self._indent(run.report))
+
+            out.append('')
+
+        out.append('Plugins {0}, Pass {1}, Fail {2}, Error {3}'.format(
+            len(self.runs), sum(i.passed for i in self.runs),
+            sum(i.failed for i in self.runs),
+            len([i for i in self.runs if i.error])))
+
+        return '\n'.join(out)
@@ -0,0 +1,608 @@
+import sys
+import json
+from os import chmod, stat, utime, listdir
+from os.path import join
+from shutil import copytree
+from tempfile import mkdtemp
+
+from mock import patch
+from git import Repo
+
+from jig.tests.testcase import RunnerTestCase, PluginTestCase
+from jig.runner import Runner
+from jig.plugins import Plugin, PluginManager, set_jigconfig
+from jig.plugins.cache import (
+    ResultsCache, plugin_fingerprint, plugin_set_fingerprint,
+    directory_digest)
+from jig.gitutils.branches import parse_rev_range
+from jig.gitutils.notes import read_note
+
+# Reports every file it's given, along with how many files it was given
+COUNTER_SCRIPT = """#!{0}
+import sys, json
+data = json.load(sys.stdin)
+print(json.dumps(dict(
+    (i['name'], [[None, 'info', 'saw {{0}}'.format(len(data['files']))]])
+    for i in data['files'])))
+"""
+
+
+class FakeBlob(object):
+
+    def __init__(self, hexsha):
+        self.hexsha = hexsha
+
+
+class FakeDiff(object):
+
+    def __init__(self, name, hexsha):
+        self.a_path = self.b_path = name
+        self.a_blob = None
+        self.b_blob = FakeBlob(hexsha)
+
+
+class TestResultsCache(PluginTestCase):
+
+    """
+    Remember what the plugins said about the last changes.
+
+    """
+    def setUp(self):
+        super(TestResultsCache, self).setUp()
+
+        self.plugindir = mkdtemp()
+        with open(join(self.plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = cached\n')
+
+        self.plugin = Plugin('test', 'cached', self.plugindir)
+
+    def test_plugin_fingerprint(self):
+        """
+        Changing the plugin's files or settings changes the fingerprint.
+        """
+        before = plugin_fingerprint(self.plugin)
+
+        self.assertEqual(before, plugin_fingerprint(self.plugin))
+
+        with open(join(self.plugindir, 'pre-commit'), 'w') as fh:
+            fh.write('#!/bin/sh\n')
+
+        self.assertNotEqual(before, plugin_fingerprint(self.plugin))
+
+        changed = Plugin(
+            'test', 'cached', self.plugindir, config={'verbose': 'yes'})
+
+        self.assertNotEqual(
+            plugin_fingerprint(self.plugin), plugin_fingerprint(changed))
+
+    def test_directory_digest(self):
+        """
+        The files are only read again if their size or modification time
+        changed.
+        """
+        filename = join(self.plugindir, 'pre-commit')
+        with open(filename, 'w') as fh:
+            fh.write('#!/bin/sh\n')
+        before = stat(filename)
+
+        original = directory_digest(self.plugindir)
+
+        self.assertEqual(1, len(listdir(self.digests_cache_dir)))
+
+        # Same size and time, the cached digest is used
+        with open(filename, 'w') as fh:
+            fh.write('#!/bin/ch\n')
+        utime(filename, ns=(before.st_atime_ns, before.st_mtime_ns))
+
+        self.assertEqual(original, directory_digest(self.plugindir))
+
+        utime(filename, ns=(before.st_atime_ns, before.st_mtime_ns + 1000))
+
+        self.assertNotEqual(original, directory_digest(self.plugindir))
+
+    def test_lookup(self):
+        """
+        Results are found again with the same fingerprint.
+        """
+        cache = ResultsCache(self.gitrepodir)
+        fingerprint = cache.fingerprint(['a', 'b'], [self.plugin])
+
+        self.assertIsNone(cache.lookup(fingerprint, [self.plugin]))
+
+        cache.store(
+            fingerprint, {self.plugin: (0, {'a.txt': ['A']}, '')},
+            {'a.txt:1:2': 'a.txt'})
+        cache.save()
+
+        cache = ResultsCache(self.gitrepodir)
+
+        self.assertEqual(
+            {self.plugin: (0, {'a.txt': ['A']}, '')},
+            cache.lookup(fingerprint, [self.plugin]))
+        self.assertIsNone(cache.lookup(
+            cache.fingerprint(['a', 'c'], [self.plugin]), [self.plugin]))
+        self.assertEqual({'a.txt:1:2': ['A']}, cache.checked(self.plugin))
+
+    def test_failed_not_reused(self):
+        """
+        A plugin that failed is run again.
+        """
+        cache = ResultsCache(self.gitrepodir)
+        fingerprint = cache.fingerprint(['a', 'b'], [self.plugin])
+
+        cache.store(fingerprint, {self.plugin: (1, '', 'broken')}, {})
+
+        self.assertIsNone(cache.lookup(fingerprint, [self.plugin]))
+
+    def test_skipped(self):
+        """
+        The plugins that did not run are remembered.
+        """
+        cache = ResultsCache(self.gitrepodir)
+
+        self.assertEqual([], cache.skipped([self.plugin]))
+
+        cache.store('x', {}, {}, [self.plugin])
+
+        self.assertEqual([self.plugin], cache.skipped([self.plugin]))
+
+    def test_commit_specific(self):
+        """
+        Messages about the whole commit can't be reused file by file.
+        """
+        cache = ResultsCache(self.gitrepodir)
+
+        cache.store('x', {self.plugin: (0, ['C'], '')}, {'a.txt:1:2': 'a.txt'})
+
+        self.assertIsNone(cache.checked(self.plugin))
+
+    def test_unchecked(self):
+        """
+        Only the changes the plugin has not seen before need checking.
+        """
+        cache = ResultsCache(self.gitrepodir)
+        seen, changed = FakeDiff('a.txt', '1'), FakeDiff('b.txt', '2')
+
+        self.assertIsNone(cache.unchecked(self.plugin, [seen, changed]))
+
+        cache.store(
+            'x', {self.plugin: (0, {}, '')}, {'a.txt:-:1': 'a.txt'})
+
+        self.assertEqual(
+            [changed], cache.unchecked(self.plugin, [seen, changed]))
+
+    def test_put_back(self):
+        """
+        What the plugin said before is added to what it says now.
+        """
+        cache = ResultsCache(self.gitrepodir)
+        keys = {'a.txt:-:1': 'a.txt', 'b.txt:-:2': 'b.txt'}
+
+        cache.store(
+            'x', {self.plugin: (0, {'a.txt': ['A']}, '')},
+            {'a.txt:-:1': 'a.txt'})
+
+        self.assertEqual(
+            (0, {'a.txt': ['A'], 'b.txt': ['B']}, ''),
+            cache.put_back(self.plugin, (0, {'b.txt': ['B']}, ''), keys))
+
+        # A plugin that failed stays failed
+        self.assertEqual(
+            (1, '', 'broken'),
+            cache.put_back(self.plugin, (1, '', 'broken'), keys))
+
+        # Anything but messages about each file has to be checked again
+        self.assertIsNone(cache.put_back(self.plugin, (0, '', ''), keys))
+
+    def test_put_back_nothing_said(self):
+        """
+        There is nothing to put back if the plugin had nothing to say.
+        """
+        cache = ResultsCache(self.gitrepodir)
+
+        cache.store(
+            'x', {self.plugin: (0, {}, '')}, {'a.txt:-:1': 'a.txt'})
+
+        self.assertEqual(
+            (0, '', ''),
+            cache.put_back(self.plugin, (0, '', ''), {}))
+
+    def test_unreadable(self):
+        """
+        A corrupt cache is ignored.
+        """
+        with open(join(self.gitrepodir, '.jig', 'results.json'), 'w') as fh:
+            fh.write('{not json')
+
+        self.assertEqual({}, ResultsCache(self.gitrepodir).data)
+
+
+class TestRunnerCache(RunnerTestCase, PluginTestCase):
+
+    """
+    The runner skips work done in the last run.
+
+    """
+    def setUp(self):
+        super(TestRunnerCache, self).setUp()
+
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = counter\n')
+
+        script = join(plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(COUNTER_SCRIPT.format(sys.executable))
+        chmod(script, 0o755)
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+        set_jigconfig(self.gitrepodir, pm.config)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a\n')
+
+        self.stage(self.gitrepodir, 'a.txt', 'changed a\n')
+        self.stage(self.gitrepodir, 'b.txt', 'b\n')
+
+        self.runner.cache = True
+
+    def _data(self, results):
+        (retcode, data, stderr), = results.values()
+
+        self.assertEqual(0, retcode)
+
+        return data
+
+    def test_same_changes(self):
+        """
+        Nothing runs if the staged changes have not changed.
+        """
+        first = self.runner.results(self.gitrepodir)
+
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            second = self.runner.results(self.gitrepodir)
+
+        self.assertFalse(pre_commit.called)
+        self.assertEqual(self._data(first), self._data(second))
+
+        with open(join(self.gitrepodir, '.jig', 'results.json')) as fh:
+            self.assertIn('fingerprint', json.load(fh))
+
+    def test_failed_runs_again(self):
+        """
+        A plugin that failed last time runs again on the same changes.
+        """
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            pre_commit.return_value = (1, '', 'broken')
+            self.runner.results(self.gitrepodir)
+
+        data = self._data(self.runner.results(self.gitrepodir))
+
+        self.assertEqual(
+            {'a.txt': [[None, 'info', 'saw 2']],
+             'b.txt': [[None, 'info', 'saw 2']]},
+            data)
+
+    def test_some_files_changed(self):
+        """
+        Only the files that changed are checked again.
+        """
+        self.runner.results(self.gitrepodir)
+
+        self.stage(self.gitrepodir, 'b.txt', 'changed b\n')
+
+        data = self._data(self.runner.results(self.gitrepodir))
+
+        self.assertEqual(
+            {'a.txt': [[None, 'info', 'saw 2']],
+             'b.txt': [[None, 'info', 'saw 1']]},
+            data)
+
+    def test_partial_result_not_mergeable(self):
+        """
+        All the files are checked again if what the plugin said about the
+        files that changed can't be merged with what it said before.
+        """
+        self.runner.results(self.gitrepodir)
+
+        self.stage(self.gitrepodir, 'b.txt', 'changed b\n')
+
+        original = Plugin.pre_commit
+        calls = []
+
+        def pre_commit(plugin, *args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                # Nothing at all to say about the file that changed
+                return (0, '', '')
+            return original(plugin, *args, **kwargs)
+
+        with patch.object(Plugin, 'pre_commit', pre_commit):
+            data = self._data(self.runner.results(self.gitrepodir))
+
+        self.assertEqual(2, len(calls))
+        self.assertEqual(
+            {'a.txt': [[None, 'info', 'saw 2']],
+             'b.txt': [[None, 'info', 'saw 2']]},
+            data)
+
+    def test_cached_results(self):
+        """
+        The cache is looked up by the trees being compared.
+        """
+        self.runner.repo = Repo(self.gitrepodir)
+        plugins = PluginManager(self.jigconfig).plugins
+
+        cache, fingerprint, cached = self.runner._cached_results(
+            self.gitrepodir, None, plugins)
+
+        self.assertIsNotNone(fingerprint)
+        self.assertIsNone(cached)
+
+        cache.store(fingerprint, {plugins[0]: (0, {}, '')}, {})
+        cache.save()
+
+        cache, fingerprint, cached = self.runner._cached_results(
+            self.gitrepodir, None, plugins)
+
+        self.assertEqual({plugins[0]: (0, {}, '')}, cached)
+
+    def test_off_by_default(self):
+        """
+        Only the hook and runnow ask for the cache.
+        """
+        self.assertFalse(Runner().cache)
+
+    def test_no_cache(self):
+        """
+        The cache can be turned off.
+        """
+        self.runner.results(self.gitrepodir)
+
+        self.runner.cache = False
+
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            pre_commit.return_value = (0, '{}', '')
+            self.runner.results(self.gitrepodir)
+
+        self.assertTrue(pre_commit.called)
+
+
+class TestResultsNotes(RunnerTestCase, PluginTestCase):
+
+    """
+    Results of checking ranges of commits are kept in Git notes.
+
+    """
+    def setUp(self):
+        super(TestResultsNotes, self).setUp()
+
+        self.plugindir = mkdtemp()
+
+        with open(join(self.plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = counter\n')
+
+        script = join(self.plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(COUNTER_SCRIPT.format(sys.executable))
+        chmod(script, 0o755)
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(self.plugindir)
+        set_jigconfig(self.gitrepodir, pm.config)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a\n')
+        self.start = self.commit(self.gitrepodir, 'b.txt', 'b\n')
+
+        self.runner.cache = False
+        self.runner.notes = True
+
+    def _results(self):
+        rev_range = parse_rev_range(
+            self.gitrepodir, '{0}..HEAD'.format(self.start.hexsha))
+
+        return self.runner.results(self.gitrepodir, rev_range=rev_range)
+
+    def test_plugin_set_fingerprint(self):
+        """
+        The same plugins anywhere have the same fingerprint.
+        """
+        copied = join(mkdtemp(), 'copied')
+        copytree(self.plugindir, copied)
+
+        original = plugin_set_fingerprint(
+            [Plugin('test', 'counter', self.plugindir)])
+
+        self.assertEqual(original, plugin_set_fingerprint(
+            [Plugin('test', 'counter', copied)]))
+        self.assertNotEqual(original, plugin_set_fingerprint(
+            [Plugin('test', 'counter', copied, config={'verbose': 'yes'})]))
+
+    def test_reused_on_another_branch(self):
+        """
+        A branch that ends at a tree already checked isn't checked again.
+        """
+        self.commit(self.gitrepodir, 'c.txt', 'c\n')
+
+        first = self._results()
+
+        # The same change made again on a new branch
+        repo = self.runner.repo
+        repo.git.checkout('-b', 'again', self.start.hexsha)
+        self.commit(self.gitrepodir, 'c.txt', 'c\n')
+
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            second = self._results()
+
+        self.assertFalse(pre_commit.called)
+        self.assertEqual(list(first.values()), list(second.values()))
+
+        check = json.loads(read_note(repo, repo.head.commit.tree.hexsha)[0])
+
+        self.assertTrue(check['passed'])
+
+    def test_noted_results(self):
+        """
+        The notes are looked up by the trees the range compares.
+        """
+        self.commit(self.gitrepodir, 'c.txt', 'c\n')
+        self._results()
+
+        repo = self.runner.repo
+        rev_range = parse_rev_range(
+            self.gitrepodir, '{0}..HEAD'.format(self.start.hexsha))
+        plugins = PluginManager(self.jigconfig).plugins
+
+        notes, trees, noted = self.runner._noted_results(rev_range, plugins)
+
+        self.assertEqual(
+            [self.start.tree.hexsha, repo.head.commit.tree.hexsha], trees)
+        self.assertEqual([plugins[0]], list(noted))
+
+    def test_failed_not_recorded(self):
+        """
+        A plugin that failed is run again next time.
+        """
+        self.commit(self.gitrepodir, 'c.txt', 'c\n')
+
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            pre_commit.return_value = (1, '', 'broken')
+            self._results()
+
+        repo = self.runner.repo
+
+        self.assertEqual([], read_note(repo, repo.head.commit.tree.hexsha))
+
+
+class TestRunnerPatches(RunnerTestCase, PluginTestCase):
+
+    """
+    Rebased copies of commits already checked are left out.
+
+    """
+    def setUp(self):
+        super(TestRunnerPatches, self).setUp()
+
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = counter\n')
+
+        script = join(plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(COUNTER_SCRIPT.format(sys.executable))
+        chmod(script, 0o755)
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+        set_jigconfig(self.gitrepodir, pm.config)
+
+        self.start = self.commit(self.gitrepodir, 'a.txt', 'a\n')
+        self.commit(self.gitrepodir, 'b.txt', 'b\n')
+        self.commit(self.gitrepodir, 'c.txt', 'c\n')
+
+        self.runner.cache = False
+        self.runner.patches = True
+
+    def _results(self):
+        rev_range = parse_rev_range(
+            self.gitrepodir, '{0}..HEAD'.format(self.start.hexsha))
+
+        return self.runner.results(self.gitrepodir, rev_range=rev_range)
+
+    def _rebase(self):
+        # The same commits made again on top of another one
+        self.runner.repo.git.checkout('-b', 'rebased', self.start.hexsha)
+        self.commit(self.gitrepodir, 'd.txt', 'd\n')
+        self.commit(self.gitrepodir, 'b.txt', 'b\n')
+        self.commit(self.gitrepodir, 'c.txt', 'c\n')
+
+    def test_only_new_commits(self):
+        """
+        Only the files changed by new commits are checked.
+        """
+        self._results()
+        self._rebase()
+
+        (retcode, data, stderr), = self._results().values()
+
+        self.assertEqual({'d.txt': [[None, 'info', 'saw 1']]}, data)
+
+    def test_all_checked(self):
+        """
+        Nothing runs if every commit was checked before.
+        """
+        self._results()
+
+        self.runner.repo.git.checkout('-b', 'same', 'HEAD')
+
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            self.assertIsNone(self._results())
+
+        self.assertFalse(pre_commit.called)
+        self.assertIn('Every commit in the range has been checked before',
+            self.output)
+
+    def test_problems_checked_again(self):
+        """
+        Commits with problems are checked again the next time.
+        """
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            pre_commit.return_value = (
+                0, '{"b.txt": [[null, "stop", "x"]]}', '')
+            self._results()
+
+        (retcode, data, stderr), = self._results().values()
+
+        self.assertEqual(['b.txt', 'c.txt'], sorted(data))
+
+    def test_new_commit_paths(self):
+        """
+        The files changed by commits that were not checked before.
+        """
+        def new_commit_paths():
+            rev_range = parse_rev_range(
+                self.gitrepodir, '{0}..HEAD'.format(self.start.hexsha))
+
+            return self.runner._new_commit_paths(
+                self.gitrepodir, rev_range,
+                PluginManager(self.jigconfig).plugins)[2]
+
+        self.runner.repo = Repo(self.gitrepodir)
+
+        self.assertIsNone(new_commit_paths())
+
+        self._results()
+
+        self.assertEqual([], new_commit_paths())
+
+        self._rebase()
+
+        self.assertEqual(['d.txt'], new_commit_paths())
+
+    def test_merges_check_everything(self):
+        """
+        Every file is checked if there are merges in the range.
+        """
+        self._results()
+        self._rebase()
+
+        self.runner.repo.git.merge('--no-edit', 'master')
+
+        (retcode, data, stderr), = self._results().values()
+
+        self.assertEqual(['b.txt', 'c.txt', 'd.txt'], sorted(data))
+
+    def test_all_commits(self):
+        """
+        Every commit is checked if patches are not compared.
+        """
+        self._results()
+        self._rebase()
+
+        self.runner.patches = False
+
+        (retcode, data, stderr), = self._results().values()
+
+        self.assertEqual(['b.txt', 'c.txt', 'd.txt'], sorted(data))
@@ -0,0 +1,102 @@
+import json
+from os import mkdir
+from os.path import join
+from tempfile import mkdtemp
+
+from jig.tests.testcase import JigTestCase
+from jig.plugins import Plugin
+from jig.plugins.durations import PluginDurations
+
+
+class TestPluginDurations(JigTestCase):
+
+    """
+    Remember how long plugins take to run.
+
+    """
+    def setUp(self):
+        super(TestPluginDurations, self).setUp()
+
+        self.gitrepo = mkdtemp()
+        mkdir(join(self.gitrepo, '.jig'))
+
+        self.fast = Plugin('test', 'fast', self.gitrepo)
+        self.slow = Plugin('test', 'slow', self.gitrepo)
+        self.new = Plugin('test', 'new', self.gitrepo)
+
+    def test_never_recorded(self):
+        """
+        A plugin that has not run has no stats or estimate.
+        """
+        durations = PluginDurations(self.gitrepo)
+
+        self.assertIsNone(durations.stats(self.fast))
+        self.assertIsNone(durations.estimate(self.fast, 1))
+
+    def test_moving_average(self):
+        """
+        Later runs are folded into the average with a weight.
+        """
+        durations = PluginDurations(self.gitrepo, weight=0.5)
+
+        durations.record(self.fast, 1.0, 1)
+        durations.record(self.fast, 3.0, 1)
+
+        stats = durations.stats(self.fast)
+
+        self.assertEqual(2.0, stats['average'])
+        self.assertEqual(3.0, stats['last'])
+        self.assertEqual(2, stats['runs'])
+
+    def test_by_changed_files(self):
+        """
+        Estimates are kept separately for different numbers of changed files.
+        """
+        durations = PluginDurations(self.gitrepo, weight=0.5)
+
+        durations.record(self.fast, 1.0, 1)
+        durations.record(self.fast, 9.0, 1000)
+
+        self.assertEqual(1.0, durations.estimate(self.fast, 1))
+        self.assertEqual(9.0, durations.estimate(self.fast, 1000))
+        self.assertEqual(9.0, durations.estimate(self.fast, 600))
+        # Nothing recorded for this many files, use the overall average
+        self.assertEqual(5.0, durations.estimate(self.fast, 10))
+
+    def test_longest_first(self):
+        """
+        Plugins are ordered by how long they are expected to take.
+        """
+        durations = PluginDurations(self.gitrepo)
+
+        durations.record(self.fast, 0.1, 2)
+        durations.record(self.slow, 5.0, 2)
+
+        self.assertEqual(
+            [self.new, self.slow, self.fast],
+            durations.longest_first([self.fast, self.slow, self.new], 2))
+
+    def test_save(self):
+        """
+        Durations are saved in the .jig directory and read back.
+        """
+        durations = PluginDurations(self.gitrepo)
+        durations.record(self.slow, 5.0, 2)
+        durations.save()
+
+        with open(join(self.gitrepo, '.jig', 'durations.json')) as fh:
+            self.assertIn('test:slow', json.load(fh)['plugins'])
+
+        self.assertEqual(
+            5.0, PluginDurations(self.gitrepo).estimate(self.slow, 2))
+
+    def test_unreadable(self):
+        """
+        A corrupt durations file is ignored.
+        """
+        with open(join(self.gitrepo, '.jig', 'durations.json'), 'w') as fh:
+            fh.write('{not json')
+
+        durations = PluginDurations(self.gitrepo)
+
+        self.assertEqual({}, durations.plugins)
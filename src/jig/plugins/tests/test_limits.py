@@ -0,0 +1,291 @@
+# coding=utf-8
+import os
+import sys
+import json
+import errno
+from os import chmod
+from os.path import join
+from subprocess import PIPE
+from tempfile import mkdtemp
+from threading import Thread
+from time import sleep, time
+
+from jig.tests.testcase import JigTestCase, PluginTestCase
+from jig.exc import PluginError
+from jig.plugins import PluginManager
+from jig.plugins.durations import PluginDurations
+from jig.plugins.manager import PluginProcess
+from jig.plugins.limits import (
+    ResourceLimits, MemoryBudget, parse_size, read_limits, memory_budget,
+    limited_command)
+
+# Reports the limits it was started with
+LIMITS_SCRIPT = """#!{0}
+import os, sys, json, resource
+sys.stdin.read()
+print(json.dumps({{
+    'as': resource.getrlimit(resource.RLIMIT_AS)[0],
+    'cpu': resource.getrlimit(resource.RLIMIT_CPU)[0],
+    'files': resource.getrlimit(resource.RLIMIT_NOFILE)[0],
+    'nice': os.nice(0),
+    'group': os.getpgid(0) == os.getpid()}}))
+"""
+
+
+class TestReadLimits(JigTestCase):
+
+    """
+    Limits are read from the config files.
+
+    """
+    def test_parse_size(self):
+        """
+        Sizes can have a suffix.
+        """
+        self.assertEqual(100, parse_size('100'))
+        self.assertEqual(2048, parse_size('2k'))
+        self.assertEqual(512 * 1024 * 1024, parse_size(' 512M '))
+        self.assertEqual(1024 ** 3 // 2, parse_size('0.5G'))
+
+        with self.assertRaises(ValueError):
+            parse_size('lots')
+
+    def test_later_sections_win(self):
+        """
+        Each section overrides the ones before.
+        """
+        limits = read_limits(
+            {'max_memory': '1G', 'nice': '5'},
+            {'max_memory': '256M', 'timeout': '2.5'},
+            {'nice': '10', 'max_open_files': ''})
+
+        self.assertEqual(
+            ResourceLimits(
+                max_memory=256 * 1024 * 1024, nice=10, timeout=2.5),
+            limits)
+
+    def test_invalid(self):
+        """
+        A value that isn't a number is an error.
+        """
+        with self.assertRaises(ValueError):
+            read_limits({'max_cpu_time': 'forever'})
+
+    def test_memory_budget(self):
+        """
+        The budget is set in the repository or what's available.
+        """
+        from configparser import ConfigParser
+
+        config = ConfigParser()
+
+        self.assertTrue(memory_budget(config))
+
+        config.add_section('jig')
+        config.set('jig', 'memory_budget', '2G')
+
+        self.assertEqual(2 * 1024 * 1024, memory_budget(config))
+
+
+class TestPluginLimits(PluginTestCase):
+
+    """
+    Plugins run within their limits.
+
+    """
+    def setUp(self):
+        super(TestPluginLimits, self).setUp()
+
+        repo, working_dir, diffs = self.repo_from_fixture('repo01')
+
+        self.testrepodir = working_dir
+        self.gdi = self.git_diff_index(repo, diffs[0])
+
+    def _plugin(self, settings=''):
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = limited\n' + settings)
+
+        script = join(plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(LIMITS_SCRIPT.format(sys.executable))
+        chmod(script, 0o755)
+
+        return plugindir
+
+    def test_limits_applied(self):
+        """
+        The plugin's process is limited.
+        """
+        self.jigconfig.set('jig', 'nice', '3')
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(self._plugin(
+            'max_memory = 2G\nmax_cpu_time = 60\nmax_open_files = 64\n'))
+
+        section = 'plugin:test:limited'
+        self.jigconfig.set(section, 'max_open_files', '32')
+
+        plugin = PluginManager(self.jigconfig).plugins[0]
+
+        # Not passed on to the plugin as a setting
+        self.assertNotIn('max_open_files', plugin.config)
+
+        retcode, stdout, stderr = plugin.pre_commit(self.gdi)
+
+        self.assertEqual(0, retcode, stderr)
+
+        started = json.loads(stdout)
+
+        self.assertEqual(2 * 1024 ** 3, started['as'])
+        self.assertEqual(60, started['cpu'])
+        self.assertEqual(32, started['files'])
+        self.assertEqual(os.nice(0) + 3, started['nice'])
+        self.assertTrue(started['group'])
+
+    def test_without_limits(self):
+        """
+        Without limits the plugin is run directly.
+        """
+        limits = ResourceLimits(None, None, None, 0, None)
+
+        self.assertEqual(
+            ['pre-commit'], limited_command(['pre-commit'], limits))
+
+    def test_limited_missing_script(self):
+        """
+        A limited plugin that can't be started reports why.
+        """
+        plugindir = self._plugin('max_cpu_time = 60\n')
+        os.unlink(join(plugindir, 'pre-commit'))
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+
+        retcode, stdout, stderr = pm.plugins[0].pre_commit(self.gdi)
+
+        self.assertEqual(1, retcode)
+        self.assertIn('No such file or directory', stderr)
+
+    def test_invalid_limit(self):
+        """
+        A limit that can't be read is a plugin error.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        with self.assertRaises(PluginError):
+            pm.add(self._plugin('max_memory = plenty\n'))
+
+    def test_timeout(self):
+        """
+        A plugin that runs too long is stopped.
+        """
+        plugindir = self._plugin('timeout = 0.5\n')
+
+        with open(join(plugindir, 'pre-commit'), 'w') as fh:
+            fh.write('#!/bin/sh\ncat > /dev/null\nsleep 30\n')
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+
+        started = time()
+        retcode, stdout, stderr = pm.plugins[0].pre_commit(self.gdi)
+
+        self.assertLess(time() - started, 10)
+        self.assertEqual(1, retcode)
+        self.assertIn('stopped after running for 0.5 seconds', stderr)
+
+    def test_timeout_kills_group(self):
+        """
+        Everything the plugin started is stopped with it.
+        """
+        pidfile = join(mkdtemp(), 'pid')
+
+        ph = PluginProcess(
+            ['sh', '-c', 'sleep 30 & echo $! > {0}; wait'.format(pidfile)],
+            stdin=PIPE, stdout=PIPE, stderr=PIPE, timeout=0.5,
+            start_new_session=True)
+
+        ph.communicate()
+
+        self.assertTrue(ph.timed_out)
+
+        with open(pidfile) as fh:
+            pid = int(fh.read())
+
+        # Give the kernel a moment to reap it
+        for _ in range(50):
+            try:
+                os.kill(pid, 0)
+            except OSError as ose:
+                self.assertEqual(errno.ESRCH, ose.errno)
+                break
+            sleep(0.1)
+        else:
+            self.fail('The plugin left a process running')
+
+
+class TestMemoryBudget(JigTestCase):
+
+    """
+    Plugins that need a lot of memory wait their turn.
+
+    """
+    def test_waits_for_memory(self):
+        """
+        A plugin waits until there's room for it.
+        """
+        budget = MemoryBudget(100)
+        events = []
+
+        def run(name, amount, pause):
+            with budget.reserve(amount):
+                events.append(name + ' started')
+                sleep(pause)
+                events.append(name + ' finished')
+
+        with budget.reserve(80):
+            waiting = Thread(target=run, args=('big', 50, 0))
+            waiting.start()
+
+            small = Thread(target=run, args=('small', 10, 0))
+            small.start()
+            small.join()
+
+            sleep(0.1)
+            self.assertNotIn('big started', events)
+
+        waiting.join()
+
+        self.assertEqual(
+            ['small started', 'small finished', 'big started',
+             'big finished'], events)
+
+    def test_runs_alone(self):
+        """
+        A plugin that needs more than the whole budget still runs.
+        """
+        budget = MemoryBudget(100)
+
+        with budget.reserve(500):
+            self.assertEqual(500, budget.used)
+
+        self.assertEqual(0, budget.used)
+
+    def test_recorded_memory(self):
+        """
+        The memory plugins used is remembered.
+        """
+        class Named(object):
+            bundle = 'test'
+            name = 'named'
+
+        durations = PluginDurations(mkdtemp())
+
+        self.assertIsNone(durations.memory(Named))
+
+        durations.record(Named, 1.0, 1, maxrss=1000)
+        durations.record(Named, 1.0, 1, maxrss=2000)
+
+        self.assertEqual(1300, durations.memory(Named))
@@ -1,13 +1,22 @@
 # coding=utf-8
 import json
+from os import chmod
 from os.path import join
-from subprocess import Popen
+from subprocess import PIPE
+from tempfile import mkdtemp
+from time import time
+from unittest import skipIf
 
 from mock import patch
 
 from jig.tests.testcase import PluginTestCase
 from jig.exc import PluginError
-from jig.plugins import PluginManager
+from jig.plugins import Plugin, PluginManager, PythonPlugin, decode_output
+from jig.plugins.manager import (
+    PluginProcess, SharedPayload, negotiate_format, _msgpack,
+    read_plugin_config)
+from jig.plugins.limits import ResourceLimits
+from jig.timings import Timings
 
 
 class TestPluginManager(PluginTestCase):
@@ -185,6 +194,52 @@ class TestPluginManager(PluginTestCase):
         self.assertEqual('This plugin does not exist.',
             str(ec.exception))
 
+    def test_config_parsed_once(self):
+        """
+        A plugin's config file is only parsed again when it changes.
+        """
+        plugindir = mkdtemp()
+        filename = join(plugindir, 'config.cfg')
+
+        with open(filename, 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = cached\n')
+
+        first = read_plugin_config(filename)
+
+        self.assertIs(first, read_plugin_config(filename))
+
+        with open(filename, 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = changed\n')
+
+        second = read_plugin_config(filename)
+
+        self.assertIsNot(first, second)
+        self.assertEqual('changed', second.get('plugin', 'name'))
+
+    def test_add_reads_only_new_plugin(self):
+        """
+        Adding a plugin leaves the ones already installed alone.
+        """
+        plugindirs = []
+        for name in ('first', 'second'):
+            plugindirs.append(mkdtemp())
+            with open(join(plugindirs[-1], 'config.cfg'), 'w') as fh:
+                fh.write('[plugin]\nbundle = test\nname = {0}\n'.format(
+                    name))
+
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(plugindirs[0])
+        installed = pm.plugins[0]
+
+        with patch('jig.plugins.manager.read_plugin_config',
+                   wraps=read_plugin_config) as read:
+            pm.add(plugindirs[1])
+
+        # Once to add it and once to create the plugin
+        self.assertEqual(2, read.call_count)
+        self.assertIs(installed, pm.plugins[0])
+
 
 class TestPlugin(PluginTestCase):
 
@@ -223,6 +278,68 @@ class TestPlugin(PluginTestCase):
             [1, 'warn', 'The cast: is +'],
             data['argument.txt'][0])
 
+    def test_ranges_only(self):
+        """
+        A plugin can ask for the changed line numbers without the lines.
+        """
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write(
+                '[plugin]\nbundle = test\nname = ranges\ndiff = ranges\n')
+
+        filename = join(plugindir, 'pre-commit')
+        with open(filename, 'w') as fh:
+            fh.write('#!/bin/sh\ncat\n')
+        chmod(filename, 0o755)
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+
+        retcode, stdout, stderr = pm.plugins[0].pre_commit(gdi)
+
+        changed = json.loads(stdout)['files'][0]
+
+        self.assertEqual('argument.txt', changed['name'])
+        self.assertNotIn('diff', changed)
+        self.assertEqual([], changed['ranges']['removed'])
+        self.assertEqual(1, changed['ranges']['added'][0][0])
+
+    def test_file_patterns(self):
+        """
+        A plugin can say which files it checks.
+        """
+        everything = Plugin('test', 'everything', self.gitrepodir)
+        python = Plugin(
+            'test', 'python', self.gitrepodir, patterns=('*.py', '*.pyw'))
+
+        self.assertTrue(everything.matches(['a.txt']))
+        self.assertTrue(python.matches(['a.txt', 'src/b.py']))
+        self.assertFalse(python.matches(['a.txt', 'b.pyc']))
+
+    def test_records_timings(self):
+        """
+        The time and resources used by the plugin are recorded.
+        """
+        pm = PluginManager(self.jigconfig)
+
+        pm.add(join(self.fixturesdir, 'plugin01'))
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+        timings = Timings()
+
+        plugin = pm.plugins[0]
+        retcode, stdout, stderr = plugin.pre_commit(gdi, timings=timings)
+
+        timing = timings.plugins[plugin]
+
+        self.assertGreater(timing.wall, 0)
+        self.assertGreater(timing.stdin_bytes, 0)
+        self.assertEqual(len(stdout.encode('utf-8')), timing.stdout_bytes)
+        for phase in ('json_encode', 'blob_reads', 'describe_diff', 'plugins'):
+            self.assertIn(phase, timings.phases)
+
     def test_sigpipe_error(self):
         """
         If a SIGPIPE is received, handle it without blowing up.
@@ -232,11 +349,11 @@ class TestPlugin(PluginTestCase):
         pm.add(join(self.fixturesdir, 'plugin01'))
         gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
 
-        with patch.object(Popen, 'communicate'):
+        with patch.object(PluginProcess, 'communicate'):
             ose = OSError('SIGPIPE')
             ose.errno = 32
 
-            Popen.communicate.side_effect = ose
+            PluginProcess.communicate.side_effect = ose
 
             retcode, stdout, stderr = pm.plugins[0].pre_commit(gdi)
 
@@ -253,11 +370,11 @@ class TestPlugin(PluginTestCase):
         pm.add(join(self.fixturesdir, 'plugin01'))
         gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
 
-        with patch.object(Popen, 'communicate'):
+        with patch.object(PluginProcess, 'communicate'):
             ose = OSError('Gazoonkle was discombobulated')
             ose.errno = 1
 
-            Popen.communicate.side_effect = ose
+            PluginProcess.communicate.side_effect = ose
 
             retcode, stdout, stderr = pm.plugins[0].pre_commit(gdi)
 
@@ -274,11 +391,422 @@ class TestPlugin(PluginTestCase):
         pm.add(join(self.fixturesdir, 'plugin01'))
         gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
 
-        with patch.object(Popen, 'communicate'):
+        with patch.object(PluginProcess, 'communicate'):
             # Send it encoded unicode to see if it will convert it back
-            Popen.communicate.return_value = ('å∫ç'.encode('utf-8'), '')
+            PluginProcess.communicate.return_value = (
+                'å∫ç'.encode('utf-8'), b'')
 
             retcode, stdout, stderr = pm.plugins[0].pre_commit(gdi)
 
         self.assertEqual('å∫ç', stdout)
         self.assertEqual('', stderr)
+
+
+class TestPluginOutput(PluginTestCase):
+
+    """
+    Plugin output is read with a limit.
+
+    """
+    def setUp(self):
+        super(TestPluginOutput, self).setUp()
+
+        repo, working_dir, diffs = self.repo_from_fixture('repo01')
+
+        self.testrepodir = working_dir
+        self.gdi = self.git_diff_index(repo, diffs[0])
+
+    def _chatty_plugin(self, max_output=None):
+        """
+        Create a plugin that writes 100KB of output.
+        """
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = chatty\n')
+            if max_output:
+                fh.write('max_output = {0}\n'.format(max_output))
+
+        script = join(plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(
+                '#!/bin/sh\ncat > /dev/null\n'
+                'yes "[1, \\"warn\\", \\"chatty\\"]" | head -c 100000\n')
+        chmod(script, 0o755)
+
+        return plugindir
+
+    def test_within_limit(self):
+        """
+        Output under the limit is read in full, however much input is sent.
+        """
+        ph = PluginProcess(
+            ['cat'], stdin=PIPE, stdout=PIPE, stderr=PIPE, limit=10000000)
+
+        stdin = b'a' * 1000000
+        stdout, stderr = ph.communicate(stdin)
+
+        self.assertEqual(stdin, stdout)
+        self.assertFalse(ph.truncated)
+        self.assertEqual(0, ph.returncode)
+
+    def test_over_limit(self):
+        """
+        Output over the limit is cut off and the process stopped.
+        """
+        ph = PluginProcess(
+            ['sh', '-c', 'yes'], stdin=PIPE, stdout=PIPE, stderr=PIPE,
+            limit=1000)
+
+        stdout, stderr = ph.communicate()
+
+        self.assertEqual(1000, len(stdout))
+        self.assertTrue(ph.truncated)
+
+    def test_plugin_truncated(self):
+        """
+        A plugin that writes too much fails with an error.
+        """
+        pm = PluginManager(self.jigconfig)
+        pm.add(self._chatty_plugin(max_output=1000))
+
+        plugin = pm.plugins[0]
+
+        retcode, stdout, stderr = plugin.pre_commit(self.gdi)
+
+        self.assertEqual(1000, plugin.max_output)
+        self.assertEqual(1, retcode)
+        self.assertEqual('', stdout)
+        self.assertIn(
+            'the plugin wrote more than 1000 bytes to stdout', stderr)
+
+    def test_repository_limit(self):
+        """
+        The limit can be set for all plugins in the repository.
+        """
+        self.jigconfig.set('jig', 'max_output', '2000')
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(self._chatty_plugin())
+
+        self.assertEqual(2000, pm.plugins[0].max_output)
+
+        retcode, stdout, stderr = pm.plugins[0].pre_commit(self.gdi)
+
+        self.assertEqual(1, retcode)
+
+
+class TestSharedPayload(PluginTestCase):
+
+    """
+    Plugins can read the changes from a shared file.
+
+    """
+    def setUp(self):
+        super(TestSharedPayload, self).setUp()
+
+        repo, working_dir, diffs = self.repo_from_fixture('repo01')
+
+        self.testrepodir = working_dir
+        self.gdi = self.git_diff_index(repo, diffs[0])
+
+    def _payload_plugin(self, script):
+        """
+        Create a plugin that reads a shared payload with ``script``.
+        """
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write(
+                '[plugin]\nbundle = test\nname = shared\npayload = file\n'
+                '[settings]\nverbose = yes\n')
+
+        filename = join(plugindir, 'pre-commit')
+        with open(filename, 'w') as fh:
+            fh.write('#!/bin/sh\n{0}\n'.format(script))
+        chmod(filename, 0o755)
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+
+        return pm.plugins[0]
+
+    def test_payload(self):
+        """
+        The files are written once and can't be changed.
+        """
+        with SharedPayload(self.gdi) as payload:
+            with open(payload.path, 'rb') as fh:
+                data = fh.read()
+
+            self.assertEqual(payload.size, len(data))
+            self.assertEqual(
+                'argument.txt', json.loads(data.decode('utf-8'))[0]['name'])
+
+            with self.assertRaises(OSError):
+                with open(payload.path, 'r+b') as fh:
+                    fh.write(b'changed')
+
+    def test_header(self):
+        """
+        The plugin gets its config and where to find the payload on stdin.
+        """
+        plugin = self._payload_plugin('cat')
+
+        self.assertEqual('file', plugin.payload)
+
+        retcode, stdout, stderr = plugin.pre_commit(self.gdi)
+
+        header = json.loads(stdout)
+
+        self.assertEqual({'verbose': 'yes'}, header['config'])
+        self.assertEqual('json', header['payload']['format'])
+        self.assertNotIn('files', header)
+
+    def test_reads_payload(self):
+        """
+        The plugin can read the payload without draining stdin.
+        """
+        plugin = self._payload_plugin('cat "$JIG_PAYLOAD"')
+
+        with SharedPayload(self.gdi) as payload:
+            retcode, stdout, stderr = plugin.pre_commit(
+                self.gdi, payload=payload)
+
+        self.assertEqual(0, retcode)
+        self.assertEqual('argument.txt', json.loads(stdout)[0]['name'])
+
+
+@skipIf(_msgpack() is None, 'msgpack is not installed')
+class TestMessagePack(PluginTestCase):
+
+    """
+    Plugins can ask for MessagePack instead of JSON.
+
+    """
+    def setUp(self):
+        super(TestMessagePack, self).setUp()
+
+        repo, working_dir, diffs = self.repo_from_fixture('repo01')
+
+        self.testrepodir = working_dir
+        self.gdi = self.git_diff_index(repo, diffs[0])
+
+    def _msgpack_plugin(self, script, settings=''):
+        """
+        Create a plugin that talks MessagePack and runs ``script``.
+        """
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write(
+                '[plugin]\nbundle = test\nname = packed\n'
+                'format = msgpack, json\n{0}'
+                '[settings]\nverbose = yes\n'.format(settings))
+
+        filename = join(plugindir, 'pre-commit')
+        with open(filename, 'w') as fh:
+            fh.write('#!/bin/sh\n{0}\n'.format(script))
+        chmod(filename, 0o755)
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+
+        return pm.plugins[0]
+
+    def test_negotiate(self):
+        """
+        The first format the plugin lists that jig can use is picked.
+        """
+        self.assertEqual('msgpack', negotiate_format('msgpack, json'))
+        self.assertEqual('json', negotiate_format('json, msgpack'))
+        self.assertEqual('json', negotiate_format('yaml'))
+        self.assertEqual('json', negotiate_format(None))
+
+        with patch('jig.plugins.manager._msgpack', return_value=None):
+            self.assertEqual('json', negotiate_format('msgpack'))
+
+    def test_round_trip(self):
+        """
+        The plugin gets MessagePack and what it writes back is unpacked.
+        """
+        plugin = self._msgpack_plugin('cat')
+
+        self.assertEqual('msgpack', plugin.format)
+
+        retcode, data, stderr = plugin.pre_commit(self.gdi)
+
+        self.assertEqual(0, retcode)
+        self.assertEqual({'verbose': 'yes'}, data['config'])
+        self.assertEqual('argument.txt', data['files'][0]['name'])
+        # Already decoded, it's left alone
+        self.assertIs(data, decode_output(data))
+
+    def test_not_msgpack(self):
+        """
+        Output that can't be unpacked is kept as a string.
+        """
+        plugin = self._msgpack_plugin('echo "Using $JIG_FORMAT"')
+
+        retcode, data, stderr = plugin.pre_commit(self.gdi)
+
+        self.assertEqual('Using msgpack\n', data)
+
+    def test_shared_payload(self):
+        """
+        A shared payload is written in the plugin's format.
+        """
+        plugin = self._msgpack_plugin(
+            'cat "$JIG_PAYLOAD"', settings='payload = file\n')
+
+        with SharedPayload(self.gdi) as payload:
+            # This one is JSON, the plugin gets its own
+            retcode, data, stderr = plugin.pre_commit(
+                self.gdi, payload=payload)
+
+        self.assertEqual('argument.txt', data[0]['name'])
+
+
+class TestPythonPlugin(PluginTestCase):
+
+    """
+    Python plugins run in jig's own process.
+
+    """
+    def setUp(self):
+        super(TestPythonPlugin, self).setUp()
+
+        repo, working_dir, diffs = self.repo_from_fixture('repo01')
+
+        self.testrepo = repo
+        self.testrepodir = working_dir
+        self.testdiffs = diffs
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(join(self.fixturesdir, 'plugin08'))
+
+        self.plugin = pm.plugins[0]
+        self.gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+
+    def test_entry_point(self):
+        """
+        The config names a function instead of a pre-commit script.
+        """
+        self.assertIsInstance(self.plugin, PythonPlugin)
+        self.assertEqual('check:run', self.plugin.entry_point)
+        self.assertEqual({'def1': '1'}, dict(self.plugin.config))
+
+    def test_pre_commit(self):
+        """
+        The function gets the diff and its data comes back as is.
+        """
+        timings = Timings()
+
+        retcode, data, stderr = self.plugin.pre_commit(
+            self.gdi, timings=timings)
+
+        self.assertEqual(0, retcode)
+        self.assertEqual(
+            [1, 'warn', 'The cast: is +'], data['argument.txt'][0])
+        self.assertEqual('', stderr)
+        self.assertIn(self.plugin, timings.plugins)
+
+    def test_forked(self):
+        """
+        The function can run in a forked worker.
+        """
+        self.plugin.isolation = 'fork'
+        timings = Timings()
+
+        retcode, data, stderr = self.plugin.pre_commit(
+            self.gdi, timings=timings)
+
+        self.assertEqual(0, retcode)
+        self.assertEqual(
+            [1, 'warn', 'The cast: is +'], data['argument.txt'][0])
+        self.assertGreater(timings.plugins[self.plugin].stdout_bytes, 0)
+
+    def test_exception(self):
+        """
+        An exception in the function is reported like a failing script.
+        """
+        self.plugin.entry_point = 'check:broken'
+
+        retcode, data, stderr = self.plugin.pre_commit(self.gdi)
+
+        self.assertEqual(1, retcode)
+        self.assertIn('ValueError: Something went wrong', stderr)
+
+    def test_forked_exception(self):
+        """
+        An exception in a forked worker is reported the same way.
+        """
+        self.plugin.entry_point = 'check:broken'
+        self.plugin.isolation = 'fork'
+
+        retcode, data, stderr = self.plugin.pre_commit(self.gdi)
+
+        self.assertEqual(1, retcode)
+        self.assertIn('ValueError: Something went wrong', stderr)
+
+    def test_forked_unserializable(self):
+        """
+        A forked worker can only send back data that can be serialized.
+        """
+        self.plugin.entry_point = 'check:unserializable'
+        self.plugin.isolation = 'fork'
+
+        retcode, data, stderr = self.plugin.pre_commit(self.gdi)
+
+        self.assertEqual(1, retcode)
+        self.assertIn('TypeError', stderr)
+
+    def test_forked_timeout(self):
+        """
+        A forked worker that runs too long is stopped.
+        """
+        self.plugin.entry_point = 'check:slow'
+        self.plugin.isolation = 'fork'
+        self.plugin.limits = ResourceLimits(timeout=0.5)
+
+        started = time()
+        retcode, data, stderr = self.plugin.pre_commit(self.gdi)
+
+        self.assertLess(time() - started, 10)
+        self.assertEqual(1, retcode)
+        self.assertIn('stopped after running for 0.5 seconds', stderr)
+
+    def test_forked_missing_entry_point(self):
+        """
+        A function that can't be found is reported without forking.
+        """
+        self.plugin.entry_point = 'check:missing'
+        self.plugin.isolation = 'fork'
+
+        with patch('jig.plugins.manager.os.fork') as fork:
+            retcode, data, stderr = self.plugin.pre_commit(self.gdi)
+
+        self.assertFalse(fork.called)
+        self.assertEqual(1, retcode)
+        self.assertIn('Could not load the entry point', stderr)
+
+    def test_missing_entry_point(self):
+        """
+        A function that can't be found is an error.
+        """
+        self.plugin.entry_point = 'check:missing'
+
+        retcode, data, stderr = self.plugin.pre_commit(self.gdi)
+
+        self.assertEqual(1, retcode)
+        self.assertIn(
+            'Could not load the entry point check:missing for plugin '
+            'plugin08', stderr)
+
+    def test_decode_output(self):
+        """
+        Output is decoded from JSON unless it's already been decoded.
+        """
+        self.assertEqual({'a': 1}, decode_output('{"a": 1}'))
+        self.assertEqual('not json', decode_output('not json'))
+        self.assertEqual({'a': 1}, decode_output({'a': 1}))
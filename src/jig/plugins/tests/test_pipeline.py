@@ -0,0 +1,218 @@
+import sys
+from os import chmod
+from os.path import join
+from tempfile import mkdtemp
+
+from mock import patch
+
+from jig.tests.testcase import JigTestCase, RunnerTestCase, PluginTestCase
+from jig.exc import PluginError
+from jig.plugins import Plugin, PluginManager, set_jigconfig
+from jig.plugins.pipeline import Pipeline, plan_stages, stops
+
+# Says the same thing about every file it's given
+REPORTER_SCRIPT = """#!{0}
+import sys, json
+data = json.load(sys.stdin)
+print(json.dumps(dict(
+    (i['name'], [[None, '{1}', '{2}']]) for i in data['files'])))
+sys.exit({3})
+"""
+
+
+def _plugin(name, stage=0, requires=()):
+    return Plugin('test', name, mkdtemp(), stage=stage, requires=requires)
+
+
+class TestPlanStages(JigTestCase):
+
+    """
+    Plugins are grouped into stages.
+
+    """
+    def test_stages(self):
+        """
+        Lower stages come first, the order within a stage is kept.
+        """
+        slow, quick, other = (
+            _plugin('slow', stage=10), _plugin('quick'), _plugin('other'))
+
+        self.assertEqual(
+            [[quick, other], [slow]], plan_stages([slow, quick, other]))
+
+    def test_requires(self):
+        """
+        A plugin runs in a later stage than the plugins it requires.
+        """
+        first = _plugin('first', stage=5)
+        second = _plugin('second', requires=('test:first',))
+        third = _plugin('third', requires=('second', 'missing'))
+
+        self.assertEqual(
+            [[first], [second], [third]],
+            plan_stages([third, second, first]))
+
+    def test_require_each_other(self):
+        """
+        Plugins can't require each other.
+        """
+        one = _plugin('one', requires=('two',))
+        two = _plugin('two', requires=('one',))
+
+        with self.assertRaises(PluginError) as ec:
+            plan_stages([one, two])
+
+        self.assertIn('one, two', str(ec.exception))
+
+    def test_stops(self):
+        """
+        Only STOP messages stop the commit.
+        """
+        plugin = _plugin('plugin')
+
+        self.assertTrue(stops(plugin, (0, {'a.txt': [[1, 'stop', 'x']]}, '')))
+        self.assertFalse(stops(plugin, (0, {'a.txt': [[1, 'warn', 'x']]}, '')))
+        self.assertFalse(stops(plugin, (1, '', 'broken')))
+
+
+class TestPipeline(JigTestCase):
+
+    """
+    The plugins that can run in each stage depend on the stages before.
+
+    """
+    def test_stages(self):
+        """
+        Every stage runs if nothing stops the commit.
+        """
+        first, second = _plugin('first'), _plugin('second', stage=1)
+        pipeline = Pipeline([first, second])
+
+        stages = pipeline.stages()
+
+        self.assertEqual([first], next(stages))
+        pipeline.finish(first, (0, {'a.txt': [[1, 'warn', 'x']]}, ''))
+
+        self.assertEqual([second], next(stages))
+        self.assertEqual([], pipeline.skipped)
+
+    def test_stopped(self):
+        """
+        Later stages are skipped once a plugin stops the commit.
+        """
+        first, second = _plugin('first'), _plugin('second', stage=1)
+        pipeline = Pipeline([first, second])
+
+        stages = pipeline.stages()
+
+        next(stages)
+        pipeline.finish(first, (0, {'a.txt': [[1, 'stop', 'x']]}, ''))
+
+        self.assertEqual([], next(stages))
+        self.assertTrue(pipeline.stopped)
+        self.assertEqual([second], pipeline.skipped)
+
+    def test_blocked(self):
+        """
+        A plugin is blocked until what it requires has run and passed.
+        """
+        first = _plugin('first')
+        second = _plugin('second', requires=('first',))
+        pipeline = Pipeline([first, second])
+
+        self.assertTrue(pipeline.blocked(second))
+        self.assertFalse(pipeline.blocked(first))
+
+        pipeline.finish(first, (0, {}, ''))
+
+        self.assertFalse(pipeline.blocked(second))
+
+        pipeline.finish(first, (1, '', 'broken'))
+
+        self.assertTrue(pipeline.blocked(second))
+
+
+class TestRunnerStages(RunnerTestCase, PluginTestCase):
+
+    """
+    Later stages only run if earlier ones did not stop the commit.
+
+    """
+    def setUp(self):
+        super(TestRunnerStages, self).setUp()
+
+        self.pm = PluginManager(self.jigconfig)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a\n')
+        self.stage(self.gitrepodir, 'a.txt', 'changed a\n')
+
+    def _add(self, name, type='info', retcode=0, settings=''):
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write(
+                '[plugin]\nbundle = test\nname = {0}\n{1}'.format(
+                    name, settings))
+
+        script = join(plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(REPORTER_SCRIPT.format(
+                sys.executable, type, name, retcode))
+        chmod(script, 0o755)
+
+        self.pm.add(plugindir)
+        set_jigconfig(self.gitrepodir, self.pm.config)
+
+    def _ran(self):
+        results = self.runner.results(self.gitrepodir)
+
+        return sorted(i.name for i in results)
+
+    def test_all_stages(self):
+        """
+        Every stage runs if nothing stops the commit.
+        """
+        self._add('whitespace', type='warn')
+        self._add('typecheck', settings='stage = 10\n')
+
+        self.assertEqual(['typecheck', 'whitespace'], self._ran())
+
+    def test_stop_skips_later_stages(self):
+        """
+        A STOP keeps the later stages from running.
+        """
+        self._add('whitespace', type='stop')
+        self._add('filenames')
+        self._add('typecheck', settings='stage = 10\n')
+
+        self.assertEqual(['filenames', 'whitespace'], self._ran())
+        self.assertIn(
+            'Did not run typecheck, plugins that run before them stopped '
+            'the commit or failed.', self.output)
+
+    def test_skipped_from_cache(self):
+        """
+        The user still hears about skipped stages when the results come from
+        the cache.
+        """
+        self._add('whitespace', type='stop')
+        self._add('typecheck', settings='stage = 10\n')
+        self.runner.cache = True
+
+        self._ran()
+
+        with patch.object(Plugin, 'pre_commit') as pre_commit:
+            self.assertEqual(['whitespace'], self._ran())
+
+        self.assertFalse(pre_commit.called)
+        self.assertEqual(2, self.output.count('Did not run typecheck'))
+
+    def test_required_failed(self):
+        """
+        A plugin doesn't run if a plugin it requires failed.
+        """
+        self._add('filenames', retcode=1)
+        self._add('typecheck', settings='requires = filenames\n')
+        self._add('tests', settings='stage = 1\n')
+
+        self.assertEqual(['filenames', 'tests'], self._ran())
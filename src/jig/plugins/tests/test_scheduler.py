@@ -0,0 +1,135 @@
+from tempfile import mkdtemp
+
+from mock import Mock, patch
+
+from jig.tests.testcase import JigTestCase
+from jig.plugins import Plugin
+from jig.plugins.limits import MemoryBudget
+from jig.plugins.scheduler import Scheduler
+from jig.timings import Timings
+
+
+class FakeDurations(object):
+
+    def longest_first(self, plugins, file_count):
+        return list(plugins)
+
+    def memory(self, plugin):
+        return None
+
+
+class TestScheduler(JigTestCase):
+
+    """
+    Run plugins stage by stage.
+
+    """
+    def _scheduler(self, cache=None):
+        diff = [Mock(a_blob=None, b_blob=None) for _ in range(2)]
+
+        return Scheduler(
+            Mock(gitrepo=mkdtemp()), diff, 2, Timings(), FakeDurations(),
+            MemoryBudget(None), cache=cache, keys={})
+
+    def _plugin(self, name, output='{}', **kwargs):
+        plugin = Plugin('test', name, mkdtemp(), **kwargs)
+        plugin.pre_commit = Mock(return_value=(0, output, ''))
+
+        return plugin
+
+    def test_run(self):
+        """
+        Every plugin runs and its output is decoded.
+        """
+        first = self._plugin('first', '{"a.txt": [[1, "warn", "x"]]}')
+        second = self._plugin('second', stage=1)
+
+        pipeline = self._scheduler().run([second, first])
+
+        self.assertEqual(
+            (0, {'a.txt': [[1, 'warn', 'x']]}, ''), pipeline.finished[first])
+        self.assertEqual((0, {}, ''), pipeline.finished[second])
+
+    def test_stopped(self):
+        """
+        Later stages don't run once a plugin stops the commit.
+        """
+        first = self._plugin('first', '{"a.txt": [[1, "stop", "x"]]}')
+        second = self._plugin('second', stage=1)
+
+        pipeline = self._scheduler().run([first, second])
+
+        self.assertFalse(second.pre_commit.called)
+        self.assertEqual([second], pipeline.skipped)
+
+    def test_all_checked(self):
+        """
+        A plugin that checked every file before doesn't run.
+        """
+        plugin = self._plugin('plugin')
+        cache = Mock()
+        cache.unchecked.return_value = []
+        cache.put_back.return_value = (0, {'a.txt': ['A']}, '')
+
+        pipeline = self._scheduler(cache=cache).run([plugin])
+
+        self.assertFalse(plugin.pre_commit.called)
+        cache.put_back.assert_called_once_with(plugin, (0, {}, ''), {})
+        self.assertEqual((0, {'a.txt': ['A']}, ''), pipeline.finished[plugin])
+
+    def test_checks_everything_again(self):
+        """
+        A plugin checks every file again if what it said before can't be
+        put back.
+        """
+        scheduler = self._scheduler(cache=Mock())
+        scheduler.cache.unchecked.return_value = scheduler.diff[1:]
+        scheduler.cache.put_back.return_value = None
+
+        plugin = self._plugin('plugin', '"everything"')
+
+        pipeline = scheduler.run([plugin])
+
+        self.assertEqual(2, plugin.pre_commit.call_count)
+        self.assertIs(scheduler.gdi, plugin.pre_commit.call_args[0][0])
+        self.assertEqual((0, 'everything', ''), pipeline.finished[plugin])
+
+    def test_checks_everything_again_in_shards(self):
+        """
+        Checking every file again is split into shards like any other run.
+        """
+        scheduler = self._scheduler(cache=Mock())
+        scheduler.cache.unchecked.return_value = scheduler.diff[1:]
+        scheduler.cache.put_back.return_value = None
+
+        plugin = self._plugin('plugin', '{}', shardable=True)
+
+        with patch('jig.plugins.shards.shard_count') as count:
+            count.side_effect = lambda files, jobs: min(jobs, files)
+            pipeline = scheduler.run([plugin])
+
+        # Once for the file that changed, then once for each shard
+        self.assertEqual(3, plugin.pre_commit.call_count)
+        self.assertEqual((0, {}, ''), pipeline.finished[plugin])
+
+    def test_shard_tasks(self):
+        """
+        Each shard has its own timings and track.
+        """
+        scheduler = self._scheduler()
+        plugin = self._plugin('plugin', shardable=True)
+
+        with patch('jig.plugins.shards.shard_count') as count:
+            count.side_effect = lambda files, jobs: min(jobs, files)
+            tasks = scheduler.shard_tasks(plugin, None)
+
+        self.assertEqual(
+            ['test:plugin shard 1', 'test:plugin shard 2'],
+            [i[3] for i in tasks])
+        self.assertIsNot(scheduler.timings, tasks[0][2])
+
+        plugin.shardable = False
+
+        self.assertEqual(
+            [(plugin, None, scheduler.timings, 'test:plugin')],
+            scheduler.shard_tasks(plugin, None))
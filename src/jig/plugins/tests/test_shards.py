@@ -0,0 +1,193 @@
+import sys
+from os import chmod
+from os.path import join
+from tempfile import mkdtemp
+
+from mock import patch
+
+from jig.tests.testcase import JigTestCase, RunnerTestCase, PluginTestCase
+from jig.plugins import Plugin, PluginManager, set_jigconfig
+from jig.plugins.shards import (
+    shard_count, split, plan_shards, merge_results, merge_timings)
+from jig.timings import PluginTiming
+
+# Reports every file it's given, along with how many files it was given
+COUNTER_SCRIPT = """#!{0}
+import sys, json
+data = json.load(sys.stdin)
+print(json.dumps(dict(
+    (i['name'], [[None, 'info', 'saw {{0}}'.format(len(data['files']))]])
+    for i in data['files'])))
+"""
+
+
+class FakeBlob(object):
+
+    def __init__(self, size):
+        self.size = size
+
+
+class FakeDiff(object):
+
+    def __init__(self, name, size):
+        self.name = name
+        self.a_blob = None
+        self.b_blob = FakeBlob(size)
+
+
+class TestSharding(JigTestCase):
+
+    """
+    Split the files between copies of a plugin.
+
+    """
+    def test_shard_count(self):
+        """
+        Shards have a minimum number of files and there is one per job.
+        """
+        self.assertEqual(1, shard_count(50, 8, min_files=100))
+        self.assertEqual(2, shard_count(250, 8, min_files=100))
+        self.assertEqual(8, shard_count(5000, 8, min_files=100))
+
+    def test_split(self):
+        """
+        Shards are about the same size and keep the original order.
+        """
+        diffs = [
+            FakeDiff('a', 100000), FakeDiff('b', 10), FakeDiff('c', 10),
+            FakeDiff('d', 50000), FakeDiff('e', 50000)]
+
+        shards = split(diffs, 2)
+
+        self.assertEqual(
+            [['a', 'b'], ['c', 'd', 'e']],
+            [[i.name for i in shard] for shard in shards])
+
+    def test_split_small(self):
+        """
+        There are no empty shards.
+        """
+        self.assertEqual(1, len(split([FakeDiff('a', 1)], 3)))
+
+    def test_plan_shards(self):
+        """
+        Only shardable plugins are split, and only if there are enough files.
+        """
+        diffs = [FakeDiff(i, 1) for i in 'abcd']
+        plugin = Plugin('test', 'plugin', mkdtemp(), shardable=True)
+
+        with patch('jig.plugins.shards.shard_count') as count:
+            count.side_effect = lambda files, jobs: min(jobs, files)
+
+            self.assertEqual(2, len(plan_shards(plugin, None, diffs, 2)))
+            self.assertEqual([diffs[:1]], plan_shards(
+                plugin, diffs[:1], diffs, 2))
+
+            plugin.shardable = False
+
+            self.assertEqual([None], plan_shards(plugin, None, diffs, 2))
+
+    def test_merge_results(self):
+        """
+        The messages from each shard are put back together.
+        """
+        self.assertEqual(
+            (0, {'a': ['A'], 'b': ['B']}, ''),
+            merge_results([(0, {'a': ['A']}, ''), (0, {'b': ['B']}, '')]))
+        self.assertEqual(
+            (0, ['A', 'B'], ''),
+            merge_results([(0, ['A'], ''), (0, ['B'], '')]))
+
+    def test_merge_failed(self):
+        """
+        If one shard fails the plugin failed.
+        """
+        retcode, data, stderr = merge_results(
+            [(0, {'a': ['A']}, ''), (1, '', 'broken\n')])
+
+        self.assertEqual(1, retcode)
+        self.assertEqual('broken\n', stderr)
+
+        retcode, data, stderr = merge_results(
+            [(0, {'a': ['A']}, ''), (0, ['B'], '')])
+
+        self.assertEqual(1, retcode)
+        self.assertIn('different kinds of results', stderr)
+
+    def test_merge_timings(self):
+        """
+        Shards ran at the same time.
+        """
+        self.assertEqual(
+            PluginTiming(2.0, 3.0, 200, 30, 3),
+            merge_timings([
+                PluginTiming(1.0, 1.0, 200, 10, 1),
+                PluginTiming(2.0, 2.0, 100, 20, 2)]))
+
+
+class TestRunnerShards(RunnerTestCase, PluginTestCase):
+
+    """
+    Copies of shardable plugins check some of the files each.
+
+    """
+    def setUp(self):
+        super(TestRunnerShards, self).setUp()
+
+        self.plugindir = mkdtemp()
+
+        script = join(self.plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(COUNTER_SCRIPT.format(sys.executable))
+        chmod(script, 0o755)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a\n')
+
+        for name in ('a', 'b', 'c', 'd'):
+            self.stage(self.gitrepodir, name + '.txt', name * 10 + '\n')
+
+        self.runner.jobs = 2
+        self.runner.cache = False
+
+    def _results(self, shardable):
+        with open(join(self.plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = counter\n')
+            if shardable:
+                fh.write('shardable = yes\n')
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(self.plugindir)
+        set_jigconfig(self.gitrepodir, pm.config)
+
+        with patch('jig.plugins.shards.shard_count') as count:
+            count.side_effect = lambda files, jobs: min(jobs, files)
+            results = self.runner.results(self.gitrepodir)
+
+        (retcode, data, stderr), = results.values()
+
+        self.assertEqual(0, retcode, stderr)
+
+        return data
+
+    def test_shardable(self):
+        """
+        Each copy saw some of the files, the results are merged.
+        """
+        data = self._results(shardable=True)
+
+        self.assertEqual(
+            ['a.txt', 'b.txt', 'c.txt', 'd.txt'], sorted(data))
+        self.assertEqual(
+            set(['saw 2']), set(i[0][2] for i in data.values()))
+
+        timing, = self.runner.timings.plugins.values()
+        self.assertGreater(timing.stdin_bytes, 0)
+
+    def test_not_shardable(self):
+        """
+        Other plugins see every file.
+        """
+        data = self._results(shardable=False)
+
+        self.assertEqual(
+            set(['saw 4']), set(i[0][2] for i in data.values()))
@@ -1,11 +1,12 @@
 # coding=utf-8
 import json
-from os import makedirs
+from os import makedirs, listdir
 from os.path import join, dirname
 from codecs import open
 from tempfile import mkdtemp
 from textwrap import dedent
 from copy import copy
+from collections import OrderedDict
 
 from mock import patch
 
@@ -18,14 +19,10 @@ from jig.plugins import create_plugin, Plugin
 from jig.tests.testcase import JigTestCase, PluginTestCase
 from jig.plugins.testrunner import (
     PluginTestRunner, InstrumentedGitDiffIndex, PluginTestReporter,
-    get_expectations, Expectation, Result, SuccessResult, FailureResult,
+    PluginSuiteReporter, PluginTestRun, get_expectations, find_plugin_suites,
+    run_plugin_suite, Expectation, Result, SuccessResult, FailureResult,
     REPORTER_HORIZONTAL_DIVIDER)
 
-try:
-    from collections import OrderedDict
-except ImportError:   # pragma: no cover
-    from ordereddict import OrderedDict
-
 
 class TestResult(PluginTestCase):
 
@@ -196,6 +193,29 @@ class TestPluginTestRunner(PluginTestCase):
         self.assertIsInstance(ptr.timeline, NumberedDirectoriesToGit)
         self.assertIsInstance(ptr.expectations[0], Expectation)
 
+    def test_caches_expectations(self):
+        """
+        Parsed expectations are cached, unless the cache is turned off.
+        """
+        plugin_dir = mkdtemp()
+
+        self.add_timeline(plugin_dir, [('a.txt', 'a\n')])
+        self.add_timeline(plugin_dir, [('a.txt', 'aa\n')])
+        self.add_expectation(plugin_dir, '''
+            .. expectation::
+                :from: 01
+                :to: 02
+
+                Test output''')
+
+        PluginTestRunner(plugin_dir, cache=False)
+
+        self.assertEqual([], listdir(self.expectations_cache_dir))
+
+        PluginTestRunner(plugin_dir)
+
+        self.assertEqual(1, len(listdir(self.expectations_cache_dir)))
+
     def test_success_result(self):
         """
         Will run the tests and detect a success result.
@@ -765,6 +785,83 @@ class TestGetExpectations(PluginTestCase):
             Expectation((2, 3), {'a': '1'}, 'Output 2')],
             exps)
 
+    def test_settings_do_not_cross_sections(self):
+        """
+        Settings from a previous section do not apply to the next one.
+        """
+        exps = list(get_expectations(dedent('''
+            Title 1
+            =======
+
+            .. plugin-settings::
+
+                a = 1
+
+            .. expectation::
+                :from: 01
+                :to: 02
+
+                Output 1
+
+            Title 2
+            =======
+
+            .. expectation::
+                :from: 02
+                :to: 03
+
+                Output 2''')))
+
+        self.assertEqual([
+            Expectation((1, 2), {'a': '1'}, 'Output 1'),
+            Expectation((2, 3), None, 'Output 2')],
+            exps)
+
+    def test_cached_expectations(self):
+        """
+        Parsing the same document twice will read it from the cache.
+        """
+        cache_dir = mkdtemp()
+        document = dedent('''
+            .. plugin-settings::
+
+                a = 1
+
+            .. expectation::
+                :from: 01
+                :to: 02
+
+                Output''')
+
+        first = get_expectations(document, cache_dir=cache_dir)
+
+        with patch('jig.plugins.directives.parse_expectations') as pe:
+            second = get_expectations(document, cache_dir=cache_dir)
+
+        self.assertFalse(pe.called)
+        self.assertEqual(first, second)
+        self.assertEqual(
+            [Expectation((1, 2), {'a': '1'}, 'Output')], second)
+
+    def test_changed_document_misses_cache(self):
+        """
+        A change to the document means it is parsed again.
+        """
+        cache_dir = mkdtemp()
+        document = dedent('''
+            .. expectation::
+                :from: 01
+                :to: 02
+
+                Output''')
+
+        get_expectations(document, cache_dir=cache_dir)
+
+        exps = get_expectations(
+            document.replace('Output', 'Changed'), cache_dir=cache_dir)
+
+        self.assertEqual([Expectation((1, 2), None, 'Changed')], exps)
+
 
 class TestInstrumentedGitDiffIndex(JigTestCase):
 
@@ -807,3 +904,172 @@ class TestInstrumentedGitDiffIndex(JigTestCase):
         self.assertEqual(1, len(filenames))
         self.assertEqual(
             '/path/argument.txt', filenames[0])
+
+
+class TestFindPluginSuites(JigTestCase):
+
+    """
+    Plugins with tests can be found in a bundle of plugins.
+
+    """
+    def setUp(self):
+        super(TestFindPluginSuites, self).setUp()
+
+        self.bundle = mkdtemp()
+
+    def add_plugin(self, name, tests=True):
+        """
+        Creates a plugin directory, with an empty ``expect.rst`` if ``tests``.
+        """
+        plugin_dir = join(self.bundle, name)
+        makedirs(join(plugin_dir, 'tests'))
+
+        with open(join(plugin_dir, 'config.cfg'), 'w', CODEC) as fh:
+            fh.write('[plugin]\nbundle = bundle\nname = {0}\n'.format(name))
+
+        if tests:
+            with open(join(plugin_dir, 'tests', 'expect.rst'), 'w') as fh:
+                fh.write('')
+
+        return plugin_dir
+
+    def test_bundle(self):
+        """
+        Only the plugins in a bundle that have tests are found.
+        """
+        plugin_a = self.add_plugin('a')
+        self.add_plugin('b', tests=False)
+        plugin_c = self.add_plugin('c')
+
+        self.assertEqual(
+            [plugin_a, plugin_c], find_plugin_suites([self.bundle]))
+
+    def test_plugin_without_tests(self):
+        """
+        A plugin given on its own is found even without tests.
+        """
+        plugin_b = self.add_plugin('b', tests=False)
+
+        self.assertEqual([plugin_b], find_plugin_suites([plugin_b]))
+
+    def test_many_paths(self):
+        """
+        Plugins are found in each of the paths.
+        """
+        plugin_a = self.add_plugin('a')
+        plugin_b = self.add_plugin('b')
+
+        self.assertEqual(
+            [plugin_b, plugin_a], find_plugin_suites([plugin_b, plugin_a]))
+
+    def test_nothing_found(self):
+        """
+        A directory without plugins has no tests.
+        """
+        self.assertEqual([], find_plugin_suites([self.bundle]))
+
+
+class TestRunPluginSuite(JigTestCase):
+
+    """
+    The tests of one plugin out of many are run.
+
+    """
+    def setUp(self):
+        super(TestRunPluginSuite, self).setUp()
+
+        self.plugin_dir = join(mkdtemp(), 'plugin')
+
+        for number, content in (('01', 'a\n'), ('02', 'aa\n')):
+            makedirs(join(self.plugin_dir, 'tests', number))
+            with open(join(
+                    self.plugin_dir, 'tests', number, 'a.txt'), 'w') as fh:
+                fh.write(content)
+
+        with open(join(self.plugin_dir, 'tests', 'expect.rst'), 'w') as fh:
+            fh.write(dedent('''
+                .. expectation::
+                    :from: 01
+                    :to: 02
+
+                    Test output'''))
+
+    def test_no_tests(self):
+        """
+        A plugin without tests is an error.
+        """
+        run = run_plugin_suite(mkdtemp())
+
+        self.assertIn('Could not find any tests', run.error)
+
+    def test_broken_plugin(self):
+        """
+        A plugin that can't be loaded is an error instead of an exception.
+        """
+        with open(join(self.plugin_dir, 'config.cfg'), 'w') as fh:
+            fh.write('[other]\n')
+
+        run = run_plugin_suite(self.plugin_dir)
+
+        self.assertEqual(self.plugin_dir, run.plugin_dir)
+        self.assertEqual((0, 0), (run.passed, run.failed))
+        self.assertTrue(run.error.startswith('PluginError: '))
+
+    def test_unexpected_error(self):
+        """
+        Any other exception is also an error of the plugin.
+        """
+        with patch.object(PluginTestRunner, 'run',
+                          side_effect=OSError('No space left')):
+            run = run_plugin_suite(self.plugin_dir)
+
+        self.assertEqual('OSError: No space left', run.error)
+
+
+class TestPluginSuiteReporter(JigTestCase):
+
+    """
+    The results of testing many plugins are reported together.
+
+    """
+    def test_all_pass(self):
+        """
+        Each plugin is reported followed by a summary.
+        """
+        reporter = PluginSuiteReporter([
+            PluginTestRun('/a', '01 – 02 Pass', 1, 0, None),
+            PluginTestRun('/b', '01 – 02 Pass\n\n02 – 03 Pass', 2, 0, None)])
+
+        self.assertFalse(reporter.failed)
+        self.assertResults('''
+            /a
+
+                01 – 02 Pass
+
+            /b
+
+                01 – 02 Pass
+
+                02 – 03 Pass
+
+            Plugins 2, Pass 3, Fail 0, Error 0''', reporter.dumps())
+
+    def test_failures_and_errors(self):
+        """
+        A failing test or a plugin that could not be tested fails the suite.
+        """
+        reporter = PluginSuiteReporter([
+            PluginTestRun('/a', '01 – 02 Fail', 0, 1, None),
+            PluginTestRun('/b', '', 0, 0, 'Could not find any tests')])
+
+        self.assertTrue(reporter.failed)
+        self.assertResults('''
+            /a
+
+                01 – 02 Fail
+
+            /b Error
+
+                Could not find any tests
+
+            Plugins 2, Pass 0, Fail 1, Error 1''', reporter.dumps())
@@ -227,7 +227,7 @@ class TestPluginsHaveUpdates(PluginTestCase):
         """
         If no remote repositories have updates.
         """
-        with patch('jig.plugins.tools.remote_has_updates') as rhu:
+        with patch('jig.gitutils.remote.remote_has_updates') as rhu:
             # For each call to ``remote_has_updates``, answer False
             rhu.side_effect = [False, False, False]
 
@@ -240,7 +240,7 @@ class TestPluginsHaveUpdates(PluginTestCase):
         """
         If one remote repository has updates.
         """
-        with patch('jig.plugins.tools.remote_has_updates') as rhu:
+        with patch('jig.gitutils.remote.remote_has_updates') as rhu:
             # Have the last call to ``remote_has_updates`` answer True
             rhu.side_effect = [False, False, True]
 
@@ -254,7 +254,7 @@ class TestPluginsHaveUpdates(PluginTestCase):
         """
         If all repositories have updates.
         """
-        with patch('jig.plugins.tools.remote_has_updates') as rhu:
+        with patch('jig.gitutils.remote.remote_has_updates') as rhu:
             # This time they all report that they have updates
             rhu.side_effect = [True, True, True]
 
@@ -7,8 +7,6 @@ from datetime import datetime
 from calendar import timegm
 from configparser import SafeConfigParser, NoSectionError, NoOptionError
 
-import git
-
 from jig.exc import (
     NotGitRepo, AlreadyInitialized,
     GitRepoNotInitialized)
@@ -17,7 +15,6 @@ from jig.conf import (
     JIG_PLUGIN_DIR, PLUGIN_CONFIG_FILENAME, PLUGIN_PRE_COMMIT_SCRIPT,
     PLUGIN_PRE_COMMIT_TEMPLATE_DIR, CODEC)
 from jig.gitutils.checks import is_git_repo, repo_jiginitialized
-from jig.gitutils.remote import remote_has_updates
 from jig.tools import slugify
 from jig.plugins.manager import PluginManager
 
@@ -126,6 +123,8 @@ def update_plugins(gitrepo):
     the plugins that were updated in each director. The value is the output
     from running the ``git pull`` command inside that directory.
     """
+    import git
+
     jig_plugin_dir = join(gitrepo, JIG_DIR_NAME, JIG_PLUGIN_DIR)
 
     results = {}
@@ -151,6 +150,8 @@ def plugins_have_updates(gitrepo):
 
     :param string gitrepo: path to the Git repository
     """
+    from jig.gitutils.remote import remote_has_updates
+
     jig_plugin_dir = join(gitrepo, JIG_DIR_NAME, JIG_PLUGIN_DIR)
 
     for directory in listdir(jig_plugin_dir):
@@ -0,0 +1,165 @@
+"""
+Profiling jig
+=============
+
+When jig itself is slow, not its plugins, it can profile its own process. Set
+``JIG_PROFILE`` in the environment, which also works for the pre-commit hook,
+or give ``jig runnow``, ``jig report`` or ``jig ci`` the ``--profile`` option::
+
+    $ JIG_PROFILE=1 git commit
+    $ jig runnow --profile memory
+
+``cpu`` (or ``1``) profiles with :py:mod:`cProfile`. ``memory`` also traces
+memory allocations with :py:mod:`tracemalloc`, which makes jig a lot slower.
+
+Each run writes a :file:`.prof` file, and a :file:`.tracemalloc` snapshot for
+``memory``, to :file:`.jig/profiles`. Only the newest
+:data:`jig.conf.JIG_PROFILES_KEEP` runs are kept. The profiles can be looked
+at with :py:mod:`pstats` and :py:meth:`tracemalloc.Snapshot.load`, or any tool
+that reads them.
+"""
+import os
+import sys
+from os import listdir, makedirs, unlink, getpid
+from os.path import join, isdir
+from datetime import datetime
+from contextlib import contextmanager
+from tempfile import gettempdir
+
+from jig.conf import JIG_DIR_NAME, JIG_PROFILES_DIRNAME, JIG_PROFILES_KEEP
+
+# The environment variable that turns profiling on
+PROFILE_ENVIRONMENT = 'JIG_PROFILE'
+
+# The kinds of profile
+PROFILE_CPU = 'cpu'
+PROFILE_MEMORY = 'memory'
+PROFILE_MODES = (PROFILE_CPU, PROFILE_MEMORY)
+
+# How many frames of each allocation tracemalloc keeps
+_TRACEMALLOC_FRAMES = 25
+
+
+def profile_mode(option=None, environ=None):
+    """
+    Which kind of profile to capture, if any.
+
+    The ``option`` given on the command line wins over ``JIG_PROFILE``.
+    Returns ``None`` if jig should not be profiled.
+    """
+    if environ is None:
+        environ = os.environ
+
+    value = (option or environ.get(PROFILE_ENVIRONMENT, '')).strip().lower()
+
+    if value in ('', '0', 'no', 'off', 'false'):
+        return None
+
+    if value == PROFILE_MEMORY:
+        return PROFILE_MEMORY
+
+    return PROFILE_CPU
+
+
+def profiles_dir(gitrepo):
+    """
+    Where the profiles for ``gitrepo`` are written.
+
+    Outside of a repository that jig has been initialized in they go to the
+    temporary directory.
+    """
+    jig_dir = join(gitrepo, JIG_DIR_NAME)
+
+    if isdir(jig_dir):
+        return join(jig_dir, JIG_PROFILES_DIRNAME)
+
+    return join(gettempdir(), 'jig-' + JIG_PROFILES_DIRNAME)
+
+
+def rotate(directory, keep=JIG_PROFILES_KEEP):
+    """
+    Remove all but the newest ``keep`` runs' profiles from ``directory``.
+    """
+    runs = {}
+    for filename in listdir(directory):
+        runs.setdefault(filename.split('.', 1)[0], []).append(filename)
+
+    # The names start with the time, the oldest sort first
+    for run in sorted(runs)[:-keep or None]:
+        for filename in runs[run]:
+            try:
+                unlink(join(directory, filename))
+            except OSError:   # pragma: no cover
+                pass
+
+
+def _write(gitrepo, name, profile, snapshot):
+    """
+    Write the profile and snapshot of a run, returns the files written.
+    """
+    directory = profiles_dir(gitrepo)
+
+    if not isdir(directory):
+        makedirs(directory)
+
+    base = join(directory, '{0}-{1}-{2}'.format(
+        datetime.utcnow().strftime('%Y%m%dT%H%M%S%f'), getpid(), name))
+
+    written = [base + '.prof']
+    profile.dump_stats(written[0])
+
+    if snapshot is not None:
+        written.append(base + '.tracemalloc')
+        snapshot.dump(written[1])
+
+    rotate(directory)
+
+    return written
+
+
+@contextmanager
+def profiled(gitrepo, mode, name='jig'):
+    """
+    Profile what runs inside the context, if ``mode`` is one of
+    :data:`PROFILE_MODES`.
+
+    The profile is written when the context exits, even if jig is exiting
+    with :py:exc:`SystemExit`. Where it was written is shown on stderr.
+
+    :param string gitrepo: the Git repository whose :file:`.jig` directory
+        the profiles go in
+    :param string mode: from :py:func:`profile_mode`
+    :param string name: what is being profiled, part of the file names
+    """
+    if not mode:
+        yield
+        return
+
+    import cProfile
+
+    tracemalloc = None
+    if mode == PROFILE_MEMORY:
+        import tracemalloc
+        tracemalloc.start(_TRACEMALLOC_FRAMES)
+
+    profile = cProfile.Profile()
+    profile.enable()
+
+    try:
+        yield
+    finally:
+        profile.disable()
+
+        snapshot = None
+        if tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+        try:
+            written = _write(gitrepo, name, profile, snapshot)
+        except (IOError, OSError) as e:
+            # Profiling should never be the reason a commit fails
+            sys.stderr.write('Could not write the profile: {0}\n'.format(e))
+        else:
+            sys.stderr.write('Profile written to {0}\n'.format(
+                ', '.join(written)))
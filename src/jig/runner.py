@@ -1,66 +1,118 @@
-import json
+import os
 import sys
 from datetime import datetime
-
-from git import Repo
+from multiprocessing import cpu_count
+from collections import OrderedDict
 
 from jig.exc import GitRepoNotInitialized
-from jig.conf import PLUGIN_CHECK_FOR_UPDATES
+from jig.conf import (
+    PLUGIN_CHECK_FOR_UPDATES, PLUGIN_MAX_JOBS, JIG_TRACE_ENVIRONMENT)
 from jig.gitutils.checks import repo_jiginitialized
-from jig.gitutils.branches import parse_rev_range, prepare_working_directory
-from jig.diffconvert import GitDiffIndex
 from jig.plugins import get_jigconfig, PluginManager
+from jig.plugins.cache import (
+    ResultsCache, ResultsNotes, CheckedPatches, file_key)
+from jig.plugins.durations import PluginDurations
+from jig.plugins.limits import MemoryBudget, memory_budget
+from jig.plugins.scheduler import Scheduler
 from jig.plugins.tools import (
     set_jigconfig, last_checked_for_updates, plugins_have_updates,
     set_checked_for_updates, update_plugins)
 from jig.commands import get_command, list_commands
-from jig.output import ConsoleView, ResultsCollator
+from jig.output import ConsoleView, ResultsCollator, WARN, STOP
 from jig.formatters.fancy import FancyFormatter
-
-try:
-    from collections import OrderedDict
-except ImportError:   # pragma: no cover
-    from ordereddict import OrderedDict
+from jig.timings import Timings
 
 
-def _diff_for(gitrepo, rev_range=None):
+def _diff_for(gitrepo, rev_range=None, paths=None):
     """
     Get a list of :py:class:`git.diff.Diff` objects for the repository.
 
     :param git.repo.base.Repo gitrepo: Git repository
     :param RevRangePair rev_range: optional revision to use instead of the
         Git index
+    :param list paths: optional paths to limit the diff to
     """
     if rev_range:
-        return rev_range.a.diff(rev_range.b)
+        return rev_range.a.diff(rev_range.b, paths=paths)
     else:
         # Assume we want a diff between what is staged and HEAD
         try:
-            return gitrepo.head.commit.diff()
+            return gitrepo.head.commit.diff(paths=paths)
         except ValueError:
             return None
 
 
+def _trees_for(gitrepo, rev_range=None):
+    """
+    The SHA-1s of the two Git trees a run compares.
+
+    Returns ``None`` if they can't be found, an empty repository or an index
+    with conflicts for example.
+
+    :param git.repo.base.Repo gitrepo: Git repository
+    :param RevRangePair rev_range: optional revision to use instead of the
+        Git index
+    """
+    from git.exc import GitCommandError
+
+    if rev_range:
+        return [
+            getattr(i, 'tree', i).hexsha for i in (rev_range.a, rev_range.b)]
+
+    try:
+        return [gitrepo.head.commit.tree.hexsha, gitrepo.git.write_tree()]
+    except (ValueError, GitCommandError):
+        return None
+
+
+def _passed(results):
+    """
+    True if none of the plugins failed or had a warning or a stop about the
+    changes, like a passing run in CI.
+    """
+    collator = ResultsCollator(results)
+
+    return not collator.errors and \
+        collator.counts[WARN] == 0 and collator.counts[STOP] == 0
+
+
 class Runner(object):
 
     """
     Runs jig in a Git repo.
 
     """
-    def __init__(self, view=None, formatter=None):
+    def __init__(self, view=None, formatter=None, jobs=PLUGIN_MAX_JOBS,
+                 cache=False, notes=False, patches=False):
         self.view = view or ConsoleView()
         create_formatter = lambda f: f() if f else FancyFormatter()
         self.formatter = create_formatter(formatter)
+        # Where the time goes while we run
+        self.timings = Timings()
+        # How many plugins can run at the same time
+        self.jobs = jobs or cpu_count()
+        # Reuse the results of the last run for changes already checked, the
+        # hook and runnow turn this on
+        self.cache = cache
+        # Record and reuse the results for ranges of commits in Git notes
+        self.notes = notes
+        # Skip commits in a range that are copies of ones already checked
+        self.patches = patches
 
     def fromhook(self, gitrepo):
         """
         Main entry point called from pre-commit hook.
 
+        A trace of the run is saved to the file named by ``JIG_TRACE_FILE``
+        in the environment, if it's set.
+
         :param unicode gitrepo: path to the Git repository
         """
-        return self.main(gitrepo)
+        return self.main(
+            gitrepo, trace_file=os.environ.get(JIG_TRACE_ENVIRONMENT))
 
-    def main(self, gitrepo, plugin=None, rev_range=None, interactive=True):
+    def main(self, gitrepo, plugin=None, rev_range=None, interactive=True,
+             show_timings=False, timings_file=None, trace_file=None):
         """
         Run Jig on the given Git repository.
 
@@ -71,19 +123,32 @@ class Runner(object):
             index
         :param bool interactive: if True then the user will be prompted to
             commit or cancel when any messages are generated by the plugins.
+        :param bool show_timings: if True then show how long each part of the
+            run and each plugin took
+        :param unicode timings_file: save the timings as JSON to this file
+        :param unicode trace_file: save a trace of the run to this file, in
+            the Chrome trace event format
         """
+        if trace_file:
+            self.timings.trace = True
+
+        # GitPython is slow to import, wait until we need it
+        from jig.gitutils.branches import (
+            parse_rev_range, prepare_working_directory)
+
         sys.stdin = open('/dev/tty')
 
         if interactive:
-            # Check to see if the plugins need updating
-            now = datetime.utcnow()
+            with self.timings.phase('update_check'):
+                # Check to see if the plugins need updating
+                now = datetime.utcnow()
 
-            with self.view.out():
-                last_checked = last_checked_for_updates(gitrepo) or \
-                    datetime.fromtimestamp(0)
+                with self.view.out():
+                    last_checked = last_checked_for_updates(gitrepo) or \
+                        datetime.fromtimestamp(0)
 
-            if now > last_checked + PLUGIN_CHECK_FOR_UPDATES:
-                self.update_plugins(gitrepo)
+                if now > last_checked + PLUGIN_CHECK_FOR_UPDATES:
+                    self.update_plugins(gitrepo)
 
         with self.view.out() as printer:
             if not repo_jiginitialized(gitrepo):
@@ -95,19 +160,34 @@ class Runner(object):
             else:
                 rev_range_parsed = None
 
-            with prepare_working_directory(gitrepo, rev_range_parsed):
-                results = self.results(   # pragma: no branch
-                    gitrepo,
-                    plugin=plugin,
-                    rev_range=rev_range_parsed
-                )
+            with self.timings.phase('prepare'):
+                with prepare_working_directory(gitrepo, rev_range_parsed):
+                    results = self.results(   # pragma: no branch
+                        gitrepo,
+                        plugin=plugin,
+                        rev_range=rev_range_parsed
+                    )
 
             if not results:
                 report_counts = (0, 0, 0)
             else:
-                collator = ResultsCollator(results)
+                with self.timings.phase('collate'):
+                    collator = ResultsCollator(results)
+
+                with self.timings.phase('format'):
+                    report_counts = self.formatter.print_results(
+                        printer, collator)
 
-                report_counts = self.formatter.print_results(printer, collator)
+            if show_timings:
+                printer('')
+                for line in self.timings.report():
+                    printer(line)
+
+            if timings_file:
+                self.timings.write(timings_file)
+
+            if trace_file:
+                self.timings.write_trace(trace_file)
 
         if interactive and report_counts and sum(report_counts):
             # Git will run a pre-commit hook with stdin pointed at /dev/null.
@@ -183,20 +263,123 @@ class Runner(object):
                 if answer and answer[0].lower() == 'n':
                     return False
 
-    def results(self, gitrepo, plugin=None, rev_range=None):
+    def _notify_skipped(self, skipped):
+        """
+        Let the user know the ``skipped`` plugins did not run.
+        """
+        if not skipped:
+            return
+
+        with self.view.out() as printer:
+            printer('Did not run {0}, plugins that run before them '
+                    'stopped the commit or failed.'.format(
+                        ', '.join(i.name for i in skipped)))
+
+    def _cached_results(self, gitrepo, rev_range, plugins):
+        """
+        Look for the results of ``plugins`` in the :py:class:`ResultsCache`.
+
+        Returns a tuple of ``(cache, fingerprint, cached)``. ``cached`` is
+        ``None`` unless the last run checked the same changes. Everything is
+        ``None`` if there are no trees to compare, nothing has been committed
+        yet.
+        """
+        with self.timings.phase('cache'):
+            trees = _trees_for(self.repo, rev_range)
+
+            if not trees:
+                return (None, None, None)
+
+            cache = ResultsCache(gitrepo)
+            fingerprint = cache.fingerprint(trees, plugins)
+
+            return (cache, fingerprint, cache.lookup(fingerprint, plugins))
+
+    def _noted_results(self, rev_range, plugins):
+        """
+        Look for the results of ``plugins`` in the :py:class:`ResultsNotes`.
+
+        Returns a tuple of ``(notes, trees, noted)``. ``trees`` are the ones
+        ``rev_range`` compares and ``noted`` is ``None`` unless the same
+        plugins already checked the changes between them.
+        """
+        with self.timings.phase('notes'):
+            notes = ResultsNotes(self.repo)
+            trees = _trees_for(self.repo, rev_range)
+
+            return (notes, trees, notes.lookup(trees, plugins))
+
+    def _new_commit_paths(self, gitrepo, rev_range, plugins):
+        """
+        Compare the commits in ``rev_range`` with the ones ``plugins`` have
+        already checked, by their patch-ids.
+
+        Returns a tuple of ``(patches, commit_patches, paths)``.
+        ``commit_patches`` are the patch-ids of the commits in the range.
+        ``paths`` are the files changed by the commits that are new, ``None``
+        if every commit is new or ``[]`` if none of them are. They are also
+        ``None`` if there are merges in the range.
+        """
+        from jig.gitutils.patches import patch_ids, changed_paths, has_merges
+
+        with self.timings.phase('patches'):
+            patches = CheckedPatches(gitrepo, plugins)
+            commit_patches = patch_ids(self.repo, rev_range)
+            new_commits = patches.unchecked(commit_patches)
+
+            if len(new_commits) == len(commit_patches):
+                return (patches, commit_patches, None)
+
+            if has_merges(self.repo, rev_range):
+                # Merges have no patch-id and can change files none of the
+                # commits they merge did, resolving a conflict for example
+                return (patches, commit_patches, None)
+
+            # The rest are rebased copies of commits already checked, only
+            # the files the new ones changed need checking
+            return (
+                patches, commit_patches,
+                changed_paths(self.repo, new_commits))
+
+    def results(self, gitrepo, plugin=None, rev_range=None, paths=None,
+                plugin_manager=None):
         """
         Run jig in the repository and return results.
 
         Results will be a dictionary where the keys will be individual plugins
         and the value the result of calling their ``pre_commit()`` methods.
 
+        If the same changes were checked by the same plugins last time, the
+        results are returned from :py:class:`ResultsCache` without running
+        anything. If only some files are different, plugins that report on
+        individual files only check those.
+
+        With ``notes``, the results of checking a ``rev_range`` are also
+        recorded in :py:class:`ResultsNotes` and reused for any range between
+        the same two trees.
+
+        With ``patches``, commits in a ``rev_range`` whose patch-id was
+        checked before are left out. The plugins only check the files changed
+        by the other commits.
+
         :param unicode gitrepo: path to the Git repository
         :param unicode plugin: the name of the plugin to run, if None then run
             all plugins
         :param RevRangePair rev_range: the revision range to use instead of the
             Git index
+        :param list paths: only check these paths, relative to the Git
+            repository
+        :param PluginManager plugin_manager: the plugins to run, instead of
+            the ones installed in ``gitrepo``
         """
-        pm = PluginManager(get_jigconfig(gitrepo))
+        from git import Repo
+
+        from jig.diffconvert import GitDiffIndex
+
+        pm = plugin_manager
+        if pm is None:
+            with self.timings.phase('config'):
+                pm = PluginManager(get_jigconfig(gitrepo))
 
         # Check to make sure we have some plugins to run
         with self.view.out() as printer:
@@ -208,7 +391,45 @@ class Runner(object):
 
             self.repo = Repo(gitrepo)
 
-            diff = _diff_for(self.repo, rev_range)
+            selected = [
+                i for i in pm.plugins if not plugin or i.name == plugin]
+
+            cache = fingerprint = None
+            if self.cache and paths is None:
+                cache, fingerprint, cached = self._cached_results(
+                    gitrepo, rev_range, selected)
+
+                if cached is not None:
+                    # Nothing has changed since the last run
+                    self._notify_skipped(cache.skipped(selected))
+                    return cached
+
+            notes = noted_trees = None
+            if self.notes and rev_range and paths is None:
+                notes, noted_trees, noted = self._noted_results(
+                    rev_range, selected)
+
+                if noted is not None:
+                    # Checked before, on another branch or somewhere else
+                    return noted
+
+            patches = commit_patches = None
+            if self.patches and rev_range and paths is None:
+                patches, commit_patches, paths = self._new_commit_paths(
+                    gitrepo, rev_range, selected)
+
+                if paths == []:
+                    printer(
+                        'Every commit in the range has been checked before, '
+                        'skipping.')
+                    return
+
+                if paths is not None:
+                    # What's checked is no longer the whole range
+                    cache = notes = None
+
+            with self.timings.phase('diff'):
+                diff = _diff_for(self.repo, rev_range, paths)
 
             if diff is None:
                 # No diff on head, no commits have been written yet
@@ -231,22 +452,54 @@ class Runner(object):
         # easier in the context of our plugins.
         gdi = GitDiffIndex(gitrepo, diff)
 
-        # Go through the plugins and gather up the results
+        # Plugins that only check some kinds of files are left out if none of
+        # those changed
+        names = [i.b_path or i.a_path for i in diff]
+        plugins = [i for i in selected if i.matches(names)]
+
+        # Each file this run checks and its name
+        keys = OrderedDict((file_key(i), i.b_path or i.a_path) for i in diff)
+
+        durations = PluginDurations(gitrepo)
+
+        scheduler = Scheduler(
+            gdi, diff, self.jobs, self.timings, durations,
+            MemoryBudget(memory_budget(pm.config)), cache=cache, keys=keys)
+
+        pipeline = scheduler.run(plugins)
+
+        self._notify_skipped(pipeline.skipped)
+
+        # Go through the plugins and gather up the results, in the order they
+        # are installed no matter which order they ran in
         results = OrderedDict()
-        for installed in pm.plugins:
-            if plugin and installed.name != plugin:
-                # This plugin doesn't match the requested
+        for installed in plugins:
+            if installed not in pipeline.finished:
                 continue
 
-            retcode, stdout, stderr = installed.pre_commit(gdi)
+            results[installed] = pipeline.finished[installed]
 
-            try:
-                # Is it JSON data?
-                data = json.loads(stdout)
-            except ValueError:
-                # Not JSON
-                data = stdout
+            if installed in self.timings.plugins:
+                timing = self.timings.plugins[installed]
+                durations.record(
+                    installed, timing.wall, len(diff), maxrss=timing.maxrss)
+
+        durations.save()
+
+        if cache:
+            with self.timings.phase('cache'):
+                cache.store(fingerprint, results, keys, pipeline.skipped)
+                cache.save()
+
+        if notes:
+            with self.timings.phase('notes'):
+                notes.store(noted_trees, selected, results)
 
-            results[installed] = (retcode, data, stderr)
+        if patches and _passed(results):
+            # A commit that had problems has to be checked again next time,
+            # or a rerun would skip it and pass
+            with self.timings.phase('patches'):
+                patches.add(commit_patches.values())
+                patches.save()
 
         return results
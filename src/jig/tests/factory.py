@@ -1,10 +1,8 @@
 # coding=utf-8
+from collections import OrderedDict
+
 from jig.tests.mocks import MockPlugin
 
-try:
-    from collections import OrderedDict
-except ImportError:   # pragma: no cover
-    from ordereddict import OrderedDict
 
 anon_obj = object()
 
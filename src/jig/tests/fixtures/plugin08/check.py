@@ -0,0 +1,22 @@
+def run(git_diff_index, config):
+    out = {}
+    for f in git_diff_index.files():
+        out[f['name']] = []
+        for l in f['diff']:
+            out[f['name']].append(
+                [l[0], 'warn', '{0} is {1}'.format(l[2], l[1])])
+
+    return out
+
+
+def broken(git_diff_index, config):
+    raise ValueError('Something went wrong')
+
+
+def unserializable(git_diff_index, config):
+    return {'files': set()}
+
+
+def slow(git_diff_index, config):
+    import time
+    time.sleep(30)
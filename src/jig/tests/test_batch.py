@@ -0,0 +1,212 @@
+# coding=utf-8
+import sys
+from os import chmod, mkdir
+from os.path import join
+from shutil import copytree
+from tempfile import mkdtemp
+
+from git import Repo
+
+from jig.tests.testcase import JigTestCase
+from jig.plugins import initializer, set_jigconfig, PluginManager
+from jig.formatters.fancy import FancyFormatter
+from jig.formatters.tap import TapFormatter
+from jig.batch import (
+    SharedPlugins, read_repos_file, find_repos, check_repository,
+    report_repositories)
+
+# Warns about every file that has lines added to it
+WARNER_SCRIPT = """#!{0}
+import sys, json
+data = json.load(sys.stdin)
+print(json.dumps(dict(
+    (i['name'], [[None, 'warn', 'changed']]) for i in data['files'])))
+"""
+
+
+class BatchTestCase(JigTestCase):
+
+    """
+    Creates jig-initialized repositories with a plugin installed.
+
+    """
+    def setUp(self):
+        super(BatchTestCase, self).setUp()
+
+        self.plugindir = mkdtemp()
+
+        with open(join(self.plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = warner\n')
+
+        script = join(self.plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(WARNER_SCRIPT.format(sys.executable))
+        chmod(script, 0o755)
+
+    def create_repo(self, plugindir=None):
+        """
+        A repository with two commits and the plugin installed.
+        """
+        gitrepodir = mkdtemp()
+        Repo.init(gitrepodir)
+
+        # Each repository has its own copy of the plugin
+        installed = join(mkdtemp(), 'warner')
+        copytree(plugindir or self.plugindir, installed)
+
+        pm = PluginManager(initializer(gitrepodir))
+        pm.add(installed)
+        set_jigconfig(gitrepodir, pm.config)
+
+        self.commit(gitrepodir, 'a.txt', 'a\n')
+        self.commit(gitrepodir, 'b.txt', 'b\n')
+
+        return gitrepodir
+
+
+class TestRepositories(JigTestCase):
+
+    """
+    Find the repositories to report on.
+
+    """
+    def test_read_repos_file(self):
+        """
+        Paths are read one per line, relative to the file.
+        """
+        directory = mkdtemp()
+        filename = join(directory, 'repos.txt')
+
+        with open(filename, 'w') as fh:
+            fh.write('# Services\none\n\n  /srv/two  \n')
+
+        self.assertEqual(
+            [join(directory, 'one'), '/srv/two'], read_repos_file(filename))
+
+    def test_find_repos(self):
+        """
+        Only jig-initialized repositories are found.
+        """
+        directory = mkdtemp()
+
+        for name in ('one', 'two', 'plain'):
+            Repo.init(join(directory, 'group', name))
+
+        initializer(join(directory, 'group', 'one'))
+        initializer(join(directory, 'group', 'two'))
+
+        self.assertEqual(
+            [join(directory, 'group', 'one'), join(directory, 'group', 'two')],
+            find_repos(directory))
+
+
+class TestSharedPlugins(BatchTestCase):
+
+    """
+    Repositories with the same plugins share them.
+
+    """
+    def test_same_plugins(self):
+        """
+        Copies of the same plugin are only loaded once.
+        """
+        shared = SharedPlugins()
+
+        first = shared.manager(self.create_repo())
+        second = shared.manager(self.create_repo())
+
+        self.assertIs(first, second)
+        self.assertEqual(1, len(shared))
+
+    def test_different_plugins(self):
+        """
+        A plugin with different files is not shared.
+        """
+        shared = SharedPlugins()
+
+        other = join(mkdtemp(), 'other')
+        copytree(self.plugindir, other)
+        with open(join(other, 'pre-commit'), 'a') as fh:
+            fh.write('# changed\n')
+
+        first = shared.manager(self.create_repo())
+        second = shared.manager(self.create_repo(plugindir=other))
+
+        self.assertIsNot(first, second)
+        self.assertEqual(2, len(shared))
+
+
+class TestReportRepositories(BatchTestCase):
+
+    """
+    Report on many repositories in one go.
+
+    """
+    def test_check_repository(self):
+        """
+        The results of one repository are formatted.
+        """
+        report = check_repository(
+            self.create_repo(), SharedPlugins(), FancyFormatter,
+            'HEAD^1..HEAD')
+
+        self.assertFalse(report.failed)
+        self.assertEqual(1, report.problems)
+        self.assertIn('b.txt', '\n'.join(report.lines))
+
+    def test_not_initialized(self):
+        """
+        A repository that can't be checked is reported as failed.
+        """
+        gitrepodir = mkdtemp()
+        Repo.init(gitrepodir)
+
+        report = check_repository(
+            gitrepodir, SharedPlugins(), FancyFormatter, 'HEAD^1..HEAD')
+
+        self.assertTrue(report.failed)
+        self.assertEqual(
+            ['This repository has not been initialized.'], report.notices)
+
+    def test_fancy(self):
+        """
+        Each repository has a heading and there is a summary at the end.
+        """
+        repos = [self.create_repo(), self.create_repo()]
+        missing = join(mkdtemp(), 'missing')
+        mkdir(missing)
+
+        lines = []
+        reports = report_repositories(
+            lines.append, repos + [missing], FancyFormatter, 'HEAD^1..HEAD',
+            jobs=2)
+
+        output = '\n'.join(lines)
+
+        self.assertEqual(3, len(reports))
+        for gitrepodir in repos + [missing]:
+            self.assertIn('▸  {0}'.format(gitrepodir), output)
+        self.assertIn(
+            'Jig checked 3 repositories, 2 with problems, 1 could not be '
+            'checked', output)
+
+    def test_tap(self):
+        """
+        Each repository is a subtest of one TAP stream.
+        """
+        repos = [self.create_repo(), self.create_repo()]
+
+        lines = []
+        report_repositories(
+            lines.append, repos, TapFormatter, 'HEAD^1..HEAD')
+
+        output = '\n'.join(lines)
+
+        self.assertEqual('TAP version 13', lines[0])
+        self.assertEqual(1, output.count('TAP version'))
+        self.assertEqual('1..2', lines[-1])
+        self.assertIn('    1..1\n    not ok 1 - b.txt', output)
+        for gitrepodir in repos:
+            self.assertIn('# Subtest: {0}'.format(gitrepodir), output)
+            self.assertRegex(
+                output, r'not ok \d - {0}'.format(gitrepodir))
@@ -9,7 +9,8 @@ from mock import Mock
 from git import Repo
 
 from jig.tests.testcase import JigTestCase
-from jig.diffconvert import describe_diff, DiffType, GitDiffIndex
+from jig.diffconvert import (
+    describe_diff, describe_ranges, DiffType, GitDiffIndex)
 from jig.tools import cwd_bounce
 
 
@@ -245,6 +246,59 @@ class TestDescribeDiff(JigTestCase):
             (6, ' ', 'four')]
 
 
+class TestDescribeRanges(JigTestCase):
+
+    """
+    Changed lines as ranges of line numbers.
+
+    """
+    def test_all_same(self):
+        """
+        Nothing changed.
+        """
+        self.assertEqual(
+            {'added': [], 'removed': [], 'hunks': []},
+            describe_ranges('one\ntwo', 'one\ntwo'))
+
+    def test_all_addition(self):
+        """
+        A new file is one range of added lines.
+        """
+        self.assertEqual(
+            {'added': [[1, 3]], 'removed': [], 'hunks': [[0, 0, 1, 3]]},
+            describe_ranges('', 'one\ntwo\nthree'))
+
+    def test_complex_01(self):
+        """
+        Several changes, in both old and new numbering.
+        """
+        ranges = describe_ranges(
+            'one\ntwo\nthree\nthree-and-a-smidge\nfour',
+            'one\n1.5\ntwo\nthree\n\nfour')
+
+        self.assertEqual([[2, 2], [5, 5]], ranges['added'])
+        self.assertEqual([[4, 4]], ranges['removed'])
+        self.assertEqual([[1, 0, 2, 1], [4, 1, 5, 1]], ranges['hunks'])
+
+    def test_matches_describe_diff(self):
+        """
+        The ranges cover the same lines describe_diff reports.
+        """
+        a = 'a\nb\nc\nd\ne\nf'
+        b = 'x\na\nc\nD\nE\nf\ng'
+
+        ranges = describe_ranges(a, b)
+
+        def lines(kind):
+            return [i[0] for i in describe_diff(a, b) if i[1] == kind]
+
+        def expand(ranges):
+            return [i for s, e in ranges for i in range(s, e + 1)]
+
+        self.assertEqual(lines('+'), expand(ranges['added']))
+        self.assertEqual(lines('-'), expand(ranges['removed']))
+
+
 class TestDiffType(JigTestCase):
 
     """
@@ -366,6 +420,11 @@ class TestGitDiffIndex(JigTestCase):
         # And we have a list of differences as expected
         self.assertEqual(47, len(diff))
 
+        # The ranges cover the same lines
+        added = [i[0] for i in diff if i[1] == '+']
+        self.assertEqual(added[0], file1['ranges']['added'][0][0])
+        self.assertEqual(added[-1], file1['ranges']['added'][-1][1])
+
     def test_deleted_file(self):
         """
         Handles deleted files.
@@ -474,3 +533,20 @@ class TestGitDiffIndex(JigTestCase):
 
         # If we ignored the symlink, which we should, there should be no files
         self.assertEqual(0, len(list(gdi.files())))
+
+    def test_freeze(self):
+        """
+        A frozen index has read the diff of every file already.
+        """
+        gdi = self.git_diff_index(self.testrepo, self.testdiffs[0])
+
+        frozen = gdi.freeze()
+
+        file1 = next(frozen.files())
+
+        self.assertEqual('argument.txt', file1['name'])
+        self.assertIsInstance(file1['diff'], list)
+        self.assertEqual((1, '+', 'The cast:'), file1['diff'][0])
+        # And it can be read more than once
+        self.assertEqual(1, len(list(frozen.files())))
+        self.assertEqual(1, len(list(frozen.files())))
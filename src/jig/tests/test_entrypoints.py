@@ -0,0 +1,124 @@
+import os
+from shutil import rmtree
+from os.path import join
+
+from mock import patch
+
+from jig.tests.testcase import JigTestCase
+from jig.plugins import initializer
+from jig.entrypoints import hook, measure_import
+
+
+class TestHook(JigTestCase):
+
+    """
+    The pre-commit hook skips the runner when there is nothing to check.
+
+    """
+    def setUp(self):
+        super(TestHook, self).setUp()
+
+        initializer(self.gitrepodir)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a')
+
+    def test_nothing_staged(self):
+        """
+        Exits without running if nothing is staged.
+        """
+        with patch('jig.runner.Runner') as runner:
+            with self.assertRaises(SystemExit) as ec:
+                hook(self.gitrepodir)
+
+        self.assertSystemExitCode(ec.exception, 0)
+        self.assertFalse(runner.called)
+
+    def test_only_jig_directory_staged(self):
+        """
+        Exits without running if only files in .jig are staged.
+        """
+        self.stage(self.gitrepodir, '.jig/a.txt', 'a')
+
+        with patch('jig.runner.Runner') as runner:
+            with self.assertRaises(SystemExit) as ec:
+                hook(self.gitrepodir)
+
+        self.assertSystemExitCode(ec.exception, 0)
+        self.assertFalse(runner.called)
+
+    def test_jigplugins_file_staged(self):
+        """
+        Starts the runner if a file outside .jig that starts with .jig is
+        staged.
+        """
+        self.stage(self.gitrepodir, '.jigplugins.txt', 'http://plugins')
+
+        with patch('jig.runner.Runner') as runner:
+            hook(self.gitrepodir)
+
+        runner.return_value.fromhook.assert_called_once_with(
+            self.gitrepodir)
+
+    def test_staged_changes(self):
+        """
+        Starts the runner if something has been staged.
+        """
+        self.stage(self.gitrepodir, 'a.txt', 'aa')
+
+        with patch('jig.runner.Runner') as runner:
+            hook(self.gitrepodir)
+
+        # Committing what runnow already checked reuses its results
+        runner.assert_called_once_with(cache=True)
+        runner.return_value.fromhook.assert_called_once_with(
+            self.gitrepodir)
+
+    def test_not_initialized(self):
+        """
+        The runner reports on repositories that are not initialized.
+        """
+        rmtree(join(self.gitrepodir, '.jig'))
+
+        with patch('jig.runner.Runner') as runner:
+            hook(self.gitrepodir)
+
+        runner.return_value.fromhook.assert_called_once_with(
+            self.gitrepodir)
+
+    def test_profile(self):
+        """
+        The hook is profiled if JIG_PROFILE is set.
+        """
+        with patch.dict('os.environ', {'JIG_PROFILE': '1'}):
+            with patch('sys.stderr'):
+                with self.assertRaises(SystemExit):
+                    hook(self.gitrepodir)
+
+        profiles = os.listdir(join(self.gitrepodir, '.jig', 'profiles'))
+
+        self.assertEqual(1, len(profiles))
+        self.assertTrue(profiles[0].endswith('-hook.prof'))
+
+
+class TestMeasureImport(JigTestCase):
+
+    """
+    Keep the imports needed by the pre-commit hook light.
+
+    """
+    def test_hook_import_is_light(self):
+        """
+        The heavy dependencies are not imported by the hook.
+        """
+        timings, heavy = measure_import(repeat=1)
+
+        self.assertEqual(1, len(timings))
+        self.assertEqual([], heavy)
+
+    def test_reports_heavy_modules(self):
+        """
+        Heavy modules that are imported are reported.
+        """
+        timings, heavy = measure_import('import git', repeat=1)
+
+        self.assertEqual(['git'], heavy)
@@ -1,12 +1,14 @@
 # coding=utf-8
 from io import StringIO
 
+from jig.exc import ForcedExit
 from jig.tests import factory
 from jig.tests.testcase import JigTestCase
 from jig.tests.mocks import MockPlugin
 from jig.formatters.utils import green_bold, yellow_bold, red_bold
 from jig.output import (
-    strip_paint, utf8_writer, Message, Error, ResultsCollator)
+    strip_paint, utf8_writer, console_stream, BufferedPrinter, ConsoleView,
+    Message, Error, ResultsCollator)
 
 
 class TestStripPaint(JigTestCase):
@@ -61,6 +63,68 @@ class TestUTF8Writer(JigTestCase):
 
         self.assertEqual(collector.getvalue(), '\xe2\x98\x86')
 
+    def test_text_stream(self):
+        """
+        Streams that take text are not wrapped.
+        """
+        collector = StringIO()
+
+        self.assertIs(collector, console_stream(collector))
+
+
+class TestBufferedPrinter(JigTestCase):
+
+    """
+    Lines are printed a batch at a time.
+
+    """
+    def test_buffers_lines(self):
+        """
+        Nothing is written until the buffer is full.
+        """
+        collector = StringIO()
+        printer = BufferedPrinter(collector, size=3)
+
+        printer('a')
+        printer('b')
+
+        self.assertEqual('', collector.getvalue())
+
+        printer('c')
+        printer('d')
+
+        self.assertEqual('a\nb\nc\n', collector.getvalue())
+
+        printer.flush()
+
+        self.assertEqual('a\nb\nc\nd\n', collector.getvalue())
+
+    def test_flushed_by_view(self):
+        """
+        Everything printed is written when the view's context exits.
+        """
+        view = ConsoleView(collect_output=True, exit_on_exception=False)
+
+        with view.out() as printer:
+            printer('a')
+            printer('')
+
+        self.assertEqual('a\n\n', view._collect['stdout'].getvalue())
+
+    def test_flushed_before_error(self):
+        """
+        What was printed before an error is written.
+        """
+        view = ConsoleView(collect_output=True, exit_on_exception=False)
+
+        with self.assertRaises(ForcedExit):
+            with view.out() as printer:
+                printer('a')
+                raise Exception('b')
+
+        self.assertEqual('a\n', view._collect['stdout'].getvalue())
+        self.assertEqual('b\n', view._collect['stderr'].getvalue())
+
 
 class TestMessage(JigTestCase):
 
@@ -259,6 +323,25 @@ class TestResultsCollator(JigTestCase):
         # And we should have no errors
         self.assertEqual([], rc.errors)
 
+    def test_decoded_data(self):
+        """
+        Tuples and bytes are collated like the lists and strings JSON has.
+        """
+        stdout = {
+            b'a.txt': ((1, b'warn', b'Warn A'),),
+            'b.txt': [(None, 'stop', b'Stop B')]}
+
+        rc = ResultsCollator({MockPlugin(): (0, stdout, '')})
+
+        cm, fm, lm = rc.messages
+
+        self.assertEqual(
+            [Message(None, type='warn', body='Warn A', file='a.txt', line=1)],
+            lm)
+        self.assertEqual(
+            [Message(None, type='stop', body='Stop B', file='b.txt')], fm)
+        self.assertEqual([], rc.errors)
+
     def test_one_of_each(self):
         """
         One of each type of message is captured.
@@ -0,0 +1,115 @@
+import os
+import pstats
+import tracemalloc
+from os.path import join
+from tempfile import mkdtemp
+
+from mock import patch
+
+from jig.tests.testcase import JigTestCase
+from jig.profiling import (
+    PROFILE_CPU, PROFILE_MEMORY, profile_mode, profiled, profiles_dir,
+    rotate)
+
+
+class TestProfiling(JigTestCase):
+
+    """
+    Jig can profile itself.
+
+    """
+    def setUp(self):
+        super(TestProfiling, self).setUp()
+
+        self.gitrepo = mkdtemp()
+        os.mkdir(join(self.gitrepo, '.jig'))
+
+        self.directory = join(self.gitrepo, '.jig', 'profiles')
+
+    def test_profile_mode(self):
+        """
+        The option wins over the environment.
+        """
+        self.assertIsNone(profile_mode(environ={}))
+        self.assertIsNone(profile_mode(environ={'JIG_PROFILE': '0'}))
+        self.assertEqual(
+            PROFILE_CPU, profile_mode(environ={'JIG_PROFILE': 'yes'}))
+        self.assertEqual(
+            PROFILE_MEMORY, profile_mode(environ={'JIG_PROFILE': 'Memory'}))
+        self.assertEqual(
+            PROFILE_MEMORY,
+            profile_mode(PROFILE_MEMORY, environ={'JIG_PROFILE': 'cpu'}))
+
+    def test_profiles_dir(self):
+        """
+        Profiles go in the .jig directory if there is one.
+        """
+        self.assertEqual(self.directory, profiles_dir(self.gitrepo))
+        self.assertNotIn(
+            '.jig', profiles_dir(mkdtemp()).split(os.sep))
+
+    def test_not_profiled(self):
+        """
+        Nothing is written without a mode.
+        """
+        with profiled(self.gitrepo, None):
+            pass
+
+        self.assertFalse(os.path.exists(self.directory))
+
+    def test_cpu(self):
+        """
+        A cProfile profile is written, even when exiting.
+        """
+        with patch('sys.stderr') as stderr:
+            with self.assertRaises(SystemExit):
+                with profiled(self.gitrepo, PROFILE_CPU, 'runnow'):
+                    sorted(range(1000))
+                    raise SystemExit(0)
+
+        filename, = os.listdir(self.directory)
+
+        self.assertTrue(filename.endswith('-runnow.prof'))
+        self.assertIn(filename, stderr.write.call_args[0][0])
+
+        stats = pstats.Stats(join(self.directory, filename))
+
+        self.assertTrue(any(
+            i[2] == '<built-in method builtins.sorted>' for i in stats.stats))
+
+    def test_memory(self):
+        """
+        Memory profiles also have a tracemalloc snapshot.
+        """
+        with patch('sys.stderr'):
+            with profiled(self.gitrepo, PROFILE_MEMORY):
+                [str(i) for i in range(1000)]
+
+        self.assertFalse(tracemalloc.is_tracing())
+
+        filenames = sorted(os.listdir(self.directory))
+
+        self.assertEqual(['.prof', '.tracemalloc'], [
+            os.path.splitext(i)[1] for i in filenames])
+
+        snapshot = tracemalloc.Snapshot.load(
+            join(self.directory, filenames[1]))
+
+        self.assertTrue(snapshot.traces)
+
+    def test_rotate(self):
+        """
+        Only the newest runs are kept.
+        """
+        os.mkdir(self.directory)
+
+        for run in ('1', '2', '3'):
+            for extension in ('.prof', '.tracemalloc'):
+                with open(join(self.directory, run + extension), 'w'):
+                    pass
+
+        rotate(self.directory, keep=2)
+
+        self.assertEqual(
+            ['2.prof', '2.tracemalloc', '3.prof', '3.tracemalloc'],
+            sorted(os.listdir(self.directory)))
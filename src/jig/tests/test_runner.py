@@ -1,6 +1,6 @@
 from shutil import rmtree
 from os.path import join
-from contextlib import nested
+from contextlib import ExitStack
 from datetime import datetime, timedelta
 
 from mock import patch
@@ -11,7 +11,8 @@ from jig.conf import PLUGIN_CHECK_FOR_UPDATES
 from jig.commands.hints import GIT_REPO_NOT_INITIALIZED
 from jig.tests.mocks import MockPlugin
 from jig.exc import ForcedExit
-from jig.plugins import set_jigconfig, Plugin
+from jig.plugins import set_jigconfig, Plugin, PluginManager
+from jig.plugins.durations import PluginDurations
 from jig.runner import Runner
 from jig.gitutils.branches import parse_rev_range
 
@@ -72,11 +73,11 @@ class TestRunner(RunnerTestCase, PluginTestCase):
             # No results came back from any plugin
             Runner.results.return_value = []
 
-            with nested(
-                patch('jig.runner.raw_input', create=True),
-                patch('jig.runner.sys'),
-                self.assertRaises(SystemExit)
-            ) as (ri, r_sys, ec):
+            with ExitStack() as stack:
+                ri = stack.enter_context(
+                    patch('jig.runner.raw_input', create=True))
+                r_sys = stack.enter_context(patch('jig.runner.sys'))
+                ec = stack.enter_context(self.assertRaises(SystemExit))
                 r_sys.exit.side_effect = SystemExit
                 self.runner.main(self.gitrepodir)
 
@@ -97,11 +98,11 @@ class TestRunner(RunnerTestCase, PluginTestCase):
         self.commit(self.gitrepodir, 'a.txt', 'a')
         self.stage(self.gitrepodir, 'b.txt', 'b')
 
-        with nested(
-            patch('jig.runner.raw_input', create=True),
-            patch('jig.runner.sys'),
-            self.assertRaises(SystemExit)
-        ) as (ri, r_sys, ec):
+        with ExitStack() as stack:
+            ri = stack.enter_context(
+                patch('jig.runner.raw_input', create=True))
+            r_sys = stack.enter_context(patch('jig.runner.sys'))
+            ec = stack.enter_context(self.assertRaises(SystemExit))
             # Fake the raw_input call to return 's'
             r_sys.exit.side_effect = SystemExit
             ri.return_value = 's'
@@ -125,10 +126,10 @@ class TestRunner(RunnerTestCase, PluginTestCase):
         self.commit(self.gitrepodir, 'a.txt', 'a')
         self.stage(self.gitrepodir, 'b.txt', 'b')
 
-        with nested(
-            patch('jig.runner.raw_input', create=True),
-            patch('jig.runner.sys')
-        ) as (ri, r_sys):
+        with ExitStack() as stack:
+            ri = stack.enter_context(
+                patch('jig.runner.raw_input', create=True))
+            r_sys = stack.enter_context(patch('jig.runner.sys'))
             # Fake the raw_input call to return 'c'
             ri.return_value = 'c'
 
@@ -151,10 +152,10 @@ class TestRunner(RunnerTestCase, PluginTestCase):
         self.commit(self.gitrepodir, 'a.txt', 'a')
         self.stage(self.gitrepodir, 'b.txt', 'b')
 
-        with nested(
-            patch('jig.runner.raw_input', create=True),
-            patch('jig.runner.sys')
-        ) as (ri, r_sys):
+        with ExitStack() as stack:
+            ri = stack.enter_context(
+                patch('jig.runner.raw_input', create=True))
+            r_sys = stack.enter_context(patch('jig.runner.sys'))
             # Fake the raw_input call to return 'c' only after giving
             # two incorrect options.
             ri.side_effect = ['1', '2', 'c']
@@ -175,11 +176,11 @@ class TestRunner(RunnerTestCase, PluginTestCase):
         self.commit(self.gitrepodir, 'a.txt', 'a')
         self.stage(self.gitrepodir, 'b.txt', 'b')
 
-        with nested(
-            patch('jig.runner.raw_input', create=True),
-            patch('jig.runner.sys'),
-            self.assertRaises(SystemExit)
-        ) as (ri, r_sys, ec):
+        with ExitStack() as stack:
+            ri = stack.enter_context(
+                patch('jig.runner.raw_input', create=True))
+            r_sys = stack.enter_context(patch('jig.runner.sys'))
+            ec = stack.enter_context(self.assertRaises(SystemExit))
             # Fake the raw_input call to return 'c'
             ri.side_effect = KeyboardInterrupt
             r_sys.exit.side_effect = SystemExit
@@ -555,6 +556,45 @@ class TestRunnerResults(RunnerTestCase, PluginTestCase):
             len(self.runner.results(self.gitrepodir, plugin='notinstalled'))
         )
 
+    def test_records_durations(self):
+        """
+        How long each plugin took is remembered for the next run.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        results = self.runner.results(self.gitrepodir)
+
+        installed = list(results.keys())[0]
+        stats = PluginDurations(self.gitrepodir).stats(installed)
+
+        self.assertEqual(1, stats['runs'])
+        self.assertIn('1', stats['files'])
+
+    def test_results_in_installed_order(self):
+        """
+        Plugins start longest first but results keep the installed order.
+        """
+        self._add_plugin(self.jigconfig, 'plugin01')
+        self._add_plugin(self.jigconfig, 'plugin05')
+        set_jigconfig(self.gitrepodir, config=self.jigconfig)
+
+        self.commit(self.gitrepodir, name='a.txt', content='a')
+        self.stage(self.gitrepodir, name='b.txt', content='b')
+
+        pm = PluginManager(self.jigconfig)
+        durations = PluginDurations(self.gitrepodir)
+        durations.record(pm.plugins[1], 5.0, 1)
+        durations.save()
+
+        results = self.runner.results(self.gitrepodir)
+
+        self.assertEqual(
+            ['plugin01', 'plugin05'], [i.name for i in results.keys()])
+
     def test_handles_non_json_stdout(self):
         """
         Supports non-JSON output from the plugin.
@@ -0,0 +1,247 @@
+import sys
+import json
+from os import chmod
+from os.path import join
+from tempfile import mkdtemp
+from threading import Thread
+
+from mock import patch
+
+from jig.tests.testcase import JigTestCase, RunnerTestCase, PluginTestCase
+from jig.tests.mocks import MockPlugin
+from jig.plugins import PluginManager, set_jigconfig
+from jig.timings import Timings, PluginTiming, Span
+
+
+class TestTimings(JigTestCase):
+
+    """
+    Collect the time spent in phases of a run.
+
+    """
+    def setUp(self):
+        super(TestTimings, self).setUp()
+
+        self.timings = Timings()
+
+    def test_phase(self):
+        """
+        Time spent in a phase is recorded.
+        """
+        with patch('jig.timings.time') as t:
+            t.side_effect = [1.0, 3.0]
+
+            with self.timings.phase('diff'):
+                pass
+
+        self.assertEqual({'diff': 2.0}, self.timings.phases)
+
+    def test_phase_adds_up(self):
+        """
+        Entering the same phase again adds to it.
+        """
+        with patch('jig.timings.time') as t:
+            t.side_effect = [1.0, 2.0, 5.0, 7.0]
+
+            with self.timings.phase('diff'):
+                pass
+
+            with self.timings.phase('diff'):
+                pass
+
+        self.assertEqual({'diff': 3.0}, self.timings.phases)
+
+    def test_nested_phases(self):
+        """
+        Time in an inner phase is not counted in the outer one.
+        """
+        with patch('jig.timings.time') as t:
+            t.side_effect = [1.0, 2.0, 6.0, 7.0]
+
+            with self.timings.phase('json_encode'):
+                with self.timings.phase('blob_reads'):
+                    pass
+
+        self.assertEqual(
+            {'json_encode': 2.0, 'blob_reads': 4.0},
+            self.timings.phases)
+
+    def test_write(self):
+        """
+        Timings can be saved as JSON.
+        """
+        plugin = MockPlugin(name='plugin01')
+        plugin.bundle = 'bundle'
+
+        self.timings.phases['diff'] = 0.5
+        self.timings.add_plugin(plugin, PluginTiming(
+            wall=1.5, cpu=1.0, maxrss=1024, stdin_bytes=10, stdout_bytes=2))
+
+        filename = join(mkdtemp(), 'timings.json')
+        self.timings.write(filename)
+
+        with open(filename) as fh:
+            data = json.load(fh)
+
+        self.assertEqual({'diff': 0.5}, data['phases'])
+        self.assertEqual([{
+            'bundle': 'bundle', 'name': 'plugin01', 'wall': 1.5, 'cpu': 1.0,
+            'maxrss': 1024, 'stdin_bytes': 10, 'stdout_bytes': 2}],
+            data['plugins'])
+
+    def test_report(self):
+        """
+        The slowest plugins are reported first.
+        """
+        fast = MockPlugin(name='fast')
+        slow = MockPlugin(name='slow')
+
+        self.timings.phases['diff'] = 0.5
+        self.timings.add_plugin(fast, PluginTiming(0.1, 0.1, 10, 10, 2))
+        self.timings.add_plugin(slow, PluginTiming(2.0, 1.5, 10, 10, 2))
+
+        report = self.timings.report()
+
+        self.assertEqual('Timings', report[0])
+        self.assertIn('diff', report[2])
+        self.assertIn('500.0ms', report[2])
+        self.assertIn('slow', report[5])
+        self.assertIn('fast', report[6])
+
+
+class TestTrace(JigTestCase):
+
+    """
+    Spans of a run can be saved as a trace.
+
+    """
+    def setUp(self):
+        super(TestTrace, self).setUp()
+
+        self.timings = Timings(trace=True)
+        self.timings.started = 1.0
+
+    def test_not_tracing(self):
+        """
+        Spans are only kept when tracing.
+        """
+        timings = Timings()
+
+        with timings.phase('diff'):
+            pass
+
+        self.assertEqual([], timings.spans)
+
+    def test_phase_spans(self):
+        """
+        Nested phases each have a span of the whole time they took.
+        """
+        with patch('jig.timings.time') as t:
+            t.side_effect = [1.0, 2.0, 6.0, 7.0]
+
+            with self.timings.phase('json_encode'):
+                with self.timings.phase('blob_reads'):
+                    pass
+
+        self.assertEqual([
+            Span('blob_reads', 'jig', 2.0, 6.0),
+            Span('json_encode', 'jig', 1.0, 7.0)], self.timings.spans)
+
+    def test_tracks(self):
+        """
+        Spans go on the track of the thread they happened in.
+        """
+        def run():
+            with self.timings.track('test:plugin'):
+                self.timings.add_span('run', 2.0, 3.0)
+
+        thread = Thread(target=run)
+        thread.start()
+        thread.join()
+
+        self.timings.add_span('collate', 3.0, 3.5)
+
+        self.assertEqual(
+            ['test:plugin', 'jig'], [i.track for i in self.timings.spans])
+
+    def test_merged_spans(self):
+        """
+        The spans of shards are kept when their phases are added.
+        """
+        shard = Timings(trace=True)
+        shard.add_span('run', 2.0, 3.0, track='shard 1')
+
+        self.timings.add_phases(shard)
+
+        self.assertEqual(
+            [Span('run', 'shard 1', 2.0, 3.0)], self.timings.spans)
+
+    def test_write_trace(self):
+        """
+        The trace is in the Chrome trace event format.
+        """
+        self.timings.add_span('diff', 1.5, 1.75)
+        self.timings.add_span('run', 2.0, 3.0, track='test:plugin')
+        self.timings.add_span('spawn', 2.0, 2.25, track='test:plugin')
+
+        filename = join(mkdtemp(), 'trace.json')
+        self.timings.write_trace(filename)
+
+        with open(filename) as fh:
+            events = json.load(fh)['traceEvents']
+
+        names = dict(
+            (i['tid'], i['args']['name']) for i in events
+            if i['name'] == 'thread_name')
+
+        self.assertEqual({1: 'jig', 2: 'test:plugin'}, names)
+
+        spans = [i for i in events if i['ph'] == 'X']
+
+        self.assertEqual(
+            [('diff', 1, 500000, 250000), ('run', 2, 1000000, 1000000),
+             ('spawn', 2, 1000000, 250000)],
+            [(i['name'], i['tid'], i['ts'], i['dur']) for i in spans])
+
+
+class TestRunnerTrace(RunnerTestCase, PluginTestCase):
+
+    """
+    Each plugin that runs has a track of its own.
+
+    """
+    def test_plugin_spans(self):
+        """
+        When the plugin was started, sent its input and ran are traced.
+        """
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write('[plugin]\nbundle = test\nname = traced\n')
+
+        script = join(plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write('#!{0}\nimport sys\nsys.stdin.read()\n'
+                     'print("{{}}")\n'.format(sys.executable))
+        chmod(script, 0o755)
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+        set_jigconfig(self.gitrepodir, pm.config)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a\n')
+        self.stage(self.gitrepodir, 'a.txt', 'changed a\n')
+
+        self.runner.cache = False
+        self.runner.timings.trace = True
+        self.runner.results(self.gitrepodir)
+
+        tracks = {}
+        for span in self.runner.timings.spans:
+            tracks.setdefault(span.track, set()).add(span.name)
+
+        self.assertTrue(
+            set(['config', 'diff', 'scheduler']) <= tracks['jig'])
+        self.assertTrue(
+            set(['json_encode', 'plugins', 'spawn', 'write', 'run', 'read'])
+            <= tracks['test:traced'])
@@ -1,5 +1,7 @@
 # coding=utf-8
+from os import listdir, makedirs, chmod
 from os.path import join, dirname
+from tempfile import mkdtemp
 
 from jig.tools import NumberedDirectoriesToGit, slugify, indent
 from jig.tests.testcase import JigTestCase
@@ -183,6 +185,49 @@ class TestNumberedDirectoriesToGit(JigTestCase):
         # And 4 diffs
         self.assertEqual(4, len(nd2g.diffs()))
 
+    def test_history_not_checked_out(self):
+        """
+        The history can be looked at without any files on disk.
+        """
+        nd2g = self.get_nd2g('group-a')
+
+        self.assertEqual(1, len(nd2g.diffs()))
+        self.assertEqual(['.git'], listdir(nd2g.target))
+
+        # Until the repository is asked for
+        self.assertEqual(
+            ['.git', 'a.txt', 'b.txt'], sorted(listdir(nd2g.repo.working_dir)))
+
+    def test_same_content(self):
+        """
+        Files with the same content in many snapshots are the same blob.
+        """
+        nd = mkdtemp()
+        for snapshot, filename in (('01', 'a.txt'), ('02', 'b.txt')):
+            makedirs(join(nd, snapshot))
+            with open(join(nd, snapshot, filename), 'w') as fh:
+                fh.write('same\n')
+
+        repo = NumberedDirectoriesToGit(nd).repo
+
+        self.assertEqual(
+            repo.commit('HEAD^1').tree['a.txt'].hexsha,
+            repo.commit('HEAD').tree['b.txt'].hexsha)
+
+    def test_executable_file(self):
+        """
+        Files that can be executed keep their mode.
+        """
+        nd = mkdtemp()
+        makedirs(join(nd, '01'))
+        with open(join(nd, '01', 'run.sh'), 'w') as fh:
+            fh.write('#!/bin/sh\n')
+        chmod(join(nd, '01', 'run.sh'), 0o755)
+
+        repo = NumberedDirectoriesToGit(nd).repo
+
+        self.assertEqual(0o100755, repo.commit('HEAD').tree['run.sh'].mode)
+
 
 class TestIndent(JigTestCase):
 
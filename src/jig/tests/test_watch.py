@@ -0,0 +1,222 @@
+import sys
+from os import chmod, mkdir, remove
+from os.path import join
+from tempfile import mkdtemp
+
+from jig.tests.testcase import JigTestCase, RunnerTestCase, PluginTestCase
+from jig.plugins import set_jigconfig, PluginManager
+from jig.watch import (
+    InotifyWatcher, PollingWatcher, WatchSession, collect, watch)
+
+# Says which files it saw and what the first added line of each one is
+REPORTER_SCRIPT = """#!{0}
+import sys, json
+data = json.load(sys.stdin)
+added = dict(
+    (i['name'], [j[2] for j in i['diff'] if j[1] == '+'])
+    for i in data['files'])
+print(json.dumps(dict(
+    (name, [[None, 'warn', 'first: ' + lines[0]]])
+    for name, lines in added.items() if lines)))
+"""
+
+
+class FakeWatcher(object):
+
+    """
+    Hands out changes from a list.
+
+    """
+    def __init__(self, changes):
+        self.changes = list(changes)
+
+    def read(self, timeout=None):
+        return self.changes.pop(0) if self.changes else set()
+
+    def close(self):
+        pass
+
+
+class TestWatchers(JigTestCase):
+
+    """
+    Notice files being saved.
+
+    """
+    def setUp(self):
+        super(TestWatchers, self).setUp()
+
+        self.root = mkdtemp()
+        mkdir(join(self.root, '.git'))
+
+    def _changes(self, watcher):
+        self.create_file(self.root, 'a.txt', 'a')
+        self.create_file(self.root, '.git/index', 'ignored')
+        self.create_file(self.root, 'sub/b.txt', 'b')
+
+        return collect(watcher, 0.1, timeout=2)
+
+    def test_inotify(self):
+        """
+        Inotify reports saved files, including ones in new directories.
+        """
+        watcher = InotifyWatcher(self.root)
+
+        try:
+            self.assertEqual(
+                set(['a.txt', 'sub/b.txt']), self._changes(watcher))
+        finally:
+            watcher.close()
+
+    def test_polling(self):
+        """
+        Without inotify the files are looked at for changes.
+        """
+        watcher = PollingWatcher(self.root, interval=0.01)
+
+        self.assertEqual(
+            set(['a.txt', 'sub/b.txt']), self._changes(watcher))
+
+    def test_collect(self):
+        """
+        A burst of changes is checked at once.
+        """
+        watcher = FakeWatcher(
+            [set(['a']), set(['b', 'a']), set(), set(['c'])])
+
+        self.assertEqual(set(['a', 'b']), collect(watcher, 0.1))
+        self.assertEqual(set(['c']), collect(watcher, 0.1))
+
+    def test_collect_overflow(self):
+        """
+        If changes were lost, everything needs checking.
+        """
+        watcher = FakeWatcher([set(['a']), None, set(['b'])])
+
+        self.assertIsNone(collect(watcher, 0.1))
+
+
+class TestWatchSession(RunnerTestCase, PluginTestCase):
+
+    """
+    Check the working directory a few files at a time.
+
+    """
+    def setUp(self):
+        super(TestWatchSession, self).setUp()
+
+        plugindir = mkdtemp()
+
+        with open(join(plugindir, 'config.cfg'), 'w') as fh:
+            fh.write(
+                '[plugin]\nbundle = test\nname = reporter\n'
+                'files = *.txt\n')
+
+        script = join(plugindir, 'pre-commit')
+        with open(script, 'w') as fh:
+            fh.write(REPORTER_SCRIPT.format(sys.executable))
+        chmod(script, 0o755)
+
+        pm = PluginManager(self.jigconfig)
+        pm.add(plugindir)
+        set_jigconfig(self.gitrepodir, pm.config)
+
+        self.commit(self.gitrepodir, 'a.txt', 'a\n')
+        self.commit(self.gitrepodir, 'b.txt', 'b\n')
+
+        self.session = WatchSession(self.gitrepodir, self.runner)
+
+    def _messages(self):
+        results = self.session.results()
+        self.assertEqual(1, len(results))
+
+        retcode, data, stderr = list(results.values())[0]
+        self.assertEqual(0, retcode)
+
+        return data
+
+    def test_everything(self):
+        """
+        Unstaged changes are checked against HEAD.
+        """
+        self.create_file(self.gitrepodir, 'a.txt', 'changed a\n')
+        self.stage(self.gitrepodir, 'b.txt', 'changed b\n')
+
+        self.session.check()
+
+        self.assertEqual(
+            {'a.txt': [[None, 'warn', 'first: changed a']],
+             'b.txt': [[None, 'warn', 'first: changed b']]},
+            self._messages())
+
+    def test_only_changed_files(self):
+        """
+        Checking some files keeps the results for the others.
+        """
+        self.create_file(self.gitrepodir, 'a.txt', 'changed a\n')
+        self.create_file(self.gitrepodir, 'b.txt', 'changed b\n')
+
+        self.session.check()
+
+        self.create_file(self.gitrepodir, 'a.txt', 'again\n')
+        # This changed but isn't checked, the old result is kept
+        self.create_file(self.gitrepodir, 'b.txt', 'not checked\n')
+
+        self.session.check(['a.txt'])
+
+        self.assertEqual(
+            {'a.txt': [[None, 'warn', 'first: again']],
+             'b.txt': [[None, 'warn', 'first: changed b']]},
+            self._messages())
+
+    def test_reverted(self):
+        """
+        A file that is back the way it was has nothing to report.
+        """
+        self.create_file(self.gitrepodir, 'a.txt', 'changed a\n')
+        self.session.check()
+
+        self.create_file(self.gitrepodir, 'a.txt', 'a\n')
+        self.session.check(['a.txt'])
+
+        self.assertEqual({}, self._messages())
+
+    def test_deleted(self):
+        """
+        Removing a file forgets what was said about it.
+        """
+        self.create_file(self.gitrepodir, 'c.txt', 'c\n')
+        self.session.check(['c.txt'])
+
+        remove(join(self.gitrepodir, 'c.txt'))
+        self.session.check(['c.txt'])
+
+        self.assertEqual({}, self._messages())
+
+    def test_file_filters(self):
+        """
+        Plugins are not run for files they don't check.
+        """
+        self.create_file(self.gitrepodir, 'c.py', 'c\n')
+
+        self.session.check(['c.py'])
+
+        self.assertEqual({}, self.session.results())
+
+    def test_watch(self):
+        """
+        Results are shown after the first check and after each change.
+        """
+        self.create_file(self.gitrepodir, 'a.txt', 'changed a\n')
+
+        lines = []
+        watch(
+            self.gitrepodir, self.runner, lines.append,
+            watcher=FakeWatcher([set(['b.txt']), set()]), delay=0,
+            cycles=1)
+
+        output = '\n'.join(lines)
+
+        self.assertIn('Checked everything', output)
+        self.assertIn('Checked b.txt', output)
+        self.assertIn('first: changed a', output)
@@ -1,11 +1,13 @@
 # coding=utf-8
 import shlex
+import unittest
 from os import makedirs
 from os.path import join, dirname
-from subprocess import STDOUT, CalledProcessError
+from subprocess import STDOUT, CalledProcessError, check_output
 from functools import wraps
 from io import StringIO
 from textwrap import dedent
+from tempfile import mkdtemp
 
 from mock import patch
 from git import Repo
@@ -18,17 +20,6 @@ from jig.tools import NumberedDirectoriesToGit, cwd_bounce
 from jig.output import strip_paint, ConsoleView, ResultsCollator
 
 
-try:
-    import unittest2 as unittest
-except ImportError:
-    import unittest
-
-try:
-    from subprocess import check_output
-except ImportError:
-    from jig.backports import check_output
-
-
 def cd_gitrepo(func):
     """
     Change the current working directory to the test case's Git repository.
@@ -66,6 +57,25 @@ class JigTestCase(unittest.TestCase):
     def setUp(self):
         self.fixturesdir = join(dirname(__file__), 'fixtures')
 
+        # Parsed plugin expectations are cached here instead of in ~/.jig,
+        # what earlier runs left behind can't change the results
+        self.expectations_cache_dir = mkdtemp()
+
+        cache_patch = patch(
+            'jig.plugins.testrunner.expectations_cache_dir',
+            return_value=self.expectations_cache_dir)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+        # The same goes for the digests of plugin directories
+        self.digests_cache_dir = mkdtemp()
+
+        digests_patch = patch(
+            'jig.plugins.cache.digests_cache_dir',
+            return_value=self.digests_cache_dir)
+        digests_patch.start()
+        self.addCleanup(digests_patch.stop)
+
     def assertResults(self, expected, actual):
         """
         Assert that output matches expected argument.
@@ -0,0 +1,278 @@
+"""
+Timing instrumentation
+======================
+
+Records where the time goes while jig runs. The runner's own work is split
+into phases (reading the diff, encoding the data for plugins, collating the
+results, etc.) and every plugin that runs records how long it took and how
+much it cost.
+
+With ``trace`` turned on, every time a phase is entered is also kept as a
+span, along with when each plugin was started, was sent its input, ran and
+wrote its output. The spans can be saved in the Chrome trace event format and
+opened in Perfetto or ``chrome://tracing``. Each plugin gets a track of its
+own, which shows what was running at the same time and what the run was
+waiting for.
+"""
+import sys
+import json
+from time import time
+from threading import local, Lock, current_thread
+from contextlib import contextmanager
+from collections import namedtuple, OrderedDict
+
+
+PluginTiming = namedtuple(
+    'PluginTiming', 'wall cpu maxrss stdin_bytes stdout_bytes')
+
+Span = namedtuple('Span', 'name track started finished')
+
+# The track for the runner's own work
+MAIN_TRACK = 'jig'
+
+
+def process_usage(rusage):
+    """
+    Resource usage of a single child process that has finished.
+
+    ``rusage`` is what :py:func:`os.wait4` returns for the process.
+
+    Returns a tuple of ``(cpu_seconds, maxrss_kb)``.
+    """
+    if rusage is None:
+        return (0.0, 0)
+
+    maxrss = rusage.ru_maxrss
+    if sys.platform == 'darwin':   # pragma: no cover
+        # Reported in bytes instead of kilobytes
+        maxrss = maxrss // 1024
+
+    return (rusage.ru_utime + rusage.ru_stime, maxrss)
+
+
+def _ms(seconds):
+    return '{0:.1f}ms'.format(seconds * 1000)
+
+
+class Timings(object):
+
+    """
+    Collects the time spent in each phase of a run and by each plugin.
+
+    Plugins run in separate threads, each thread keeps track of its own
+    phases. The time spent in a phase is the total for all the threads.
+
+    If ``trace`` is ``True`` every phase is also kept as a :py:class:`Span`
+    in ``spans``.
+
+    """
+    def __init__(self, trace=False):
+        self.phases = OrderedDict()
+        self.plugins = OrderedDict()
+
+        self.trace = trace
+        self.spans = []
+        self.started = time()
+
+        self._lock = Lock()
+        self._local = local()
+
+    @property
+    def _stack(self):
+        # Phases that are currently being timed, as [name, started]
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _add(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @property
+    def current_track(self):
+        """
+        The track spans in this thread are added to.
+        """
+        track = getattr(self._local, 'track', None)
+
+        if track:
+            return track
+
+        thread = current_thread()
+        return MAIN_TRACK if thread.name == 'MainThread' else thread.name
+
+    @contextmanager
+    def track(self, name):
+        """
+        Add the spans in this thread to the track ``name``.
+        """
+        outer = getattr(self._local, 'track', None)
+        self._local.track = name
+
+        try:
+            yield
+        finally:
+            self._local.track = outer
+
+    def add_span(self, name, started, finished, track=None):
+        """
+        Keep a span from ``started`` to ``finished``, if tracing.
+        """
+        if not self.trace or started is None or finished is None:
+            return
+
+        span = Span(name, track or self.current_track, started, finished)
+
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a phase of the run.
+
+        Phases add up if they are entered more than once. They can also be
+        nested, the time spent in the inner phase is not counted as part of
+        the outer one.
+        """
+        now = time()
+
+        if self._stack:
+            # Stop the clock on the outer phase
+            outer = self._stack[-1]
+            self._add(outer[0], now - outer[1])
+
+        self._stack.append([name, now])
+
+        entered = now
+
+        try:
+            yield
+        finally:
+            name, started = self._stack.pop()
+
+            now = time()
+            self._add(name, now - started)
+            self.add_span(name, entered, now)
+
+            if self._stack:
+                # And start it again
+                self._stack[-1][1] = now
+
+    def add_phases(self, other):
+        """
+        Add the time spent in each phase of ``other``, another
+        :py:class:`Timings`, and its spans.
+        """
+        for name, seconds in other.phases.items():
+            self._add(name, seconds)
+
+        if self.trace:
+            with self._lock:
+                self.spans.extend(other.spans)
+
+    def add_plugin(self, plugin, timing):
+        """
+        Record the :py:class:`PluginTiming` for a plugin that ran.
+        """
+        with self._lock:
+            self.plugins[plugin] = timing
+
+    def as_dict(self):
+        """
+        The timings as a dictionary suitable for serializing to JSON.
+        """
+        plugins = []
+        for plugin, timing in self.plugins.items():
+            data = OrderedDict([
+                ('bundle', plugin.bundle), ('name', plugin.name)])
+            data.update(timing._asdict())
+            plugins.append(data)
+
+        return OrderedDict([
+            ('phases', self.phases),
+            ('plugins', plugins)])
+
+    def write(self, filename):
+        """
+        Save the timings as JSON to ``filename``.
+        """
+        with open(filename, 'w') as fh:
+            json.dump(self.as_dict(), fh, indent=2)
+
+    def trace_events(self):
+        """
+        The spans as a list of Chrome trace events.
+
+        Each track is a thread, in the order they first appear, with the
+        runner's own track first.
+        """
+        tracks = OrderedDict([(MAIN_TRACK, 1)])
+        for span in self.spans:
+            tracks.setdefault(span.track, len(tracks) + 1)
+
+        events = [OrderedDict([
+            ('name', 'process_name'), ('ph', 'M'), ('pid', 1),
+            ('args', {'name': 'jig'})])]
+
+        for track, tid in tracks.items():
+            events.append(OrderedDict([
+                ('name', 'thread_name'), ('ph', 'M'), ('pid', 1),
+                ('tid', tid), ('args', {'name': track})]))
+            events.append(OrderedDict([
+                ('name', 'thread_sort_index'), ('ph', 'M'), ('pid', 1),
+                ('tid', tid), ('args', {'sort_index': tid})]))
+
+        # Outer spans first so they are drawn around the ones inside them
+        for span in sorted(
+                self.spans, key=lambda i: (i.started, -i.finished)):
+            events.append(OrderedDict([
+                ('name', span.name), ('cat', 'jig'), ('ph', 'X'),
+                ('ts', int((span.started - self.started) * 1e6)),
+                ('dur', int((span.finished - span.started) * 1e6)),
+                ('pid', 1), ('tid', tracks[span.track])]))
+
+        return events
+
+    def write_trace(self, filename):
+        """
+        Save the spans to ``filename`` in the Chrome trace event format.
+        """
+        with open(filename, 'w') as fh:
+            json.dump(OrderedDict([
+                ('traceEvents', self.trace_events()),
+                ('displayTimeUnit', 'ms')]), fh)
+
+    def report(self):
+        """
+        Format the timings for people to read.
+
+        Returns a list of lines.
+        """
+        out = ['Timings', '']
+
+        for name, seconds in self.phases.items():
+            out.append('    {0:<24}{1:>10}'.format(name, _ms(seconds)))
+
+        if not self.plugins:
+            return out
+
+        out.append('')
+        out.append('    {0:<24}{1:>10}{2:>10}{3:>10}{4:>10}{5:>10}'.format(
+            'plugin', 'wall', 'cpu', 'max rss', 'stdin', 'stdout'))
+
+        # Slowest first, this is what people are looking for
+        by_wall = sorted(
+            self.plugins.items(), key=lambda i: i[1].wall, reverse=True)
+
+        for plugin, timing in by_wall:
+            out.append(
+                '    {0:<24}{1:>10}{2:>10}{3:>10}{4:>10}{5:>10}'.format(
+                    plugin.name, _ms(timing.wall), _ms(timing.cpu),
+                    '{0}KB'.format(timing.maxrss),
+                    '{0}B'.format(timing.stdin_bytes),
+                    '{0}B'.format(timing.stdout_bytes)))
+
+        return out
@@ -1,13 +1,12 @@
 import re
 from unicodedata import normalize
-from os import listdir, walk, makedirs, unlink, chdir, getcwd
-from os.path import join, dirname, isdir
-from tempfile import mkdtemp
-from shutil import copy2
+from os import listdir, walk, chdir, getcwd, access, X_OK
+from os.path import join, isdir
+from hashlib import sha1
+from time import time
+from tempfile import mkdtemp, TemporaryFile
 from contextlib import contextmanager
 
-from git import Repo
-
 _punct_re = re.compile(r'[\t !"#$%&\'()*\-/<=>?@\[\\\]^_`{|},.]+')
 
 
@@ -75,6 +74,25 @@ def cwd_bounce(dir):
         chdir(original_dir)
 
 
+def _fast_import_path(path):
+    """
+    Quotes ``path`` for a ``git fast-import`` command if it needs to be.
+    """
+    if not path.startswith('"') and '\n' not in path:
+        return path
+
+    return '"{0}"'.format(
+        path.replace('\\', '\\\\').replace('"', '\\"').replace(
+            '\n', '\\n'))
+
+
+def _fast_import_data(payload):
+    """
+    The ``data`` command of ``git fast-import`` for the bytes ``payload``.
+    """
+    return 'data {0}\n'.format(len(payload)).encode('ascii') + payload + b'\n'
+
+
 class NumberedDirectoriesToGit(object):
 
     """
@@ -110,18 +128,41 @@ class NumberedDirectoriesToGit(object):
 
         self.numdir = numdir
         self.target = mkdtemp()
+        self._history = None
         self._repo = None
 
     @property
-    def repo(self):
+    def history(self):
         """
         Does the conversion and returns the ``git.Repo`` object.
+
+        Nothing is checked out, the commits are only in the object database.
+        This is all that is needed to look at the diffs between them.
+        """
+        if not self._history:
+            from git import Repo
+
+            self._history = Repo.init(self.target)
+
+            self._import(self._history, sorted(
+                join(self.numdir, i) for i in listdir(self.numdir)
+                if isdir(join(self.numdir, i))))
+
+        return self._history
+
+    @property
+    def repo(self):
+        """
+        Does the conversion and returns the ``git.Repo`` object with the last
+        commit checked out.
         """
         if not self._repo:
-            self._repo = Repo.init(self.target)
+            repo = self.history
+
+            if repo.head.is_valid():
+                repo.head.reset(index=True, working_tree=True)
 
-            for d in sorted(listdir(self.numdir)):
-                self._commit(self._repo, join(self.numdir, d))
+            self._repo = repo
 
         return self._repo
 
@@ -129,7 +170,7 @@ class NumberedDirectoriesToGit(object):
         """
         Get a list of diffs for all commits.
         """
-        repo = self.repo
+        repo = self.history
 
         diffs = []
         for commit in repo.iter_commits():
@@ -143,46 +184,52 @@ class NumberedDirectoriesToGit(object):
 
         return diffs
 
-    def _commit(self, repo, d):
+    def _import(self, repo, directories):
         """
-        Creates a new commit in the repository
+        Creates a commit in ``repo`` for each of the ``directories``.
 
-        Where ``repo`` is a ``git.Repo`` object to create the commit in. And
-        ``d`` is the directory you want the new commit to look like once the
-        commit has been made.
+        The commits are streamed to a single ``git fast-import``. A file that
+        is the same in more than one directory is only sent once.
         """
-        # List files currently in our repository
-        paths_current = set(self._flattendirectory(
-            repo.working_dir, strip=self.target))
+        branch = repo.git.symbolic_ref('HEAD')
+        committer = 'jig <jig@localhost> {0} +0000'.format(int(time()))
+
+        marks = {}
+
+        with TemporaryFile() as fh:
+            for d in directories:
+                files = []
 
-        # What needs to be added
-        paths_new = set(self._flattendirectory(
-            d, strip=d))
+                for path in sorted(self._flattendirectory(d, strip=d)):
+                    filename = join(d, path)
 
-        paths_to_add = paths_new - paths_current
-        paths_to_del = paths_current - paths_new
-        paths_same = paths_new.intersection(paths_current)
+                    with open(filename, 'rb') as content:
+                        data = content.read()
 
-        # Add
-        for path in paths_to_add.union(paths_same):
-            # Create the directory if needed
-            directory = join(self.target, dirname(path))
-            if not isdir(directory):
-                makedirs(directory)
+                    digest = sha1(data).digest()
 
-            copy2(
-                join(d, path),
-                join(self.target, path))
+                    if digest not in marks:
+                        marks[digest] = len(marks) + 1
+                        fh.write('blob\nmark :{0}\n'.format(
+                            marks[digest]).encode('ascii'))
+                        fh.write(_fast_import_data(data))
 
-            repo.index.add([path])
+                    files.append('M {0} :{1} {2}\n'.format(
+                        '100755' if access(filename, X_OK) else '100644',
+                        marks[digest], _fast_import_path(path)))
 
-        # Delete
-        for path in paths_to_del:
-            repo.index.remove([join(self.target, path)])
+                fh.write('commit {0}\ncommitter {1}\n'.format(
+                    branch, committer).encode('utf-8'))
+                fh.write(_fast_import_data(
+                    'Commit from numbered directory {0}'.format(
+                        d).encode('utf-8')))
+                # Each commit lists everything in it, what isn't is deleted
+                fh.write(b'deleteall\n')
+                fh.write(''.join(files).encode('utf-8') + b'\n')
 
-            unlink(join(self.target, path))
+            fh.seek(0)
 
-        repo.index.commit('Commit from numbered directory {0}'.format(d))
+            repo.git.fast_import('--quiet', istream=fh)
 
     def _flattendirectory(self, d, strip=None):
         """
@@ -0,0 +1,441 @@
+"""
+Watching the working directory
+==============================
+
+``jig watch`` checks files as they are saved instead of waiting for the
+commit. Changes are noticed with inotify where it's available and by looking
+at modification times where it isn't.
+
+Each check only runs the plugins that are interested in the files that were
+saved, and only on those files. What the plugins said about every other file
+is remembered from the checks before.
+"""
+import os
+import errno
+import select
+import struct
+from time import time, sleep
+from os.path import join, relpath
+from collections import OrderedDict
+
+from jig.conf import JIG_DIR_NAME, WATCH_DEBOUNCE, WATCH_POLL_INTERVAL
+
+
+# Directories that never have anything to check in them
+IGNORE_DIRECTORIES = ('.git', JIG_DIR_NAME)
+
+# Check the working directory against HEAD or against the index
+AGAINST_HEAD = 'head'
+AGAINST_INDEX = 'index'
+
+# From sys/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+# A file has been saved, moved or removed
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE)
+
+_EVENT = struct.Struct('iIII')
+
+
+def _walk(root):
+    """
+    Directories and files under ``root``, skipping the ignored directories.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [i for i in dirnames if i not in IGNORE_DIRECTORIES]
+
+        yield dirpath, filenames
+
+
+class InotifyWatcher(object):
+
+    """
+    Notices changes to the files in a directory with Linux's inotify.
+
+    Raises :py:exc:`OSError` if inotify can't be used.
+
+    """
+    def __init__(self, root):
+        import ctypes
+        import ctypes.util
+
+        self.root = root
+
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library('c'), use_errno=True)
+
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        # Watch descriptors and the directory each one is for
+        self._directories = {}
+
+        for dirpath, _ in _walk(root):
+            self._add(dirpath)
+
+    def _add(self, directory):
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(
+            self.fd, directory.encode('utf-8'), WATCH_MASK)
+
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                # Gone before we could watch it
+                return
+            raise OSError(error, 'Could not watch {0}'.format(directory))
+
+        self._directories[wd] = directory
+
+    def fileno(self):
+        return self.fd
+
+    def _events(self):
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError as ose:
+                if ose.errno == errno.EAGAIN:
+                    return
+                raise
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                yield wd, mask, name.decode('utf-8', 'replace')
+
+    def read(self, timeout=None):
+        """
+        Wait up to ``timeout`` seconds for files to change.
+
+        Returns a set of the changed paths relative to ``root``, empty if
+        nothing changed. Returns ``None`` if there were too many changes to
+        keep track of and everything should be checked.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+
+        if not readable:
+            return set()
+
+        changed = set()
+
+        for wd, mask, name in self._events():
+            if mask & IN_Q_OVERFLOW:
+                changed = None
+                continue
+
+            if wd not in self._directories or not name:
+                continue
+
+            filename = join(self._directories[wd], name)
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and \
+                        name not in IGNORE_DIRECTORIES:
+                    # A new directory, watch it and anything already in it
+                    for dirpath, filenames in _walk(filename):
+                        self._add(dirpath)
+                        if changed is not None:
+                            changed.update(
+                                relpath(join(dirpath, i), self.root)
+                                for i in filenames)
+                continue
+
+            if changed is not None:
+                changed.add(relpath(filename, self.root))
+
+        return changed
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class PollingWatcher(object):
+
+    """
+    Notices changes to the files in a directory by looking at them.
+
+    Used where inotify is not available.
+
+    """
+    def __init__(self, root, interval=WATCH_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+
+        for dirpath, filenames in _walk(self.root):
+            for filename in filenames:
+                path = join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[relpath(path, self.root)] = (
+                    stat.st_mtime_ns, stat.st_size)
+
+        return snapshot
+
+    def read(self, timeout=None):
+        """
+        Wait up to ``timeout`` seconds for files to change.
+
+        Returns a set of the changed paths relative to ``root``.
+        """
+        started = time()
+
+        while True:
+            snapshot = self._scan()
+
+            changed = set(
+                i for i in set(snapshot) | set(self._snapshot)
+                if snapshot.get(i) != self._snapshot.get(i))
+
+            self._snapshot = snapshot
+
+            if changed:
+                return changed
+
+            if timeout is not None and time() - started >= timeout:
+                return set()
+
+            sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+def create_watcher(root):
+    """
+    Watch ``root`` with inotify, or by polling if that doesn't work.
+    """
+    try:
+        return InotifyWatcher(root)
+    except (OSError, AttributeError):
+        return PollingWatcher(root)
+
+
+def collect(watcher, delay, timeout=None):
+    """
+    Wait for files to change and gather up a burst of changes.
+
+    Waits up to ``timeout`` seconds for the first change. After that, changes
+    keep being added until there have been none for ``delay`` seconds. Saving
+    a file often writes it, renames it and changes it again, this makes it
+    one check instead of three.
+
+    Returns the paths like :py:meth:`InotifyWatcher.read`.
+    """
+    changed = watcher.read(timeout)
+
+    while changed != set():
+        more = watcher.read(delay)
+
+        if more == set():
+            break
+
+        if changed is None or more is None:
+            changed = None
+        else:
+            changed |= more
+
+    return changed
+
+
+def _plugin_key(plugin):
+    return (plugin.bundle, plugin.name)
+
+
+class WatchSession(object):
+
+    """
+    Checks the working directory a few files at a time.
+
+    Results are remembered per plugin and per file. When files are checked
+    again what the plugins said about them before is replaced, everything
+    else is kept. :py:meth:`results` puts it all back together in the same
+    form :py:meth:`jig.runner.Runner.results` returns.
+
+    """
+    def __init__(self, gitrepo, runner, plugin=None, against=AGAINST_HEAD):
+        self.gitrepo = gitrepo
+        self.runner = runner
+        self.plugin = plugin
+        self.against = against
+
+        # The latest plugin object for each (bundle, name)
+        self._plugins = OrderedDict()
+        # For each plugin, what it said about each file. Messages that are
+        # not about a file are kept under None.
+        self._files = {}
+        # Plugins that failed, with their return code and output
+        self._errors = {}
+
+    def _rev_range(self):
+        import git
+        from jig.gitutils.branches import (
+            RevRangePair, working_tree, staged_tree)
+
+        if self.against == AGAINST_INDEX:
+            base = staged_tree(self.gitrepo)
+        else:
+            base = git.Repo(self.gitrepo).head.commit
+
+        return RevRangePair(
+            base, working_tree(self.gitrepo),
+            '{0}..working directory'.format(self.against))
+
+    def _ignored(self, paths):
+        import git
+
+        try:
+            return set(git.Repo(self.gitrepo).ignored(*paths))
+        except git.exc.GitCommandError:   # pragma: no cover
+            return set()
+
+    def check(self, paths=None):
+        """
+        Run the plugins on ``paths``, or on everything if it's ``None``.
+
+        Returns ``False`` if all of the paths are ignored by Git and nothing
+        was checked.
+        """
+        if paths is not None:
+            paths = sorted(set(paths) - self._ignored(paths))
+
+            if not paths:
+                return False
+
+        results = self.runner.results(
+            self.gitrepo, plugin=self.plugin, rev_range=self._rev_range(),
+            paths=paths) or {}
+
+        if paths is None:
+            # Everything has been checked again
+            self._files = {}
+            self._errors = {}
+
+        for files in self._files.values():
+            for path in paths or []:
+                files.pop(path, None)
+
+        for plugin, (retcode, data, stderr) in results.items():
+            key = _plugin_key(plugin)
+
+            self._plugins[key] = plugin
+            self._errors.pop(key, None)
+
+            if retcode != 0:
+                self._errors[key] = (retcode, data, stderr)
+                continue
+
+            files = self._files.setdefault(key, {})
+
+            if isinstance(data, dict):
+                files.update(data)
+            elif data:
+                files[None] = data
+            else:
+                files.pop(None, None)
+
+        return True
+
+    def results(self):
+        """
+        Everything the plugins have said so far.
+
+        Returns an ordered dictionary of plugin to ``(retcode, data,
+        stderr)``.
+        """
+        results = OrderedDict()
+
+        for key, plugin in self._plugins.items():
+            if key in self._errors:
+                results[plugin] = self._errors[key]
+                continue
+
+            files = self._files.get(key, {})
+
+            if None in files:
+                # This plugin reports on the change as a whole
+                results[plugin] = (0, files[None], '')
+                continue
+
+            results[plugin] = (0, dict(
+                (name, messages) for name, messages in files.items()
+                if messages), '')
+
+        return results
+
+
+def watch(gitrepo, runner, printer, plugin=None, against=AGAINST_HEAD,
+          delay=None, watcher=None, cycles=None):
+    """
+    Check the working directory every time files are saved.
+
+    Everything is checked once to begin with. After that, bursts of changes
+    are gathered with :py:func:`collect` and only those files are checked.
+    The results so far are shown with the runner's formatter after every
+    check.
+
+    ``cycles`` is how many times to check after the first one, ``None`` to
+    keep going until interrupted.
+    """
+    from jig.output import ResultsCollator, flush_printer
+
+    delay = WATCH_DEBOUNCE if delay is None else delay
+    watcher = watcher or create_watcher(gitrepo)
+
+    session = WatchSession(gitrepo, runner, plugin=plugin, against=against)
+
+    def show(changed):
+        results = session.results()
+
+        if changed:
+            printer('Checked {0}'.format(', '.join(changed)))
+        else:
+            printer('Checked everything')
+
+        runner.formatter.print_results(printer, ResultsCollator(results))
+
+        # Show the results now, not when watching stops
+        flush_printer(printer)
+
+    try:
+        session.check()
+        show(None)
+
+        count = 0
+        while cycles is None or count < cycles:
+            count += 1
+
+            changed = collect(watcher, delay)
+
+            if changed is None:
+                # Lost track, check everything again
+                session.check()
+                show(None)
+            elif changed and session.check(changed):
+                show(sorted(changed))
+    finally:
+        watcher.close()
+
+    return session